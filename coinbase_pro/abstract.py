@@ -13,10 +13,16 @@
 #
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+
 from abc import ABC, abstractmethod, abstractproperty
+from typing import TYPE_CHECKING
 
-from requests import Response, Session
-from requests.models import PreparedRequest
+# NOTE: requests is only imported for annotations so that importing the
+# websocket client does not import it
+if TYPE_CHECKING:
+    from requests import Response, Session
+    from requests.models import PreparedRequest
 
 
 class AbstractAPI(ABC):
@@ -66,6 +72,10 @@ class AbstractAuth(ABC):
     def api(self) -> AbstractAPI:
         pass
 
+    @abstractmethod
+    def sign(self, method: str, path: str, body: str = None) -> dict:
+        pass
+
     @abstractmethod
     def signature(self, message: str) -> bytes:
         pass
@@ -75,6 +85,64 @@ class AbstractAuth(ABC):
         pass
 
 
+class AbstractClock(ABC):
+    @abstractproperty
+    def offset(self) -> float:
+        pass
+
+    @abstractmethod
+    def time(self) -> float:
+        pass
+
+
+class AbstractCodec(ABC):
+    @abstractproperty
+    def name(self) -> str:
+        pass
+
+    @abstractmethod
+    def encode(self, value: object) -> bytes:
+        pass
+
+    @abstractmethod
+    def decode(self, payload: bytes) -> object:
+        pass
+
+
+class AbstractLimiter(ABC):
+    @abstractmethod
+    def reserve(self, private: bool = False) -> float:
+        pass
+
+    @abstractmethod
+    def delay(self, private: bool = False) -> float:
+        pass
+
+    @abstractmethod
+    def wait(self, private: bool = False) -> float:
+        pass
+
+
+class AbstractRetry(ABC):
+    @abstractmethod
+    def retryable(self, method: str, status: int, attempt: int) -> bool:
+        pass
+
+    @abstractmethod
+    def backoff(self, attempt: int, headers: dict = None) -> float:
+        pass
+
+
+class AbstractMetrics(ABC):
+    @abstractmethod
+    def record(self, event: object) -> None:
+        pass
+
+    @abstractmethod
+    def decoded(self, seconds: float) -> None:
+        pass
+
+
 class AbstractMessenger(ABC):
     @abstractmethod
     def __init__(self, auth: AbstractAuth = None):
@@ -92,10 +160,18 @@ class AbstractMessenger(ABC):
     def session(self) -> Session:
         pass
 
+    @abstractproperty
+    def limiter(self) -> AbstractLimiter:
+        pass
+
     @abstractproperty
     def timeout(self) -> int:
         pass
 
+    @abstractmethod
+    def request(self, method: str, path: str, data: dict = None) -> Response:
+        pass
+
     @abstractmethod
     def get(self, path: str, data: dict = None) -> Response:
         pass
@@ -116,6 +192,10 @@ class AbstractMessenger(ABC):
     def page(self, path: str, data: dict = None) -> list:
         pass
 
+    @abstractmethod
+    def paginate(self, path: str, data: dict = None, cursor: str = "after"):
+        pass
+
     @abstractmethod
     def close(self) -> None:
         pass
@@ -0,0 +1,299 @@
+# coinbase-pro - A Python API Adapter for Coinbase Pro and Coinbase Exchange
+# Copyright (C) 2021 teleprint.me
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from coinbase_pro import models
+from coinbase_pro.abstract import AbstractClient
+from coinbase_pro.aio.messenger import AsyncMessenger, AsyncSubscriber
+from coinbase_pro.messenger import API, Auth
+
+
+class Account(AsyncSubscriber):
+    async def list(self):
+        return self.decode(await self.messenger.get("/accounts"))
+
+    async def get(self, account_id: str) -> dict:
+        return self.decode(await self.messenger.get(f"/accounts/{account_id}"))
+
+    async def holds(self, account_id: str, data: dict = None) -> list:
+        return self.decode(
+            await self.messenger.get(f"/accounts/{account_id}/holds", data)
+        )
+
+    async def ledger(
+        self, account_id: str, data: dict = None, typed: bool = False
+    ) -> list:
+        return self.decode(
+            await self.messenger.get(f"/accounts/{account_id}/ledger", data),
+            models.LedgerEntry if typed else None,
+        )
+
+    async def transfers(self, account_id: str, data: dict = None) -> list:
+        return self.decode(
+            await self.messenger.get(f"/accounts/{account_id}/transfers", data)
+        )
+
+
+class Coinbase(AsyncSubscriber):
+    async def wallets(self) -> list:
+        return self.decode(await self.messenger.get("/coinbase-accounts"))
+
+    async def generate_address(self, account_id: str) -> dict:
+        return self.decode(
+            await self.messenger.post(f"/coinbase-accounts/{account_id}/addresses")
+        )
+
+    async def deposit_from(self, data: dict) -> dict:
+        return self.decode(
+            await self.messenger.post("/deposits/coinbase-account", data)
+        )
+
+    async def withdraw_to(self, data: dict) -> dict:
+        return self.decode(
+            await self.messenger.post("/withdrawals/coinbase-account", data)
+        )
+
+
+class Convert(AsyncSubscriber):
+    async def post(self, data: dict) -> dict:
+        return self.decode(await self.messenger.post("/conversions", data))
+
+    async def get(self, conversion_id: str, data: dict = None) -> dict:
+        return self.decode(
+            await self.messenger.get(f"/conversions/{conversion_id}", data)
+        )
+
+
+class Currency(AsyncSubscriber):
+    async def list(self):
+        return self.decode(await self.messenger.get("/currencies"))
+
+    async def get(self, currency_id: str) -> dict:
+        return self.decode(await self.messenger.get(f"/currencies/{currency_id}"))
+
+
+class Transfer(AsyncSubscriber):
+    async def deposit_from(self, data: dict) -> dict:
+        return self.decode(await self.messenger.post("/deposits/payment-method", data))
+
+    async def methods(self) -> list:
+        return self.decode(await self.messenger.get("/payment-methods"))
+
+    async def list(self):
+        return self.decode(await self.messenger.get("/transfers"))
+
+    async def get(self, transfer_id: str) -> dict:
+        return self.decode(await self.messenger.get(f"/transfers/{transfer_id}"))
+
+    async def withdraw_to_address(self, data: dict) -> dict:
+        return self.decode(await self.messenger.post("/withdrawals/crypto", data))
+
+    async def withdraw_estimate(self, data: dict = None) -> dict:
+        return self.decode(await self.messenger.get("/withdrawals/fee-estimate", data))
+
+    async def withdraw_to(self, data: dict) -> dict:
+        return self.decode(
+            await self.messenger.post("/withdrawals/payment-method", data)
+        )
+
+
+class Fee(AsyncSubscriber):
+    async def get(self) -> dict:
+        return self.decode(await self.messenger.get("/fees"))
+
+
+class Order(AsyncSubscriber):
+    async def fills(self, data: dict, typed: bool = False) -> list:
+        return self.decode(
+            await self.messenger.get("/fills", data), models.Fill if typed else None
+        )
+
+    async def list(self, data: dict, typed: bool = False):
+        return self.decode(
+            await self.messenger.get("/orders", data), models.Order if typed else None
+        )
+
+    async def cancel_all(self, data: dict = None) -> list:
+        return self.decode(await self.messenger.delete("/orders", data))
+
+    async def post(self, data: dict, typed: bool = False) -> dict:
+        return self.decode(
+            await self.messenger.post("/orders", data), models.Order if typed else None
+        )
+
+    async def get(self, order_id: str, typed: bool = False) -> dict:
+        return self.decode(
+            await self.messenger.get(f"/orders/{order_id}"),
+            models.Order if typed else None,
+        )
+
+    async def cancel(self, order_id: str, data: dict = None) -> str:
+        return self.decode(await self.messenger.delete(f"/orders/{order_id}", data))
+
+
+class Oracle(AsyncSubscriber):
+    async def prices(self) -> dict:
+        return self.decode(await self.messenger.get("/oracle"))
+
+
+class Product(AsyncSubscriber):
+    async def list(self):
+        return self.decode(await self.messenger.get("/products"))
+
+    async def get(self, product_id: str) -> dict:
+        return self.decode(await self.messenger.get(f"/products/{product_id}"))
+
+    async def book(self, product_id: str, data: dict = None) -> dict:
+        return self.decode(
+            await self.messenger.get(f"/products/{product_id}/book", data)
+        )
+
+    async def ticker(self, product_id: str, typed: bool = False) -> dict:
+        return self.decode(
+            await self.messenger.get(f"/products/{product_id}/ticker"),
+            models.Ticker if typed else None,
+        )
+
+    async def trades(
+        self, product_id: str, data: dict = None, typed: bool = False
+    ) -> list:
+        return self.decode(
+            await self.messenger.get(f"/products/{product_id}/trades", data),
+            models.Trade if typed else None,
+        )
+
+    async def candles(
+        self, product_id: str, data: dict = None, typed: bool = False
+    ) -> list:
+        return self.decode(
+            await self.messenger.get(f"/products/{product_id}/candles", data),
+            models.Candle if typed else None,
+        )
+
+    async def stats(self, product_id: str) -> dict:
+        return self.decode(await self.messenger.get(f"/products/{product_id}/stats"))
+
+
+class Profile(AsyncSubscriber):
+    async def list(self, data: dict = None):
+        return self.decode(await self.messenger.get("/profiles", data))
+
+    async def create(self, data: dict) -> dict:
+        return self.decode(await self.messenger.post("/profiles", data))
+
+    async def transfer(self, data: dict) -> dict:
+        return self.decode(await self.messenger.post("/profiles/transfer", data))
+
+    async def get(self, profile_id: str, data: dict) -> dict:
+        return self.decode(await self.messenger.get(f"/profiles/{profile_id}", data))
+
+    async def rename(self, profile_id: str, data: dict) -> dict:
+        return self.decode(await self.messenger.put(f"/profiles/{profile_id}", data))
+
+    async def delete(self, profile_id: str, data: dict) -> dict:
+        return self.decode(
+            await self.messenger.put(f"/profiles/{profile_id}/deactivate", data)
+        )
+
+
+class Report(AsyncSubscriber):
+    async def list(self, data: dict = None):
+        return self.decode(await self.messenger.get("/reports", data))
+
+    async def create(self, data: dict) -> dict:
+        return self.decode(await self.messenger.post("/reports", data))
+
+    async def get(self, report_id: str) -> dict:
+        return self.decode(await self.messenger.get(f"/reports/{report_id}"))
+
+
+class User(AsyncSubscriber):
+    async def limits(self, user_id: str) -> dict:
+        return self.decode(
+            await self.messenger.get(f"/users/{user_id}/exchange-limits")
+        )
+
+
+class Time(AsyncSubscriber):
+    async def get(self) -> dict:
+        # NOTE: The `epoch` field represents decimal seconds since Unix Epoch
+        return self.decode(await self.messenger.get("/time"))
+
+
+SUBSCRIBERS: dict = {
+    "account": Account,
+    "coinbase": Coinbase,
+    "convert": Convert,
+    "currency": Currency,
+    "transfer": Transfer,
+    "fee": Fee,
+    "order": Order,
+    "oracle": Oracle,
+    "product": Product,
+    "profile": Profile,
+    "report": Report,
+    "user": User,
+    "time": Time,
+}
+
+
+class AsyncCoinbasePro(AbstractClient):
+    # NOTE: Subscribers are created on first access and cached on the instance
+    subscribers: dict = SUBSCRIBERS
+
+    def __init__(self, messenger: AsyncMessenger):
+        self.messenger = messenger
+
+    def __getattr__(self, name: str) -> AsyncSubscriber:
+        cls = type(self).subscribers.get(name)
+        if cls is None:
+            raise AttributeError(f"{type(self).__name__!r} has no attribute {name!r}")
+        instance = cls(self.messenger)
+        setattr(self, name, instance)
+        return instance
+
+    def __dir__(self) -> list:
+        return sorted(set(super().__dir__()) | set(self.subscribers))
+
+    async def __aenter__(self) -> "AsyncCoinbasePro":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.messenger.close()
+
+    def __repr__(self) -> str:
+        return f"AsyncCoinbasePro(name={self.name}, key={self.key})"
+
+    def __str__(self) -> str:
+        return " ".join(word.capitalize() for word in self.name.split("_"))
+
+    @property
+    def key(self) -> str:
+        return self.messenger.auth.api.key
+
+    @property
+    def name(self):
+        return "coinbase_pro"
+
+    def plug(self, cls: object, name: str):
+        instance = cls(self.messenger)
+        setattr(self, name, instance)
+
+
+def get_messenger(settings: dict = None) -> AsyncMessenger:
+    return AsyncMessenger(Auth(API(settings)))
+
+
+def get_client(settings: dict = None) -> AsyncCoinbasePro:
+    return AsyncCoinbasePro(AsyncMessenger(Auth(API(settings))))
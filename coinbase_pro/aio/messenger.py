@@ -0,0 +1,312 @@
+# coinbase-pro - A Python API Adapter for Coinbase Pro and Coinbase Exchange
+# Copyright (C) 2021 teleprint.me
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import asyncio
+from time import monotonic
+from urllib.parse import urlencode, urlsplit
+
+from aiohttp import ClientConnectionError, ClientSession, ClientTimeout, TCPConnector
+from yarl import URL
+
+from coinbase_pro.abstract import (
+    AbstractCodec,
+    AbstractMessenger,
+    AbstractMetrics,
+    AbstractRetry,
+    AbstractSubscriber,
+)
+from coinbase_pro.cache import Cache
+from coinbase_pro.codec import get_codec
+from coinbase_pro.limiter import Limiter, get_limiter, is_private
+from coinbase_pro.messenger import CONNECTIONS, API, Auth, Pager, collect_async
+from coinbase_pro.metrics import Event
+from coinbase_pro.models import load
+from coinbase_pro.retry import Retry
+
+
+class Reply(object):
+    # NOTE: A fully read response; mirrors the parts of `requests.Response` we use
+    def __init__(
+        self,
+        status_code: int,
+        headers: dict,
+        content: bytes,
+        codec: AbstractCodec = None,
+    ):
+        self.status_code: int = status_code
+        self.headers: dict = headers
+        self.content: bytes = content
+        self.codec: AbstractCodec = codec if codec else get_codec()
+
+    def __repr__(self) -> str:
+        return f"<Reply [{self.status_code}]>"
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8")
+
+    def json(self) -> object:
+        return self.codec.decode(self.content)
+
+
+class AsyncPager(Pager):
+    def __iter__(self):
+        raise TypeError("AsyncPager must be iterated with 'async for'")
+
+    async def __aiter__(self):
+        start = monotonic()
+        data = dict(self.data)
+        while not self.exhausted(start):
+            records = self.records(await self.messenger.get(self.path, data))
+            if not records:
+                break
+            for record in records:
+                yield record
+                self.count += 1
+                if self.items and self.count >= self.items:
+                    return
+            if not self.advance(data):
+                break
+
+
+class AsyncMessenger(AbstractMessenger):
+    def __init__(
+        self,
+        auth: Auth = None,
+        limiter: Limiter = None,
+        cache: Cache = None,
+        codec: AbstractCodec = None,
+        metrics: AbstractMetrics = None,
+        retry: AbstractRetry = None,
+        connections: int = CONNECTIONS,
+    ):
+        self.__auth: Auth = auth if auth else Auth()
+        self.__session: ClientSession = None
+        self.__limiter: Limiter = limiter if limiter else get_limiter(self.api.key)
+        self.__cache: Cache = cache
+        self.__codec: AbstractCodec = codec if codec else get_codec()
+        self.__metrics: AbstractMetrics = metrics
+        self.__retry: AbstractRetry = retry if retry else Retry()
+        self.__connections: int = connections
+        self.__flights: dict = dict()
+
+    async def __aenter__(self) -> "AsyncMessenger":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+    @property
+    def auth(self) -> Auth:
+        return self.__auth
+
+    @property
+    def api(self) -> API:
+        return self.__auth.api
+
+    @property
+    def session(self) -> ClientSession:
+        # NOTE: aiohttp sessions must be created within a running event loop
+        if self.__session is None or self.__session.closed:
+            self.__session = ClientSession(
+                connector=TCPConnector(limit=self.__connections),
+                timeout=ClientTimeout(total=self.timeout),
+            )
+        return self.__session
+
+    @property
+    def limiter(self) -> Limiter:
+        return self.__limiter
+
+    @property
+    def cache(self) -> Cache:
+        return self.__cache
+
+    @property
+    def codec(self) -> AbstractCodec:
+        return self.__codec
+
+    @property
+    def metrics(self) -> AbstractMetrics:
+        return self.__metrics
+
+    @property
+    def retry(self) -> AbstractRetry:
+        return self.__retry
+
+    @property
+    def connections(self) -> int:
+        return self.__connections
+
+    @property
+    def private(self) -> bool:
+        return bool(self.api.key)
+
+    @property
+    def timeout(self) -> int:
+        return 30
+
+    def url(self, path: str, data: dict = None) -> str:
+        url = self.api.url(path)
+        if data:
+            params = {k: v for k, v in data.items() if v is not None}
+            if params:
+                url = f"{url}?{urlencode(params, doseq=True)}"
+        return url
+
+    async def request(self, method: str, path: str, data: dict = None) -> Reply:
+        private = is_private(path)
+        delay = self.limiter.reserve(private)
+        if delay:
+            await asyncio.sleep(delay)
+
+        if "GET" == method:
+            url = self.url(path, data)
+            body = bytes()
+        else:
+            url = self.url(path)
+            body = self.codec.encode(data) if data is not None else bytes()
+
+        split = urlsplit(url)
+        path_url = f"{split.path}?{split.query}" if split.query else split.path
+
+        event = Event(method, path, wait=delay, sent=len(body))
+        start = monotonic()
+        try:
+            while True:
+                # NOTE: Each attempt is signed again so its timestamp is fresh
+                headers = self.auth.sign(method, path_url, body.decode("utf-8"))
+                start = monotonic()
+                try:
+                    async with self.session.request(
+                        method,
+                        URL(url, encoded=True),
+                        data=body or None,
+                        headers=headers,
+                    ) as response:
+                        content = await response.read()
+                except (ClientConnectionError, asyncio.TimeoutError):
+                    if not self.retry.retryable(method, None, event.retries):
+                        raise
+                    backoff = self.retry.backoff(event.retries)
+                else:
+                    status = response.status
+                    if not self.retry.retryable(method, status, event.retries):
+                        break
+                    backoff = self.retry.backoff(event.retries, response.headers)
+                event.retries += 1
+                await asyncio.sleep(backoff)
+                delay = self.limiter.reserve(private)
+                if delay:
+                    await asyncio.sleep(delay)
+                event.wait += backoff + delay
+        except Exception as error:
+            event.error = type(error).__name__
+            raise
+        else:
+            event.status = response.status
+            event.received = len(content)
+        finally:
+            event.latency = monotonic() - start
+            if self.metrics is not None:
+                self.metrics.record(event)
+        return Reply(response.status, response.headers, content, self.codec)
+
+    async def get(self, path: str, data: dict = None) -> Reply:
+        ttl = self.cache.ttl(path) if self.cache is not None else 0
+        if not ttl:
+            return await self.request("GET", path, data)
+        key = self.cache.key(path, data, self.api.key)
+        response = self.cache.get(key)
+        if response is not None:
+            self.cache.count(hits=1)
+            return response
+        # NOTE: Concurrent misses await the task of the first one, which is
+        # shielded so a cancelled caller does not cancel the others
+        flight = self.__flights.get(key)
+        if flight is None:
+            self.cache.count(misses=1)
+            flight = asyncio.ensure_future(self.__fetch(key, path, data, ttl))
+            self.__flights[key] = flight
+        else:
+            self.cache.count(shared=1)
+        return await asyncio.shield(flight)
+
+    async def __fetch(self, key: tuple, path: str, data: dict, ttl: float) -> Reply:
+        try:
+            response = await self.request("GET", path, data)
+            if 200 == response.status_code:
+                self.cache.put(key, response, ttl)
+            return response
+        finally:
+            self.__flights.pop(key, None)
+
+    async def post(self, path: str, data: dict = None) -> Reply:
+        return await self.request("POST", path, data)
+
+    async def put(self, path: str, data: dict = None) -> Reply:
+        return await self.request("PUT", path, data)
+
+    async def delete(self, path: str, data: dict = None) -> Reply:
+        return await self.request("DELETE", path, data)
+
+    async def page(self, path: str, data: dict = None) -> list:
+        return await collect_async(self, path, data)
+
+    def paginate(
+        self,
+        path: str,
+        data: dict = None,
+        cursor: str = "after",
+        items: int = None,
+        seconds: float = None,
+        model: type = None,
+    ) -> AsyncPager:
+        return AsyncPager(self, path, data, cursor, items, seconds, model)
+
+    def decode(self, response: Reply) -> object:
+        if self.metrics is None:
+            return self.codec.decode(response.content)
+        start = monotonic()
+        payload = self.codec.decode(response.content)
+        self.metrics.decoded(monotonic() - start)
+        return payload
+
+    async def close(self) -> None:
+        if self.__session is not None:
+            await self.__session.close()
+
+
+class AsyncSubscriber(AbstractSubscriber):
+    def __init__(self, messenger: AsyncMessenger = None):
+        self.__messenger = messenger if messenger else AsyncMessenger()
+
+    @property
+    def messenger(self) -> AsyncMessenger:
+        return self.__messenger
+
+    # NOTE: error is left here as a convenience method for plugs
+    def error(self, response: Reply) -> bool:
+        return 200 != response.status_code
+
+    def decode(self, response: Reply, model: type = None) -> object:
+        payload = self.messenger.decode(response)
+        if model is None or self.error(response):
+            return payload
+        return load(model, payload)
@@ -0,0 +1,272 @@
+# coinbase-pro - A Python API Adapter for Coinbase Pro and Coinbase Exchange
+# Copyright (C) 2021 teleprint.me
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import asyncio
+
+from aiohttp import ClientSession, ClientWebSocketResponse, WSMsgType
+
+from coinbase_pro.abstract import AbstractCodec, AbstractStream
+from coinbase_pro.codec import get_codec
+from coinbase_pro.socket import WSS, Token
+
+# NOTE: Message types published on each channel; a match is sent on both the
+# matches and the full channel
+CHANNELS: dict = {
+    "heartbeat": ("heartbeat",),
+    "status": ("status",),
+    "ticker": ("ticker",),
+    "level2": ("snapshot", "l2update"),
+    "level2_batch": ("snapshot", "l2update"),
+    "matches": ("match", "last_match"),
+    "full": ("received", "open", "done", "match", "change", "activate"),
+}
+
+# NOTE: Messages kept per consumer before the oldest is dropped
+QUEUE: int = 10_000
+
+
+class Consumer(object):
+    def __init__(
+        self,
+        stream: "AsyncStream",
+        channel: str = None,
+        product_id: str = None,
+        size: int = QUEUE,
+    ):
+        if channel is not None and channel not in CHANNELS:
+            raise ValueError(f"channel must be one of {list(CHANNELS)}")
+        self.__stream: AsyncStream = stream
+        self.__channel: str = channel
+        self.__product_id: str = product_id
+        self.__queue: asyncio.Queue = asyncio.Queue(size)
+        self.__closed: bool = False
+        self.dropped: int = 0
+
+    def __repr__(self) -> str:
+        return f"Consumer(channel={self.channel}, product_id={self.product_id})"
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> dict:
+        message = await self.get()
+        if message is None:
+            raise StopAsyncIteration
+        return message
+
+    @property
+    def channel(self) -> str:
+        return self.__channel
+
+    @property
+    def product_id(self) -> str:
+        return self.__product_id
+
+    @property
+    def types(self) -> tuple:
+        return CHANNELS[self.__channel] if self.__channel else None
+
+    @property
+    def pending(self) -> int:
+        return self.__queue.qsize()
+
+    @property
+    def closed(self) -> bool:
+        return self.__closed
+
+    def put(self, message: dict) -> None:
+        # NOTE: A slow consumer loses its oldest messages instead of stalling
+        # the reader and every other consumer
+        if self.__queue.full():
+            self.__queue.get_nowait()
+            self.dropped += 1
+        self.__queue.put_nowait(message)
+
+    async def get(self) -> dict:
+        if self.__closed and self.__queue.empty():
+            return None
+        return await self.__queue.get()
+
+    def close(self) -> None:
+        if self.__closed:
+            return
+        self.__closed = True
+        self.__stream.remove(self)
+        # NOTE: Wakes a waiting reader; a full queue has no waiting reader
+        if not self.__queue.full():
+            self.__queue.put_nowait(None)
+
+
+class AsyncStream(AbstractStream):
+    def __init__(self, token: Token = None, codec: AbstractCodec = None):
+        self.__token: Token = token if token else Token()
+        self.__wss: WSS = self.__token.wss
+        self.__codec: AbstractCodec = codec if codec else get_codec()
+        self.__session: ClientSession = None
+        self.__task: asyncio.Task = None
+        self.__subscriptions: dict = dict()
+        self.__consumers: list = list()
+        self.__index: dict = dict()
+        self.__default: Consumer = None
+        self.socket: ClientWebSocketResponse = None
+        self.messages: int = 0
+
+    def __repr__(self) -> str:
+        return f"AsyncStream(url={self.wss.url}, consumers={len(self.__consumers)})"
+
+    async def __aenter__(self) -> "AsyncStream":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.disconnect()
+
+    def __aiter__(self):
+        return self.listen()
+
+    @property
+    def token(self) -> Token:
+        return self.__token
+
+    @property
+    def wss(self) -> WSS:
+        return self.__wss
+
+    @property
+    def codec(self) -> AbstractCodec:
+        return self.__codec
+
+    @property
+    def auth(self) -> bool:
+        return self.wss.key and self.wss.secret and self.wss.passphrase
+
+    @property
+    def connected(self) -> bool:
+        return self.socket is not None and not self.socket.closed
+
+    @property
+    def subscriptions(self) -> dict:
+        return {channel: sorted(ids) for channel, ids in self.__subscriptions.items()}
+
+    @property
+    def consumers(self) -> list:
+        return list(self.__consumers)
+
+    async def connect(self, trace: bool = False) -> bool:
+        # NOTE: Messages are read by one task and fanned out to every consumer
+        if self.__session is None or self.__session.closed:
+            self.__session = ClientSession()
+        self.socket = await self.__session.ws_connect(self.wss.url, heartbeat=30)
+        self.__task = asyncio.get_running_loop().create_task(self.run())
+        return self.connected
+
+    async def send(self, message: dict) -> None:
+        if self.connected:
+            await self.socket.send_str(self.codec.encode(message).decode("utf-8"))
+
+    async def receive(self) -> dict:
+        # NOTE: The reader task owns the socket, so receive is a consumer of
+        # every message that is created on first use
+        if self.__default is None or self.__default.closed:
+            if not self.connected:
+                return dict()
+            self.__default = self.listen()
+        message = await self.__default.get()
+        return message if message else dict()
+
+    async def read(self) -> dict:
+        if self.connected:
+            payload = await self.socket.receive()
+            if payload.type in (WSMsgType.TEXT, WSMsgType.BINARY):
+                message = self.codec.decode(payload.data)
+                # NOTE: Heartbeats carry the exchange time for clock tracking
+                if self.token.clock and "heartbeat" == message.get("type"):
+                    self.token.clock.heartbeat(message)
+                return message
+        return dict()
+
+    async def run(self) -> None:
+        try:
+            while self.connected:
+                message = await self.read()
+                if message:
+                    self.publish(message)
+        finally:
+            for consumer in self.consumers:
+                consumer.close()
+
+    def publish(self, message: dict) -> int:
+        self.messages += 1
+        product_id = message.get("product_id")
+        consumers = self.__index.get(message.get("type"), []) + self.__index.get(
+            None, []
+        )
+        delivered = 0
+        for consumer in consumers:
+            if consumer.product_id is None or consumer.product_id == product_id:
+                consumer.put(message)
+                delivered += 1
+        return delivered
+
+    def listen(
+        self, channel: str = None, product_id: str = None, size: int = QUEUE
+    ) -> Consumer:
+        consumer = Consumer(self, channel, product_id, size)
+        self.__consumers.append(consumer)
+        for kind in consumer.types if consumer.types else (None,):
+            self.__index.setdefault(kind, []).append(consumer)
+        return consumer
+
+    def remove(self, consumer: Consumer) -> None:
+        if consumer in self.__consumers:
+            self.__consumers.remove(consumer)
+        for consumers in self.__index.values():
+            if consumer in consumers:
+                consumers.remove(consumer)
+
+    def message(self, kind: str, product_ids: list, channels: list) -> dict:
+        message = {"type": kind, "product_ids": product_ids, "channels": channels}
+        # NOTE: The feed authenticates the subscription, not the connection
+        if self.auth:
+            message.update(self.token())
+        return message
+
+    async def subscribe(self, product_ids: list, channels: list) -> None:
+        for channel in channels:
+            self.__subscriptions.setdefault(channel, set()).update(product_ids)
+        await self.send(self.message("subscribe", product_ids, channels))
+
+    async def unsubscribe(self, product_ids: list, channels: list) -> None:
+        for channel in channels:
+            remaining = self.__subscriptions.get(channel, set()) - set(product_ids)
+            if remaining:
+                self.__subscriptions[channel] = remaining
+            else:
+                self.__subscriptions.pop(channel, None)
+        await self.send(self.message("unsubscribe", product_ids, channels))
+
+    async def disconnect(self) -> bool:
+        if self.connected:
+            await self.socket.close()
+        if self.__task is not None:
+            await self.__task
+            self.__task = None
+        if self.__session is not None:
+            await self.__session.close()
+        return not self.connected
+
+
+def get_stream(settings: dict = None) -> AsyncStream:
+    return AsyncStream(Token(WSS(settings)))
@@ -0,0 +1,78 @@
+# coinbase-pro - A Python API Adapter for Coinbase Pro and Coinbase Exchange
+# Copyright (C) 2021 teleprint.me
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from time import monotonic
+from typing import TYPE_CHECKING, Callable, Iterable
+
+if TYPE_CHECKING:
+    from requests import Response
+
+# NOTE: Workers only bound concurrency; the Limiter still bounds the rate
+WORKERS: int = 8
+
+
+@dataclass
+class Batch(object):
+    results: dict = field(default_factory=dict)
+    errors: dict = field(default_factory=dict)
+    timings: dict = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    def __len__(self) -> int:
+        return len(self.results) + len(self.errors)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+def gather(
+    task: Callable[[object], Response],
+    keys: Iterable,
+    workers: int = None,
+    decode: Callable[[Response], object] = None,
+) -> Batch:
+    batch = Batch()
+    start = monotonic()
+
+    def timed(key: object) -> Response:
+        began = monotonic()
+        try:
+            return task(key)
+        finally:
+            batch.timings[key] = monotonic() - began
+
+    with ThreadPoolExecutor(max_workers=workers if workers else WORKERS) as executor:
+        futures = {executor.submit(timed, key): key for key in keys}
+        for future in as_completed(futures):
+            key = futures[future]
+            # NOTE: A body that fails to decode, e.g. an HTML 502 page, only
+            # fails its own key and never the rest of the batch
+            try:
+                response = future.result()
+                if 200 != response.status_code:
+                    from requests import HTTPError
+
+                    message = f"{response.status_code} {response.text}"
+                    raise HTTPError(message, response=response)
+                batch.results[key] = decode(response) if decode else response.json()
+            except Exception as error:
+                batch.errors[key] = error
+    batch.elapsed = monotonic() - start
+    return batch
@@ -0,0 +1,365 @@
+# coinbase-pro - A Python API Adapter for Coinbase Pro and Coinbase Exchange
+# Copyright (C) 2021 teleprint.me
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import base64
+import hashlib
+import hmac
+import json
+import platform
+import sys
+import timeit
+from argparse import ArgumentParser
+from itertools import cycle
+from random import Random
+from time import perf_counter
+from typing import Callable
+
+from coinbase_pro import __version__
+from coinbase_pro.client import CoinbasePro, get_client
+from coinbase_pro.codec import CODECS, get_codec
+from coinbase_pro.limiter import Bucket, Limiter
+from coinbase_pro.messenger import API, Auth, Messenger
+from coinbase_pro.plugin.book import Books
+from coinbase_pro.server import Server
+from coinbase_pro.socket import WSS, Stream, Token
+
+SECRET: str = base64.b64encode(bytes(range(64))).decode("utf-8")
+MESSAGE: str = '1640995200.0POST/orders{"product_id": "BTC-USD", "size": "0.01"}'
+THRESHOLD: float = 0.15
+
+FILL: dict = {
+    "created_at": "2022-01-01T00:00:00.000000+00:00",
+    "trade_id": 74,
+    "product_id": "BTC-USD",
+    "order_id": "d50ec984-77a8-460a-b958-66f114b0de9b",
+    "profile_id": "72b522b1-f500-4681-9cf5-18398251dc70",
+    "liquidity": "T",
+    "price": "40020.00",
+    "size": "0.01000000",
+    "fee": "2.4012000000000000",
+    "side": "buy",
+    "settled": True,
+    "usd_volume": "400.2000000000000000",
+}
+TICKER: dict = {
+    "type": "ticker",
+    "sequence": 37475248783,
+    "product_id": "BTC-USD",
+    "price": "40020.00",
+    "open_24h": "39500.00",
+    "volume_24h": "12345.67890123",
+    "best_bid": "40019.99",
+    "best_ask": "40020.00",
+    "side": "buy",
+    "time": "2022-01-01T00:00:00.000000Z",
+    "trade_id": 74,
+    "last_size": "0.01000000",
+}
+L2UPDATE: dict = {
+    "type": "l2update",
+    "product_id": "BTC-USD",
+    "time": "2022-01-01T00:00:00.000000Z",
+    "changes": [["buy", "40019.99", "0.50000000"], ["sell", "40021.00", "0"]],
+}
+
+
+def reference(secret: str, message: str) -> str:
+    # NOTE: The per-request signing path prior to caching the keyed HMAC
+    key = base64.b64decode(secret)
+    sig = hmac.new(key, message.encode("ascii"), hashlib.sha256)
+    return base64.b64encode(sig.digest()).decode("utf-8")
+
+
+def measure(func: Callable, number: int, repeat: int = 5) -> float:
+    # NOTE: Returns the best observed cost of a single call in microseconds
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e6
+
+
+def unlimited() -> Limiter:
+    # NOTE: Benchmarks measure the client, not the rate limit
+    return Limiter(Bucket(1e9, 1e9), Bucket(1e9, 1e9))
+
+
+def signing(scale: float = 1.0) -> dict:
+    number = max(1, int(20000 * scale))
+    settings = {"key": "key", "secret": SECRET, "passphrase": "passphrase"}
+    auth = Auth(API(settings))
+    token = Token(WSS(settings))
+    if auth.signature(MESSAGE) != reference(SECRET, MESSAGE):
+        raise ValueError("Auth.signature does not match the reference signature")
+
+    before = measure(lambda: reference(SECRET, MESSAGE), number)
+    after = measure(lambda: auth.signature(MESSAGE), number)
+    return {
+        "reference_us": before,
+        "signature_us": after,
+        "speedup": before / after,
+        "sign_us": measure(lambda: auth.sign("POST", "/orders", MESSAGE), number),
+        "token_us": measure(token, number),
+    }
+
+
+def decoding(scale: float = 1.0) -> dict:
+    number = max(1, int(200 * scale))
+    payload = json.dumps([dict(FILL, trade_id=i) for i in range(100)]).encode()
+    results = dict()
+    for name in CODECS:
+        try:
+            codec = get_codec(name)
+        except ImportError:
+            continue
+        results[f"{name}_page_us"] = measure(lambda: codec.decode(payload), number)
+    return results
+
+
+def construction(scale: float = 1.0) -> dict:
+    number = max(1, int(2000 * scale))
+    messenger = Messenger(limiter=unlimited())
+    return {
+        "client_us": measure(lambda: CoinbasePro(messenger), number),
+        "get_client_us": measure(
+            lambda: get_client().messenger.close(), max(1, number // 10)
+        ),
+    }
+
+
+def rest(scale: float = 1.0) -> dict:
+    number = max(1, int(500 * scale))
+    order = {"product_id": "BTC-USD", "side": "buy", "type": "market"}
+    with Server() as server:
+        client = CoinbasePro(Messenger(Auth(API(server.settings)), unlimited()))
+        client.product.ticker("BTC-USD")
+        start = perf_counter()
+        for _ in range(number):
+            client.product.ticker("BTC-USD")
+        public = perf_counter() - start
+        start = perf_counter()
+        for index in range(number):
+            side = "buy" if index % 2 else "sell"
+            client.order.post(dict(order, side=side, size="0.001"))
+        private = perf_counter() - start
+        client.messenger.close()
+    return {
+        "ticker_us": public / number * 1e6,
+        "ticker_per_s": number / public,
+        "order_us": private / number * 1e6,
+        "order_per_s": number / private,
+    }
+
+
+def pagination(scale: float = 1.0) -> dict:
+    fills = max(1, int(1000 * scale))
+    order = {"product_id": "ETH-USD", "type": "market", "size": "0.01"}
+    with Server() as server:
+        messenger = Messenger(Auth(API(server.settings)), unlimited())
+        client = CoinbasePro(messenger)
+        for index in range(fills):
+            client.order.post(dict(order, side="buy" if index % 2 else "sell"))
+        start = perf_counter()
+        pages = messenger.page("/fills", {"product_id": "ETH-USD", "limit": 100})
+        paged = perf_counter() - start
+        start = perf_counter()
+        records = list(messenger.paginate("/fills", {"product_id": "ETH-USD"}))
+        pager = perf_counter() - start
+        messenger.close()
+    if len(records) != fills or len(pages) != -(-fills // 100):
+        raise ValueError("pagination returned an unexpected number of records")
+    return {
+        "page_records_per_s": fills / paged,
+        "pager_records_per_s": fills / pager,
+        "page_us": paged / len(pages) * 1e6,
+    }
+
+
+class Replay(object):
+    # NOTE: A connected stand-in for a websocket that replays encoded messages
+    def __init__(self, messages: list):
+        self.__messages = cycle(messages)
+        self.connected: bool = True
+
+    def recv(self) -> str:
+        return next(self.__messages)
+
+    def send(self, payload: bytes) -> None:
+        pass
+
+    def close(self) -> None:
+        self.connected = False
+
+
+def stream(scale: float = 1.0) -> dict:
+    number = max(1, int(50000 * scale))
+    messages = [json.dumps(TICKER), json.dumps(L2UPDATE)]
+    results = dict()
+    for name in ("json", "fast"):
+        feed = Stream(codec=get_codec(name))
+        feed.socket = Replay(messages)
+        start = perf_counter()
+        for _ in range(number):
+            feed.receive()
+        elapsed = perf_counter() - start
+        results[f"{name}_messages_per_s"] = number / elapsed
+    return results
+
+
+def ladder(random: Random, number: int, levels: int = 1000) -> tuple:
+    # NOTE: Most changes land near the top of the book, as they do on a real feed
+    bids = [[f"{40000 - i * 0.01:.2f}", "1.0"] for i in range(levels)]
+    asks = [[f"{40000.01 + i * 0.01:.2f}", "1.0"] for i in range(levels)]
+    snapshot = {"type": "snapshot", "product_id": "BTC-USD", "bids": bids, "asks": asks}
+    updates = list()
+    for _ in range(number):
+        side = random.choice(("buy", "sell"))
+        offset = int(random.expovariate(0.05)) % levels
+        price = 40000 - offset * 0.01 if "buy" == side else 40000.01 + offset * 0.01
+        size = "0" if random.random() < 0.3 else f"{random.random():.8f}"
+        updates.append(
+            {
+                "type": "l2update",
+                "product_id": "BTC-USD",
+                "changes": [[side, f"{price:.2f}", size]],
+            }
+        )
+    return snapshot, updates
+
+
+def reference_book(snapshot: dict, updates: list) -> None:
+    # NOTE: The plain dict and re-sort approach the book engine replaces
+    bids = {float(p): float(s) for p, s in snapshot["bids"]}
+    asks = {float(p): float(s) for p, s in snapshot["asks"]}
+    for update in updates:
+        for side, price, size in update["changes"]:
+            levels = bids if "buy" == side else asks
+            if float(size):
+                levels[float(price)] = float(size)
+            else:
+                levels.pop(float(price), None)
+        sorted(bids, reverse=True)[:10]
+        sorted(asks)[:10]
+
+
+def book(scale: float = 1.0) -> dict:
+    number = max(1, int(50000 * scale))
+    snapshot, updates = ladder(Random(7), number)
+    books = Books(product_ids=["BTC-USD"])
+    start = perf_counter()
+    books.apply(snapshot)
+    level2 = books["BTC-USD"]
+    for update in updates:
+        books.apply(update)
+        level2.depth(10)
+    elapsed = perf_counter() - start
+    sample = max(1, number // 10)
+    began = perf_counter()
+    reference_book(snapshot, updates[:sample])
+    baseline = (perf_counter() - began) / sample
+    return {
+        "updates_per_s": number / elapsed,
+        "reference_updates_per_s": 1 / baseline,
+        "speedup": baseline / (elapsed / number),
+    }
+
+
+WORKLOADS: dict = {
+    "signing": signing,
+    "decoding": decoding,
+    "construction": construction,
+    "rest": rest,
+    "pagination": pagination,
+    "stream": stream,
+    "book": book,
+}
+
+
+def run(names: list = None, scale: float = 1.0) -> dict:
+    names = names if names else list(WORKLOADS)
+    return {
+        "meta": {
+            "version": __version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scale": scale,
+        },
+        "results": {name: WORKLOADS[name](scale) for name in names},
+    }
+
+
+def higher(metric: str) -> bool:
+    # NOTE: Costs end in _us; rates and ratios are better when they are higher
+    return not metric.endswith("_us")
+
+
+def compare(current: dict, baseline: dict, threshold: float = THRESHOLD) -> list:
+    rows = list()
+    for workload, metrics in current["results"].items():
+        previous = baseline["results"].get(workload, dict())
+        for metric, value in metrics.items():
+            before = previous.get(metric)
+            if not before or not value:
+                continue
+            change = value / before - 1.0 if higher(metric) else before / value - 1.0
+            rows.append(
+                {
+                    "workload": workload,
+                    "metric": metric,
+                    "baseline": before,
+                    "current": value,
+                    "change": change,
+                    "regression": change < -threshold,
+                }
+            )
+    return rows
+
+
+def main(argv: list = None) -> int:
+    parser = ArgumentParser(description="Benchmark the coinbase_pro hot paths")
+    parser.add_argument("--only", help="comma separated workloads to run")
+    parser.add_argument("--scale", type=float, default=1.0, help="workload size")
+    parser.add_argument("--output", help="write the results as JSON to a file")
+    parser.add_argument("--baseline", help="compare against a JSON results file")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    args = parser.parse_args(argv)
+
+    names = args.only.split(",") if args.only else None
+    for name in names if names else []:
+        if name not in WORKLOADS:
+            parser.error(f"workload must be one of {list(WORKLOADS)}")
+    results = run(names, args.scale)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=4)
+
+    if not args.baseline:
+        for workload, metrics in results["results"].items():
+            for metric, value in metrics.items():
+                print(f"{workload:>12} {metric:>24}: {value:.3f}")
+        return 0
+
+    with open(args.baseline, "r") as file:
+        baseline = json.load(file)
+    rows = compare(results, baseline, args.threshold)
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else ""
+        print(
+            f"{row['workload']:>12} {row['metric']:>24}: "
+            f"{row['baseline']:.3f} -> {row['current']:.3f} "
+            f"({row['change']:+.1%}) {flag}"
+        )
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
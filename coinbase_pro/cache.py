@@ -0,0 +1,170 @@
+# coinbase-pro - A Python API Adapter for Coinbase Pro and Coinbase Exchange
+# Copyright (C) 2021 teleprint.me
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from collections import OrderedDict
+from threading import Event, Lock
+from time import monotonic
+from typing import Callable
+
+from coinbase_pro.limiter import is_private
+
+# NOTE: A `*` matches exactly one path segment
+TTL: dict = {
+    "/currencies": 3600.0,
+    "/currencies/*": 3600.0,
+    "/products": 300.0,
+    "/products/*": 300.0,
+    "/fees": 60.0,
+}
+
+SIZE: int = 256
+
+
+def match(pattern: str, path: str) -> bool:
+    patterns = pattern.strip("/").split("/")
+    segments = path.split("?")[0].strip("/").split("/")
+    if len(patterns) != len(segments):
+        return False
+    return all(p == "*" or p == s for p, s in zip(patterns, segments))
+
+
+class Flight(object):
+    # NOTE: A request in progress which identical requests wait on
+    def __init__(self):
+        self.event: Event = Event()
+        self.value: object = None
+        self.error: Exception = None
+
+
+class Cache(object):
+    def __init__(self, ttl: dict = None, size: int = SIZE):
+        self.__rules: dict = dict(TTL if ttl is None else ttl)
+        self.__size: int = size
+        self.__store: OrderedDict = OrderedDict()
+        self.__flights: dict = dict()
+        self.__lock: Lock = Lock()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.shared: int = 0
+        self.evictions: int = 0
+
+    def __repr__(self) -> str:
+        return f"Cache(size={self.size}, hits={self.hits}, misses={self.misses})"
+
+    def __len__(self) -> int:
+        return len(self.__store)
+
+    @property
+    def rules(self) -> dict:
+        return self.__rules
+
+    @property
+    def size(self) -> int:
+        return self.__size
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "shared": self.shared,
+            "evictions": self.evictions,
+            "entries": len(self),
+        }
+
+    def ttl(self, path: str) -> float:
+        for pattern, seconds in self.__rules.items():
+            if match(pattern, path):
+                return seconds
+        return 0.0
+
+    def key(self, path: str, data: dict = None, owner: str = None) -> tuple:
+        # NOTE: Private replies, e.g. /fees, belong to one API key, so a cache
+        # shared by several messengers keeps them apart
+        params = sorted((k, str(v)) for k, v in data.items()) if data else []
+        owner = owner if is_private(path) else None
+        return (path, tuple(params), owner)
+
+    def get(self, key: tuple) -> object:
+        with self.__lock:
+            return self.__get(key)
+
+    def count(self, hits: int = 0, misses: int = 0, shared: int = 0) -> None:
+        with self.__lock:
+            self.hits += hits
+            self.misses += misses
+            self.shared += shared
+
+    def __get(self, key: tuple) -> object:
+        entry = self.__store.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires <= monotonic():
+            del self.__store[key]
+            return None
+        self.__store.move_to_end(key)
+        return value
+
+    def put(self, key: tuple, value: object, ttl: float) -> None:
+        with self.__lock:
+            self.__store[key] = (monotonic() + ttl, value)
+            self.__store.move_to_end(key)
+            while len(self.__store) > self.__size:
+                self.__store.popitem(last=False)
+                self.evictions += 1
+
+    def fetch(
+        self,
+        key: tuple,
+        func: Callable[[], object],
+        ttl: float,
+        valid: Callable[[object], bool] = None,
+    ) -> object:
+        with self.__lock:
+            value = self.__get(key)
+            if value is not None:
+                self.hits += 1
+                return value
+            flight = self.__flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.__flights[key] = Flight()
+                self.misses += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = func()
+            if valid is None or valid(flight.value):
+                self.put(key, flight.value, ttl)
+        except Exception as error:
+            flight.error = error
+            raise
+        finally:
+            with self.__lock:
+                self.__flights.pop(key, None)
+            flight.event.set()
+        return flight.value
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__store.clear()
@@ -13,191 +13,339 @@
 #
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+
+from time import monotonic, sleep
+from typing import TYPE_CHECKING
+from uuid import uuid4
+
+from coinbase_pro import models
 from coinbase_pro.abstract import AbstractClient
+from coinbase_pro.batch import Batch, gather
 from coinbase_pro.messenger import API, Auth, Messenger, Subscriber
 
+if TYPE_CHECKING:
+    from requests import Response
+
+# NOTE: Seconds an order that lost its response is looked up before giving up
+CONFIRM: float = 5.0
+POLL: float = 0.5
+
+
+class Unconfirmed(TimeoutError):
+    def __init__(self, client_oid: str):
+        super().__init__(f"order {client_oid!r} was not confirmed and was not resent")
+        self.client_oid = client_oid
+
 
 class Account(Subscriber):
     def list(self):
-        return self.messenger.get("/accounts").json()
+        return self.decode(self.messenger.get("/accounts"))
 
     def get(self, account_id: str) -> dict:
-        return self.messenger.get(f"/accounts/{account_id}").json()
+        return self.decode(self.messenger.get(f"/accounts/{account_id}"))
 
     def holds(self, account_id: str, data: dict = None) -> list:
-        return self.messenger.get(f"/accounts/{account_id}/holds", data).json()
+        return self.decode(self.messenger.get(f"/accounts/{account_id}/holds", data))
 
-    def ledger(self, account_id: str, data: dict = None) -> list:
-        return self.messenger.get(f"/accounts/{account_id}/ledger", data).json()
+    def ledger(self, account_id: str, data: dict = None, typed: bool = False) -> list:
+        return self.decode(
+            self.messenger.get(f"/accounts/{account_id}/ledger", data),
+            models.LedgerEntry if typed else None,
+        )
 
     def transfers(self, account_id: str, data: dict = None) -> list:
-        return self.messenger.get(f"/accounts/{account_id}/transfers", data).json()
+        return self.decode(
+            self.messenger.get(f"/accounts/{account_id}/transfers", data)
+        )
 
 
 class Coinbase(Subscriber):
     def wallets(self) -> list:
-        return self.messenger.get("/coinbase-accounts").json()
+        return self.decode(self.messenger.get("/coinbase-accounts"))
 
     def generate_address(self, account_id: str) -> dict:
-        return self.messenger.post(f"/coinbase-accounts/{account_id}/addresses").json()
+        return self.decode(
+            self.messenger.post(f"/coinbase-accounts/{account_id}/addresses")
+        )
 
     def deposit_from(self, data: dict) -> dict:
-        return self.messenger.post("/deposits/coinbase-account", data).json()
+        return self.decode(self.messenger.post("/deposits/coinbase-account", data))
 
     def withdraw_to(self, data: dict) -> dict:
-        return self.messenger.post("/withdrawals/coinbase-account", data).json()
+        return self.decode(self.messenger.post("/withdrawals/coinbase-account", data))
 
 
 class Convert(Subscriber):
     def post(self, data: dict) -> dict:
-        return self.messenger.post("/conversions", data).json()
+        return self.decode(self.messenger.post("/conversions", data))
 
     def get(self, conversion_id: str, data: dict = None) -> dict:
-        return self.messenger.get(f"/conversions/{conversion_id}", data).json()
+        return self.decode(self.messenger.get(f"/conversions/{conversion_id}", data))
 
 
 class Currency(Subscriber):
     def list(self):
-        return self.messenger.get("/currencies").json()
+        return self.decode(self.messenger.get("/currencies"))
 
     def get(self, currency_id: str) -> dict:
-        return self.messenger.get(f"/currencies/{currency_id}").json()
+        return self.decode(self.messenger.get(f"/currencies/{currency_id}"))
 
 
 class Transfer(Subscriber):
     def deposit_from(self, data: dict) -> dict:
-        return self.messenger.post("/deposits/payment-method", data).json()
+        return self.decode(self.messenger.post("/deposits/payment-method", data))
 
     def methods(self) -> list:
-        return self.messenger.get("/payment-methods").json()
+        return self.decode(self.messenger.get("/payment-methods"))
 
     def list(self):
-        return self.messenger.get("/transfers").json()
+        return self.decode(self.messenger.get("/transfers"))
 
     def get(self, transfer_id: str) -> dict:
-        return self.messenger.get(f"/transfers/{transfer_id}").json()
+        return self.decode(self.messenger.get(f"/transfers/{transfer_id}"))
 
     def withdraw_to_address(self, data: dict) -> dict:
         return self.messenger.post("/withdrawals/crypto", data)
 
     def withdraw_estimate(self, data: dict = None) -> dict:
-        return self.messenger.get("/withdrawals/fee-estimate", data).json()
+        return self.decode(self.messenger.get("/withdrawals/fee-estimate", data))
 
     def withdraw_to(self, data: dict) -> dict:
-        return self.messenger.post("/withdrawals/payment-method", data).json()
+        return self.decode(self.messenger.post("/withdrawals/payment-method", data))
 
 
 class Fee(Subscriber):
     def get(self) -> dict:
-        return self.messenger.get("/fees").json()
+        return self.decode(self.messenger.get("/fees"))
 
 
 class Order(Subscriber):
-    def fills(self, data: dict) -> list:
-        return self.messenger.get("/fills", data).json()
+    def fills(self, data: dict, typed: bool = False) -> list:
+        return self.decode(
+            self.messenger.get("/fills", data), models.Fill if typed else None
+        )
 
-    def list(self, data: dict):
-        return self.messenger.get("/orders", data).json()
+    def list(self, data: dict, typed: bool = False):
+        return self.decode(
+            self.messenger.get("/orders", data), models.Order if typed else None
+        )
 
     def cancel_all(self, data: dict = None) -> list:
-        return self.messenger.delete("/orders", data).json()
+        return self.decode(self.messenger.delete("/orders", data))
 
-    def post(self, data: dict) -> dict:
-        return self.messenger.post("/orders", data).json()
+    def post(self, data: dict, typed: bool = False) -> dict:
+        return self.decode(
+            self.messenger.post("/orders", data), models.Order if typed else None
+        )
 
-    def get(self, order_id: str) -> dict:
-        return self.messenger.get(f"/orders/{order_id}").json()
+    def get(self, order_id: str, typed: bool = False) -> dict:
+        return self.decode(
+            self.messenger.get(f"/orders/{order_id}"), models.Order if typed else None
+        )
 
     def cancel(self, order_id: str, data: dict = None) -> str:
-        return self.messenger.delete(f"/orders/{order_id}", data).json()
+        return self.decode(self.messenger.delete(f"/orders/{order_id}", data))
+
+    def place(self, data: dict, wait: float = CONFIRM) -> Response:
+        # NOTE: A lost response may still have placed the order. An order in
+        # flight is not visible yet, so it is never posted a second time; the
+        # lookup is polled until `wait` runs out and then Unconfirmed is raised
+        from requests import RequestException
+
+        try:
+            return self.messenger.post("/orders", data)
+        except RequestException as error:
+            oid = data.get("client_oid")
+            if not oid:
+                raise
+            # NOTE: The profile_id routes the lookup to the key that placed it
+            query = (
+                {"profile_id": data["profile_id"]} if data.get("profile_id") else None
+            )
+            deadline = monotonic() + wait
+            while True:
+                try:
+                    response = self.messenger.get(f"/orders/client:{oid}", query)
+                    if 200 == response.status_code:
+                        return response
+                except RequestException:
+                    pass
+                if monotonic() >= deadline:
+                    raise Unconfirmed(oid) from error
+                sleep(min(POLL, max(0.0, deadline - monotonic())))
+
+    def post_many(
+        self,
+        orders: list,
+        workers: int = None,
+        typed: bool = False,
+        wait: float = CONFIRM,
+    ) -> Batch:
+        # NOTE: Results are keyed by client_oid, which is generated if missing
+        keyed = {}
+        for o in orders:
+            oid = o.get("client_oid") or str(uuid4())
+            if oid in keyed:
+                raise ValueError(f"duplicate client_oid {oid!r}")
+            keyed[oid] = o
+        model = models.Order if typed else None
+
+        def task(oid: str) -> Response:
+            return self.place(dict(keyed[oid], client_oid=oid), wait)
+
+        return gather(task, keyed, workers, lambda r: self.decode(r, model))
+
+    def cancel_many(
+        self, order_ids: list, data: dict = None, workers: int = None
+    ) -> Batch:
+        def task(order_id: str) -> Response:
+            return self.messenger.delete(f"/orders/{order_id}", data)
+
+        return gather(task, order_ids, workers, self.decode)
+
+    def cancel_all_many(self, product_ids: list, workers: int = None) -> Batch:
+        def task(product_id: str) -> Response:
+            return self.messenger.delete("/orders", {"product_id": product_id})
+
+        return gather(task, product_ids, workers, self.decode)
 
 
 class Oracle(Subscriber):
     def prices(self) -> dict:
-        return self.messenger.get("/oracle").json()
+        return self.decode(self.messenger.get("/oracle"))
 
 
 class Product(Subscriber):
     def list(self):
-        return self.messenger.get("/products").json()
+        return self.decode(self.messenger.get("/products"))
 
     def get(self, product_id: str) -> dict:
-        return self.messenger.get(f"/products/{product_id}").json()
+        return self.decode(self.messenger.get(f"/products/{product_id}"))
 
     def book(self, product_id: str, data: dict = None) -> dict:
-        return self.messenger.get(f"/products/{product_id}/book", data).json()
+        return self.decode(self.messenger.get(f"/products/{product_id}/book", data))
+
+    def ticker(self, product_id: str, typed: bool = False) -> dict:
+        return self.decode(
+            self.messenger.get(f"/products/{product_id}/ticker"),
+            models.Ticker if typed else None,
+        )
+
+    def trades(self, product_id: str, data: dict = None, typed: bool = False) -> list:
+        return self.decode(
+            self.messenger.get(f"/products/{product_id}/trades", data),
+            models.Trade if typed else None,
+        )
+
+    def candles(self, product_id: str, data: dict = None, typed: bool = False) -> list:
+        return self.decode(
+            self.messenger.get(f"/products/{product_id}/candles", data),
+            models.Candle if typed else None,
+        )
 
-    def ticker(self, product_id: str) -> dict:
-        return self.messenger.get(f"/products/{product_id}/ticker").json()
+    def stats(self, product_id: str) -> dict:
+        return self.decode(self.messenger.get(f"/products/{product_id}/stats"))
 
-    def trades(self, product_id: str, data: dict = None) -> list:
-        return self.messenger.get(f"/products/{product_id}/trades", data).json()
+    def ticker_many(self, product_ids: list, workers: int = None) -> Batch:
+        def task(product_id: str) -> Response:
+            return self.messenger.get(f"/products/{product_id}/ticker")
 
-    def candles(self, product_id: str, data: dict = None) -> list:
-        return self.messenger.get(f"/products/{product_id}/candles", data).json()
+        return gather(task, product_ids, workers, self.decode)
 
-    def stats(self, product_id: str) -> dict:
-        return self.messenger.get(f"/products/{product_id}/stats").json()
+    def stats_many(self, product_ids: list, workers: int = None) -> Batch:
+        def task(product_id: str) -> Response:
+            return self.messenger.get(f"/products/{product_id}/stats")
+
+        return gather(task, product_ids, workers, self.decode)
+
+    def book_many(
+        self, product_ids: list, data: dict = None, workers: int = None
+    ) -> Batch:
+        def task(product_id: str) -> Response:
+            return self.messenger.get(f"/products/{product_id}/book", data)
+
+        return gather(task, product_ids, workers, self.decode)
 
 
 class Profile(Subscriber):
     def list(self, data: dict = None):
-        return self.messenger.get("/profiles", data).json()
+        return self.decode(self.messenger.get("/profiles", data))
 
     def create(self, data: dict) -> dict:
-        return self.messenger.post("/profiles", data).json()
+        return self.decode(self.messenger.post("/profiles", data))
 
     def transfer(self, data: dict) -> dict:
-        return self.messenger.post("/profiles/transfer", data).json()
+        return self.decode(self.messenger.post("/profiles/transfer", data))
 
     def get(self, profile_id: str, data: dict) -> dict:
-        return self.messenger.get(f"/profiles/{profile_id}", data).json()
+        return self.decode(self.messenger.get(f"/profiles/{profile_id}", data))
 
     def rename(self, profile_id: str, data: dict) -> dict:
-        return self.messenger.put(f"/profiles/{profile_id}", data).json()
+        return self.decode(self.messenger.put(f"/profiles/{profile_id}", data))
 
     def delete(self, profile_id: str, data: dict) -> dict:
-        return self.messenger.put(f"/profiles/{profile_id}/deactivate", data).json()
+        return self.decode(
+            self.messenger.put(f"/profiles/{profile_id}/deactivate", data)
+        )
 
 
 class Report(Subscriber):
     def list(self, data: dict = None):
-        return self.messenger.get("/reports", data).json()
+        return self.decode(self.messenger.get("/reports", data))
 
     def create(self, data: dict) -> dict:
-        return self.messenger.post("/reports", data).json()
+        return self.decode(self.messenger.post("/reports", data))
 
     def get(self, report_id: str) -> dict:
-        return self.messenger.get(f"/reports/{report_id}").json()
+        return self.decode(self.messenger.get(f"/reports/{report_id}"))
 
 
 class User(Subscriber):
     def limits(self, user_id: str) -> dict:
-        return self.messenger.get(f"/users/{user_id}/exchange-limits").json()
+        return self.decode(self.messenger.get(f"/users/{user_id}/exchange-limits"))
 
 
 class Time(Subscriber):
     def get(self) -> dict:
         # NOTE: The `epoch` field represents decimal seconds since Unix Epoch
-        return self.messenger.get("/time").json()
+        return self.decode(self.messenger.get("/time"))
+
+
+SUBSCRIBERS: dict = {
+    "account": Account,
+    "coinbase": Coinbase,
+    "convert": Convert,
+    "currency": Currency,
+    "transfer": Transfer,
+    "fee": Fee,
+    "order": Order,
+    "oracle": Oracle,
+    "product": Product,
+    "profile": Profile,
+    "report": Report,
+    "user": User,
+    "time": Time,
+}
 
 
 class CoinbasePro(AbstractClient):
+    # NOTE: Subscribers are created on first access and cached on the instance
+    subscribers: dict = SUBSCRIBERS
+
     def __init__(self, messenger: Messenger):
         self.messenger = messenger
-        self.account = Account(messenger)
-        self.coinbase = Coinbase(messenger)
-        self.convert = Convert(messenger)
-        self.currency = Currency(messenger)
-        self.transfer = Transfer(messenger)
-        self.fee = Fee(messenger)
-        self.order = Order(messenger)
-        self.oracle = Oracle(messenger)
-        self.product = Product(messenger)
-        self.profile = Profile(messenger)
-        self.report = Report(messenger)
-        self.user = User(messenger)
-        self.time = Time(messenger)
+
+    def __getattr__(self, name: str) -> Subscriber:
+        cls = type(self).subscribers.get(name)
+        if cls is None:
+            raise AttributeError(f"{type(self).__name__!r} has no attribute {name!r}")
+        instance = cls(self.messenger)
+        setattr(self, name, instance)
+        return instance
+
+    def __dir__(self) -> list:
+        return sorted(set(super().__dir__()) | set(self.subscribers))
 
     def __repr__(self) -> str:
         return f"CoinbasePro(name={self.name}, key={self.key})"
@@ -0,0 +1,157 @@
+# coinbase-pro - A Python API Adapter for Coinbase Pro and Coinbase Exchange
+# Copyright (C) 2021 teleprint.me
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from threading import Event, Lock, Thread
+from time import time
+
+from coinbase_pro.abstract import AbstractClock, AbstractMessenger
+
+# NOTE: The exchange rejects requests stamped more than 30 seconds from its clock
+INTERVAL: float = 60.0
+WINDOW: int = 8
+BURST: int = 4
+
+
+def parse(value: str) -> float:
+    # NOTE: Exchange timestamps end in Z and may carry more than 6 digits
+    value = value.replace("Z", "+00:00")
+    if "." in value:
+        head, tail = value.split(".", 1)
+        digits = tail[: len(tail) - len(tail.lstrip("0123456789"))]
+        value = f"{head}.{digits[:6].ljust(6, '0')}{tail[len(digits):]}"
+    return datetime.fromisoformat(value).timestamp()
+
+
+@dataclass
+class Sample(object):
+    offset: float
+    rtt: float
+    stamp: float
+
+
+class Clock(AbstractClock):
+    def __init__(self, interval: float = INTERVAL, window: int = WINDOW):
+        self.__interval: float = interval
+        self.__samples: deque = deque(maxlen=window)
+        self.__bounds: deque = deque(maxlen=window)
+        self.__best: Sample = None
+        self.__bound: Sample = None
+        self.__stamp: float = 0.0
+        self.__lock: Lock = Lock()
+        self.__stop: Event = Event()
+        self.__thread: Thread = None
+        self.errors: int = 0
+
+    def __repr__(self) -> str:
+        return f"Clock(offset={self.offset:.6f}, rtt={self.rtt})"
+
+    @property
+    def interval(self) -> float:
+        return self.__interval
+
+    @property
+    def samples(self) -> list:
+        with self.__lock:
+            return list(self.__samples)
+
+    @property
+    def offset(self) -> float:
+        # NOTE: Heartbeats are only used when no recent round trip exists
+        best, bound = self.__best, self.__bound
+        if best is not None and time() - self.__stamp <= 2 * self.interval:
+            return best.offset
+        if bound is not None:
+            return bound.offset + (best.rtt / 2 if best else 0.0)
+        return best.offset if best else 0.0
+
+    @property
+    def rtt(self) -> float:
+        best = self.__best
+        return best.rtt if best else None
+
+    @property
+    def running(self) -> bool:
+        return self.__thread is not None and self.__thread.is_alive()
+
+    def time(self) -> float:
+        # NOTE: Signing reads the cached estimate; it never makes a request
+        return time() + self.offset
+
+    def add(self, sample: Sample) -> Sample:
+        # NOTE: The sample with the lowest round trip in the window has the
+        # smallest error bound (rtt / 2), so it is used as the estimate
+        with self.__lock:
+            self.__samples.append(sample)
+            self.__stamp = sample.stamp
+            self.__best = min(self.__samples, key=lambda s: (s.rtt, -s.stamp))
+            return self.__best
+
+    def sample(self, messenger: AbstractMessenger) -> Sample:
+        # NOTE: A cached reply would replay a stale epoch with rtt near zero,
+        # which the filter prefers, so the request bypasses Messenger.cache
+        start = time()
+        response = messenger.request("GET", "/time")
+        end = time()
+        if 200 != response.status_code:
+            raise ValueError(f"{response.status_code} {response.text}")
+        epoch = float(messenger.decode(response)["epoch"])
+        return self.add(Sample(epoch - (start + end) / 2, end - start, end))
+
+    def sync(self, messenger: AbstractMessenger, count: int = BURST) -> float:
+        for _ in range(count):
+            self.sample(messenger)
+        return self.offset
+
+    def observe(self, server: float, local: float = None) -> Sample:
+        # NOTE: A one-way timestamp is sent before it is received, so it only
+        # gives a lower bound on the offset; the tightest bound is kept
+        local = local if local else time()
+        with self.__lock:
+            self.__bounds.append(Sample(server - local, 0.0, local))
+            self.__bound = max(self.__bounds, key=lambda s: (s.offset, s.stamp))
+            return self.__bound
+
+    def heartbeat(self, message: dict) -> Sample:
+        if "heartbeat" != message.get("type") or "time" not in message:
+            return None
+        return self.observe(parse(message["time"]))
+
+    def run(self, messenger: AbstractMessenger):
+        while not self.__stop.wait(self.interval):
+            try:
+                self.sample(messenger)
+            except Exception:
+                self.errors += 1
+
+    def start(self, messenger: AbstractMessenger) -> "Clock":
+        if self.running:
+            return self
+        try:
+            self.sync(messenger)
+        except Exception:
+            self.errors += 1
+        self.__stop.clear()
+        self.__thread = Thread(target=self.run, args=(messenger,), daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        self.__stop.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
@@ -0,0 +1,100 @@
+# coinbase-pro - A Python API Adapter for Coinbase Pro and Coinbase Exchange
+# Copyright (C) 2021 teleprint.me
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import json
+from decimal import Decimal
+from importlib import import_module
+
+from coinbase_pro.abstract import AbstractCodec
+
+
+def default(value: object) -> str:
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class JSON(AbstractCodec):
+    @property
+    def name(self) -> str:
+        return "json"
+
+    def encode(self, value: object) -> bytes:
+        return json.dumps(value, default=default).encode("utf-8")
+
+    def decode(self, payload: bytes) -> object:
+        return json.loads(payload)
+
+
+class DecimalJSON(JSON):
+    # NOTE: Numbers with a fraction are decoded as Decimal to preserve prices
+    @property
+    def name(self) -> str:
+        return "decimal"
+
+    def decode(self, payload: bytes) -> object:
+        return json.loads(payload, parse_float=Decimal)
+
+
+class ORJSON(AbstractCodec):
+    def __init__(self):
+        self.__orjson = import_module("orjson")
+
+    @property
+    def name(self) -> str:
+        return "orjson"
+
+    def encode(self, value: object) -> bytes:
+        return self.__orjson.dumps(value, default=default)
+
+    def decode(self, payload: bytes) -> object:
+        return self.__orjson.loads(payload)
+
+
+class UJSON(AbstractCodec):
+    def __init__(self):
+        self.__ujson = import_module("ujson")
+
+    @property
+    def name(self) -> str:
+        return "ujson"
+
+    def encode(self, value: object) -> bytes:
+        return self.__ujson.dumps(value, default=default).encode("utf-8")
+
+    def decode(self, payload: bytes) -> object:
+        return self.__ujson.loads(payload)
+
+
+CODECS: dict = {
+    "json": JSON,
+    "decimal": DecimalJSON,
+    "orjson": ORJSON,
+    "ujson": UJSON,
+}
+
+
+def get_codec(name: str = None) -> AbstractCodec:
+    # NOTE: "fast" selects the fastest backend that is installed
+    if "fast" == name:
+        for candidate in ("orjson", "ujson"):
+            try:
+                return CODECS[candidate]()
+            except ImportError:
+                continue
+        return JSON()
+    if name not in CODECS and name is not None:
+        raise ValueError(f"codec must be one of {list(CODECS) + ['fast']}")
+    return CODECS[name if name else "json"]()
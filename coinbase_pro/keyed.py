@@ -0,0 +1,41 @@
+# coinbase-pro - A Python API Adapter for Coinbase Pro and Coinbase Exchange
+# Copyright (C) 2021 teleprint.me
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import base64
+import hashlib
+import hmac
+
+
+class Keyed(object):
+    # NOTE: Decode the secret once and keep a pre-keyed state to copy from;
+    # shared by Auth and Token so both sign the same way
+    def __init__(self):
+        self.__secret: str = None
+        self.__hmac: hmac.HMAC = None
+
+    def __repr__(self) -> str:
+        return "Keyed()"
+
+    def mac(self, secret: str) -> hmac.HMAC:
+        if secret != self.__secret or self.__hmac is None:
+            key = base64.b64decode(secret)
+            self.__hmac = hmac.new(key, digestmod=hashlib.sha256)
+            self.__secret = secret
+        return self.__hmac
+
+    def sign(self, secret: str, message: str) -> str:
+        sig = self.mac(secret).copy()
+        sig.update(message.encode("ascii"))
+        return base64.b64encode(sig.digest()).decode("utf-8")
@@ -0,0 +1,125 @@
+# coinbase-pro - A Python API Adapter for Coinbase Pro and Coinbase Exchange
+# Copyright (C) 2021 teleprint.me
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from threading import Lock
+from time import monotonic, sleep
+
+from coinbase_pro.abstract import AbstractLimiter
+
+# NOTE: Public endpoints are limited by IP and private endpoints by profile.
+# https://docs.cloud.coinbase.com/exchange/docs/rate-limits
+PUBLIC_RATE: float = 10.0
+PUBLIC_BURST: int = 15
+PRIVATE_RATE: float = 15.0
+PRIVATE_BURST: int = 30
+# NOTE: Market data is the only public traffic; every other endpoint is signed
+PUBLIC_PATHS: tuple = ("/products", "/currencies", "/time")
+
+
+def is_private(path: str) -> bool:
+    root = path.split("?")[0].lstrip("/").split("/")[0]
+    return f"/{root}" not in PUBLIC_PATHS
+
+
+class Bucket(object):
+    def __init__(self, rate: float, burst: int):
+        self.__rate: float = float(rate)
+        self.__burst: float = float(burst)
+        self.__tokens: float = float(burst)
+        self.__stamp: float = monotonic()
+        self.__lock: Lock = Lock()
+
+    def __repr__(self) -> str:
+        return f"Bucket(rate={self.rate}, burst={self.burst})"
+
+    @property
+    def rate(self) -> float:
+        return self.__rate
+
+    @property
+    def burst(self) -> float:
+        return self.__burst
+
+    @property
+    def tokens(self) -> float:
+        with self.__lock:
+            self.__refill()
+            return self.__tokens
+
+    def __refill(self) -> None:
+        now = monotonic()
+        elapsed = now - self.__stamp
+        self.__stamp = now
+        self.__tokens = min(self.__burst, self.__tokens + elapsed * self.__rate)
+
+    def delay(self) -> float:
+        # NOTE: Peek at the time until a token is available without taking it
+        with self.__lock:
+            self.__refill()
+            return max(0.0, (1.0 - self.__tokens) / self.__rate)
+
+    def reserve(self) -> float:
+        # NOTE: Tokens may go negative; the debt is the caller's time to wait
+        with self.__lock:
+            self.__refill()
+            self.__tokens -= 1.0
+            return max(0.0, -self.__tokens / self.__rate)
+
+
+class Limiter(AbstractLimiter):
+    def __init__(self, public: Bucket = None, private: Bucket = None):
+        self.__public = public if public else Bucket(PUBLIC_RATE, PUBLIC_BURST)
+        self.__private = private if private else Bucket(PRIVATE_RATE, PRIVATE_BURST)
+
+    def __repr__(self) -> str:
+        return f"Limiter(public={self.public}, private={self.private})"
+
+    @property
+    def public(self) -> Bucket:
+        return self.__public
+
+    @property
+    def private(self) -> Bucket:
+        return self.__private
+
+    def bucket(self, private: bool = False) -> Bucket:
+        return self.private if private else self.public
+
+    def reserve(self, private: bool = False) -> float:
+        return self.bucket(private).reserve()
+
+    def delay(self, private: bool = False) -> float:
+        return self.bucket(private).delay()
+
+    def wait(self, private: bool = False) -> float:
+        seconds = self.reserve(private)
+        if seconds:
+            sleep(seconds)
+        return seconds
+
+
+_limiters: dict = {}
+_limiters_lock: Lock = Lock()
+_public: Bucket = Bucket(PUBLIC_RATE, PUBLIC_BURST)
+
+
+def get_limiter(key: str = None) -> Limiter:
+    # NOTE: Messengers using the same key share one private budget across
+    # threads, and every key shares the public budget because it is per IP
+    with _limiters_lock:
+        key = key if key else str()
+        if key not in _limiters:
+            _limiters[key] = Limiter(_public)
+        return _limiters[key]
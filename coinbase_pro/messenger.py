@@ -13,29 +13,55 @@
 #
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
-import base64
-import hashlib
+from __future__ import annotations
+
 import hmac
 from dataclasses import dataclass, field
-from time import sleep, time
-
-from requests import Response, Session
-from requests.auth import AuthBase
-from requests.models import PreparedRequest
+from threading import Lock
+from time import monotonic, sleep, time
+from typing import TYPE_CHECKING
 
-from coinbase_pro import __agent__, __limit__, __source__, __version__
+from coinbase_pro import __agent__, __source__, __version__
 from coinbase_pro.abstract import (
     AbstractAPI,
     AbstractAuth,
+    AbstractClock,
+    AbstractCodec,
     AbstractMessenger,
+    AbstractMetrics,
+    AbstractRetry,
     AbstractSubscriber,
 )
+from coinbase_pro.cache import Cache
+from coinbase_pro.codec import get_codec
+from coinbase_pro.keyed import Keyed
+from coinbase_pro.limiter import Limiter, get_limiter, is_private
+from coinbase_pro.metrics import Event
+from coinbase_pro.models import load
+from coinbase_pro.retry import Retry
+
+# NOTE: requests is imported when the first request is made
+if TYPE_CHECKING:
+    from requests import Response, Session
+    from requests.models import PreparedRequest
+
+# NOTE: Idle connections kept per host; at least as many as concurrent threads
+# so keep-alive connections are reused instead of being discarded
+CONNECTIONS: int = 16
+
+# NOTE: Records requested per page when the caller does not set a limit
+LIMIT: int = 100
 
 
 @dataclass
 class API(AbstractAPI):
     settings: dict = field(default_factory=dict)
 
+    def __post_init__(self):
+        # NOTE: get_messenger and get_client pass None when settings are omitted
+        if self.settings is None:
+            self.settings = dict()
+
     @property
     def key(self) -> str:
         return self.settings.get("key", "")
@@ -67,15 +93,16 @@ class API(AbstractAPI):
         return f'{self.rest}/{self.path(value).lstrip("/")}'
 
 
-class Auth(AbstractAuth, AuthBase):
-    def __init__(self, api: API = None):
+class Auth(AbstractAuth):
+    def __init__(self, api: API = None, clock: AbstractClock = None):
         self.__api = api if api else API()
+        self.__clock: AbstractClock = clock
+        self.__keyed: Keyed = Keyed()
+        self.__template: dict = None
 
     def __call__(self, request: PreparedRequest) -> PreparedRequest:
-        timestamp = str(time())
         body = str() if not request.body else request.body.decode("utf-8")
-        message = f"{timestamp}{request.method.upper()}{request.path_url}{body}"
-        header = self.header(timestamp, message)
+        header = self.sign(request.method, request.path_url, body)
         request.headers.update(header)
         return request
 
@@ -83,29 +110,205 @@ class Auth(AbstractAuth, AuthBase):
     def api(self) -> API:
         return self.__api
 
+    @property
+    def clock(self) -> AbstractClock:
+        return self.__clock
+
+    @property
+    def mac(self) -> hmac.HMAC:
+        return self.__keyed.mac(self.api.secret)
+
+    @property
+    def template(self) -> dict:
+        key, passphrase = self.api.key, self.api.passphrase
+        template = self.__template
+        if (
+            template is None
+            or template["CB-ACCESS-KEY"] != key
+            or template["CB-ACCESS-PASSPHRASE"] != passphrase
+        ):
+            template = self.__template = {
+                "Content-Type": "application/json",
+                "User-Agent": f"{__agent__}/{__version__} {__source__}",
+                "CB-ACCESS-KEY": key,
+                "CB-ACCESS-PASSPHRASE": passphrase,
+            }
+        return template
+
+    def sign(self, method: str, path: str, body: str = None) -> dict:
+        timestamp = str(self.clock.time() if self.clock else time())
+        body = body if body else str()
+        message = f"{timestamp}{method.upper()}{path}{body}"
+        return self.header(timestamp, message)
+
     def signature(self, message: str) -> bytes:
-        key = base64.b64decode(self.api.secret)
-        msg = message.encode("ascii")
-        sig = hmac.new(key, msg, hashlib.sha256)
-        digest = sig.digest()
-        b64signature = base64.b64encode(digest)
-        return b64signature.decode("utf-8")
+        return self.__keyed.sign(self.api.secret, message)
 
     def header(self, timestamp: str, message: str) -> dict:
-        return {
-            "Content-Type": "application/json",
-            "User-Agent": f"{__agent__}/{__version__} {__source__}",
-            "CB-ACCESS-TIMESTAMP": timestamp,
-            "CB-ACCESS-KEY": self.api.key,
-            "CB-ACCESS-SIGN": self.signature(message),
-            "CB-ACCESS-PASSPHRASE": self.api.passphrase,
-        }
+        header = self.template.copy()
+        header["CB-ACCESS-TIMESTAMP"] = timestamp
+        header["CB-ACCESS-SIGN"] = self.signature(message)
+        return header
+
+
+def query(data: dict = None) -> dict:
+    # NOTE: The cursor is written to a copy, never to the caller's dict
+    data = dict(data) if data else dict()
+    data.setdefault("limit", LIMIT)
+    return data
+
+
+def follow(response: Response, data: dict) -> bool:
+    cursor = response.headers.get("CB-AFTER")
+    if cursor:
+        data["after"] = cursor
+    return bool(cursor)
+
+
+def collect(messenger: AbstractMessenger, path: str, data: dict = None) -> list:
+    # NOTE: Every messenger type pages through its own get, so the limiter,
+    # cache, or scheduler in front of it still applies to each page
+    responses, data = [], query(data)
+    while True:
+        response = messenger.get(path, data)
+        if 200 != response.status_code:
+            return [response]
+        if not messenger.decode(response):
+            return responses
+        responses.append(response)
+        if not follow(response, data):
+            return responses
+
+
+async def collect_async(
+    messenger: AbstractMessenger, path: str, data: dict = None
+) -> list:
+    responses, data = [], query(data)
+    while True:
+        response = await messenger.get(path, data)
+        if 200 != response.status_code:
+            return [response]
+        if not messenger.decode(response):
+            return responses
+        responses.append(response)
+        if not follow(response, data):
+            return responses
+
+
+class Pager(object):
+    def __init__(
+        self,
+        messenger: AbstractMessenger,
+        path: str,
+        data: dict = None,
+        cursor: str = "after",
+        items: int = None,
+        seconds: float = None,
+        model: type = None,
+    ):
+        if cursor not in ("after", "before"):
+            raise ValueError(f"cursor must be 'after' or 'before', not {cursor!r}")
+        self.messenger: AbstractMessenger = messenger
+        self.path: str = path
+        self.data: dict = query(data)
+        self.cursor: str = cursor
+        self.items: int = items
+        self.seconds: float = seconds
+        self.model: type = model
+        self.after: str = self.data.get("after")
+        self.before: str = self.data.get("before")
+        self.next: str = None
+        self.pages: int = 0
+        self.count: int = 0
+
+    def __repr__(self) -> str:
+        return f"Pager(path={self.path}, cursor={self.cursor}, count={self.count})"
+
+    def __iter__(self):
+        for records in self.__fetch():
+            for record in records:
+                yield record
+                self.count += 1
+                if self.items and self.count >= self.items:
+                    return
+
+    def batches(self):
+        # NOTE: Yields each page as soon as it is received; the last page is
+        # cut short so no more than `items` records are yielded in total
+        for records in self.__fetch():
+            if self.items:
+                records = records[: self.items - self.count]
+            self.count += len(records)
+            yield records
+
+    def __fetch(self):
+        start = monotonic()
+        data = dict(self.data)
+        while not self.exhausted(start):
+            records = self.records(self.messenger.get(self.path, data))
+            if not records:
+                break
+            yield records
+            if not self.advance(data):
+                break
+
+    def exhausted(self, start: float) -> bool:
+        if self.items and self.count >= self.items:
+            return True
+        return bool(self.seconds) and monotonic() - start >= self.seconds
+
+    def records(self, response: Response) -> list:
+        if 200 != response.status_code:
+            from requests import HTTPError
+
+            raise HTTPError(
+                f"{response.status_code} {response.text}", response=response
+            )
+        records = self.messenger.decode(response)
+        if self.model is not None:
+            records = self.model.many(records)
+        self.pages += 1
+        after = response.headers.get("CB-AFTER")
+        before = response.headers.get("CB-BEFORE")
+        # NOTE: Keep the newest and oldest cursors seen for incremental syncs
+        if records:
+            if "after" == self.cursor:
+                self.before = before if 1 == self.pages else self.before
+                self.after = after
+            else:
+                self.before = before
+                self.after = after if 1 == self.pages else self.after
+        self.next = after if "after" == self.cursor else before
+        return records
+
+    def advance(self, data: dict) -> bool:
+        if not self.next:
+            return False
+        data.pop("after" if "before" == self.cursor else "before", None)
+        data[self.cursor] = self.next
+        return True
 
 
 class Messenger(AbstractMessenger):
-    def __init__(self, auth: Auth = None):
+    def __init__(
+        self,
+        auth: Auth = None,
+        limiter: Limiter = None,
+        cache: Cache = None,
+        codec: AbstractCodec = None,
+        metrics: AbstractMetrics = None,
+        retry: AbstractRetry = None,
+        connections: int = CONNECTIONS,
+    ):
         self.__auth: AbstractAuth = auth if auth else Auth()
-        self.__session: Session = Session()
+        self.__session: Session = None
+        self.__lock: Lock = Lock()
+        self.__limiter: Limiter = limiter if limiter else get_limiter(self.api.key)
+        self.__cache: Cache = cache
+        self.__codec: AbstractCodec = codec if codec else get_codec()
+        self.__metrics: AbstractMetrics = metrics
+        self.__retry: AbstractRetry = retry if retry else Retry()
+        self.__connections: int = connections
 
     @property
     def auth(self) -> Auth:
@@ -117,54 +320,167 @@ class Messenger(AbstractMessenger):
 
     @property
     def session(self) -> Session:
+        if self.__session is None:
+            from requests import Session
+            from requests.adapters import HTTPAdapter
+
+            with self.__lock:
+                if self.__session is None:
+                    # NOTE: Retries are handled by the messenger, not urllib3
+                    adapter = HTTPAdapter(
+                        pool_connections=self.__connections,
+                        pool_maxsize=self.__connections,
+                        max_retries=0,
+                    )
+                    session = Session()
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    self.__session = session
         return self.__session
 
+    @property
+    def limiter(self) -> Limiter:
+        return self.__limiter
+
+    @property
+    def cache(self) -> Cache:
+        return self.__cache
+
+    @property
+    def codec(self) -> AbstractCodec:
+        return self.__codec
+
+    @property
+    def metrics(self) -> AbstractMetrics:
+        return self.__metrics
+
+    @property
+    def retry(self) -> AbstractRetry:
+        return self.__retry
+
+    @property
+    def connections(self) -> int:
+        return self.__connections
+
+    @property
+    def private(self) -> bool:
+        return bool(self.api.key)
+
     @property
     def timeout(self) -> int:
         return 30
 
+    def reuse(self) -> dict:
+        # NOTE: Every request beyond the first on a connection reused it
+        opened, requests = 0, 0
+        if self.__session is not None:
+            for adapter in set(self.__session.adapters.values()):
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    pool = pools.get(key)
+                    if pool is not None:
+                        opened += pool.num_connections
+                        requests += pool.num_requests
+        return {"opened": opened, "requests": requests, "reused": requests - opened}
+
+    def request(
+        self, method: str, path: str, data: dict = None, wait: float = None
+    ) -> Response:
+        # NOTE: A caller that already reserved a token passes the time it waited
+        private = is_private(path)
+        if wait is None:
+            wait = self.limiter.wait(private)
+        if "GET" == method:
+            params, body = data, None
+        else:
+            params, body = None, None if data is None else self.codec.encode(data)
+        event = Event(method, path, wait=wait, sent=len(body) if body else 0)
+        try:
+            while True:
+                # NOTE: Latency is that of the last attempt; backoff counts as wait
+                start = monotonic()
+                try:
+                    response = self.session.request(
+                        method,
+                        self.api.url(path),
+                        params=params,
+                        data=body,
+                        auth=self.auth,
+                        timeout=self.timeout,
+                    )
+                except Exception as error:
+                    from requests import ConnectionError, Timeout
+
+                    if not isinstance(error, (ConnectionError, Timeout)):
+                        raise
+                    if not self.retry.retryable(method, None, event.retries):
+                        raise
+                    delay = self.retry.backoff(event.retries)
+                else:
+                    status = response.status_code
+                    if not self.retry.retryable(method, status, event.retries):
+                        break
+                    delay = self.retry.backoff(event.retries, response.headers)
+                event.retries += 1
+                sleep(delay)
+                event.wait += delay + self.limiter.wait(private)
+        except Exception as error:
+            event.error = type(error).__name__
+            raise
+        else:
+            event.status = response.status_code
+            event.received = len(response.content)
+        finally:
+            event.latency = monotonic() - start
+            if self.metrics is not None:
+                self.metrics.record(event)
+        return response
+
+    def decode(self, response: Response) -> object:
+        if self.metrics is None:
+            return self.codec.decode(response.content)
+        start = monotonic()
+        payload = self.codec.decode(response.content)
+        self.metrics.decoded(monotonic() - start)
+        return payload
+
     def get(self, path: str, data: dict = None) -> Response:
-        sleep(__limit__)
-        return self.session.get(
-            self.api.url(path), params=data, auth=self.auth, timeout=self.timeout
+        ttl = self.cache.ttl(path) if self.cache is not None else 0
+        if not ttl:
+            return self.request("GET", path, data)
+        return self.cache.fetch(
+            self.cache.key(path, data, self.api.key),
+            lambda: self.request("GET", path, data),
+            ttl,
+            lambda response: 200 == response.status_code,
         )
 
     def post(self, path: str, data: dict = None) -> Response:
-        sleep(__limit__)
-        return self.session.post(
-            self.api.url(path), json=data, auth=self.auth, timeout=self.timeout
-        )
+        return self.request("POST", path, data)
 
     def put(self, path: str, data: dict = None) -> Response:
-        sleep(__limit__)
-        return self.session.put(
-            self.api.url(path), json=data, auth=self.auth, timeout=self.timeout
-        )
+        return self.request("PUT", path, data)
 
     def delete(self, path: str, data: dict = None) -> Response:
-        sleep(__limit__)
-        return self.session.delete(
-            self.api.url(path), json=data, auth=self.auth, timeout=self.timeout
-        )
+        return self.request("DELETE", path, data)
 
     def page(self, path: str, data: dict = None) -> list:
-        responses = []
-        if not data:
-            data = {"limit": 20}
-        while True:
-            response = self.get(path, data)
-            if 200 != response.status_code:
-                return [response]
-            if not response.json():
-                break
-            responses.append(response)
-            if not response.headers.get("CB-AFTER"):
-                break
-            data["after"] = response.headers.get("CB-AFTER")
-        return responses
+        return collect(self, path, data)
+
+    def paginate(
+        self,
+        path: str,
+        data: dict = None,
+        cursor: str = "after",
+        items: int = None,
+        seconds: float = None,
+        model: type = None,
+    ) -> Pager:
+        return Pager(self, path, data, cursor, items, seconds, model)
 
     def close(self):
-        self.session.close()
+        if self.__session is not None:
+            self.__session.close()
 
 
 class Subscriber(AbstractSubscriber):
@@ -178,3 +494,9 @@ class Subscriber(AbstractSubscriber):
     # NOTE: error is left here as a convenience method for plugs
     def error(self, response: Response) -> bool:
         return 200 != response.status_code
+
+    def decode(self, response: Response, model: type = None) -> object:
+        payload = self.messenger.decode(response)
+        if model is None or self.error(response):
+            return payload
+        return load(model, payload)
@@ -0,0 +1,274 @@
+# coinbase-pro - A Python API Adapter for Coinbase Pro and Coinbase Exchange
+# Copyright (C) 2021 teleprint.me
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import re
+from dataclasses import dataclass
+from threading import Lock
+from time import monotonic
+from typing import Callable
+
+from coinbase_pro.abstract import AbstractMetrics
+
+# NOTE: Bucket bounds are upper bounds in seconds; +Inf is implied
+LATENCY: tuple = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+WAIT: tuple = (0.0, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+DECODE: tuple = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5)
+
+SEGMENT = re.compile(r"^[a-z][a-z-]*$")
+
+
+def template(path: str) -> str:
+    # NOTE: Identifiers such as product ids and uuids are collapsed so paths
+    # like /products/BTC-USD/book and /products/ETH-USD/book share one series
+    path = path.split("?", 1)[0]
+    segments = [s if SEGMENT.match(s) else "{id}" for s in path.split("/") if s]
+    return "/" + "/".join(segments)
+
+
+@dataclass
+class Event(object):
+    method: str
+    path: str
+    status: int = None
+    latency: float = 0.0
+    wait: float = 0.0
+    sent: int = 0
+    received: int = 0
+    retries: int = 0
+    error: str = None
+
+    @property
+    def template(self) -> str:
+        return template(self.path)
+
+
+class Histogram(object):
+    def __init__(self, bounds: tuple):
+        self.__bounds: tuple = tuple(bounds)
+        self.__counts: list = [0] * (len(bounds) + 1)
+        self.__sum: float = 0.0
+
+    def __repr__(self) -> str:
+        return f"Histogram(count={self.count}, sum={self.sum})"
+
+    @property
+    def bounds(self) -> tuple:
+        return self.__bounds
+
+    @property
+    def count(self) -> int:
+        return sum(self.__counts)
+
+    @property
+    def sum(self) -> float:
+        return self.__sum
+
+    def observe(self, value: float) -> None:
+        index = len(self.__bounds)
+        for i, bound in enumerate(self.__bounds):
+            if value <= bound:
+                index = i
+                break
+        self.__counts[index] += 1
+        self.__sum += value
+
+    def cumulative(self) -> list:
+        total, counts = 0, []
+        for count in self.__counts:
+            total += count
+            counts.append(total)
+        return counts
+
+    def quantile(self, q: float) -> float:
+        # NOTE: Returns the upper bound of the bucket holding the quantile
+        count = self.count
+        if not count:
+            return 0.0
+        rank = q * count
+        for bound, total in zip(self.__bounds, self.cumulative()):
+            if total >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self) -> dict:
+        bounds = [str(b) for b in self.__bounds] + ["+Inf"]
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+            "buckets": dict(zip(bounds, self.cumulative())),
+        }
+
+
+class Endpoint(object):
+    def __init__(self):
+        self.latency: Histogram = Histogram(LATENCY)
+        self.wait: Histogram = Histogram(WAIT)
+        self.status: dict = dict()
+        self.sent: int = 0
+        self.received: int = 0
+        self.retries: int = 0
+        self.errors: int = 0
+
+    def __repr__(self) -> str:
+        return f"Endpoint(count={self.latency.count}, errors={self.errors})"
+
+    def record(self, event: Event) -> None:
+        self.latency.observe(event.latency)
+        self.wait.observe(event.wait)
+        self.sent += event.sent
+        self.received += event.received
+        self.retries += event.retries
+        if event.error is not None:
+            self.errors += 1
+        else:
+            self.status[event.status] = self.status.get(event.status, 0) + 1
+
+    def snapshot(self, elapsed: float) -> dict:
+        count = self.latency.count
+        return {
+            "count": count,
+            "rate": count / elapsed if elapsed else 0.0,
+            "errors": self.errors,
+            "retries": self.retries,
+            "status": {str(k): v for k, v in self.status.items()},
+            "sent": self.sent,
+            "received": self.received,
+            "latency": self.latency.snapshot(),
+            "wait": self.wait.snapshot(),
+        }
+
+
+class Collector(AbstractMetrics):
+    # NOTE: Hooks are called with every Event after it has been recorded
+    def __init__(self, hooks: list = None):
+        self.__hooks: list = list(hooks) if hooks else []
+        self.__endpoints: dict = dict()
+        self.__decode: Histogram = Histogram(DECODE)
+        self.__start: float = monotonic()
+        self.__lock: Lock = Lock()
+
+    def __repr__(self) -> str:
+        return f"Collector(endpoints={len(self.__endpoints)})"
+
+    @property
+    def hooks(self) -> list:
+        return self.__hooks
+
+    @property
+    def elapsed(self) -> float:
+        return monotonic() - self.__start
+
+    def hook(self, callback: Callable[[Event], None]) -> None:
+        self.__hooks.append(callback)
+
+    def record(self, event: Event) -> None:
+        key = (event.method, event.template)
+        with self.__lock:
+            if key not in self.__endpoints:
+                self.__endpoints[key] = Endpoint()
+            self.__endpoints[key].record(event)
+        for callback in self.__hooks:
+            callback(event)
+
+    def decoded(self, seconds: float) -> None:
+        with self.__lock:
+            self.__decode.observe(seconds)
+
+    def reset(self) -> None:
+        with self.__lock:
+            self.__endpoints.clear()
+            self.__decode = Histogram(DECODE)
+            self.__start = monotonic()
+
+    def snapshot(self) -> dict:
+        with self.__lock:
+            elapsed = self.elapsed
+            return {
+                "elapsed": elapsed,
+                "requests": {
+                    f"{method} {path}": endpoint.snapshot(elapsed)
+                    for (method, path), endpoint in self.__endpoints.items()
+                },
+                "decode": self.__decode.snapshot(),
+            }
+
+    def prometheus(self, prefix: str = "coinbase_pro") -> str:
+        lines = []
+        with self.__lock:
+            endpoints = sorted(self.__endpoints.items())
+            decode = self.__decode
+
+            def histogram(name: str, text: str, series: list):
+                lines.append(f"# HELP {prefix}_{name} {text}")
+                lines.append(f"# TYPE {prefix}_{name} histogram")
+                for labels, value in series:
+                    bounds = [str(b) for b in value.bounds] + ["+Inf"]
+                    for bound, count in zip(bounds, value.cumulative()):
+                        le = f'{labels},le="{bound}"' if labels else f'le="{bound}"'
+                        lines.append(f"{prefix}_{name}_bucket{{{le}}} {count}")
+                    labels = f"{{{labels}}}" if labels else ""
+                    lines.append(f"{prefix}_{name}_sum{labels} {value.sum}")
+                    lines.append(f"{prefix}_{name}_count{labels} {value.count}")
+
+            def counter(name: str, text: str, series: list):
+                lines.append(f"# HELP {prefix}_{name} {text}")
+                lines.append(f"# TYPE {prefix}_{name} counter")
+                for labels, value in series:
+                    lines.append(f"{prefix}_{name}{{{labels}}} {value}")
+
+            labeled = [(f'method="{m}",path="{p}"', e) for (m, p), e in endpoints]
+            histogram(
+                "request_seconds",
+                "Time spent on the wire per request.",
+                [(labels, e.latency) for labels, e in labeled],
+            )
+            histogram(
+                "limiter_wait_seconds",
+                "Time spent waiting on the rate limiter per request.",
+                [(labels, e.wait) for labels, e in labeled],
+            )
+            counter(
+                "responses_total",
+                "Responses by status code.",
+                [
+                    (f'{labels},status="{status}"', count)
+                    for labels, e in labeled
+                    for status, count in sorted(e.status.items())
+                ],
+            )
+            counter(
+                "errors_total",
+                "Requests that raised before a response was received.",
+                [(labels, e.errors) for labels, e in labeled],
+            )
+            counter(
+                "retries_total",
+                "Retry attempts, summed over requests.",
+                [(labels, e.retries) for labels, e in labeled],
+            )
+            counter(
+                "sent_bytes_total",
+                "Request body bytes sent.",
+                [(labels, e.sent) for labels, e in labeled],
+            )
+            counter(
+                "received_bytes_total",
+                "Response body bytes received.",
+                [(labels, e.received) for labels, e in labeled],
+            )
+            histogram("decode_seconds", "Time spent decoding payloads.", [("", decode)])
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,210 @@
+# coinbase-pro - A Python API Adapter for Coinbase Pro and Coinbase Exchange
+# Copyright (C) 2021 teleprint.me
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from array import array
+from typing import Callable
+
+
+class Field(object):
+    __slots__ = ("name", "index", "convert")
+
+    def __init__(self, convert: Callable[[str], object] = None):
+        self.name: str = None
+        self.index: int = None
+        self.convert: Callable[[str], object] = convert
+
+    def __set_name__(self, owner: type, name: str):
+        self.name = name
+
+    def __get__(self, instance: "Model", owner: type) -> object:
+        if instance is None:
+            return self
+        values = instance._values
+        value = values[self.index]
+        # NOTE: Numeric strings are converted on first access and kept
+        if self.convert is not None and isinstance(value, str):
+            value = values[self.index] = self.convert(value)
+        return value
+
+    def __set__(self, instance: "Model", value: object):
+        instance._values[self.index] = value
+
+
+class Model(object):
+    # NOTE: Values are kept in a single list instead of a per-instance dict
+    __slots__ = ("_values",)
+    __fields__: tuple = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        fields = [v for v in vars(cls).values() if isinstance(v, Field)]
+        for index, field in enumerate(fields):
+            field.index = index
+        cls.__fields__ = tuple(field.name for field in fields)
+
+    def __init__(self, **kwargs):
+        self._values = [kwargs.get(name) for name in self.__fields__]
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{n}={getattr(self, n)!r}" for n in self.__fields__[:3])
+        return f"{type(self).__name__}({values})"
+
+    def __eq__(self, other: object) -> bool:
+        if type(self) is not type(other):
+            return NotImplemented
+        return self.dict() == other.dict()
+
+    @classmethod
+    def one(cls, payload: dict) -> "Model":
+        instance = cls.__new__(cls)
+        instance._values = [payload.get(name) for name in cls.__fields__]
+        return instance
+
+    @classmethod
+    def many(cls, payloads: list) -> list:
+        return [cls.one(payload) for payload in payloads]
+
+    def dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__fields__}
+
+
+class Order(Model):
+    __slots__ = ()
+    id = Field()
+    client_oid = Field()
+    product_id = Field()
+    profile_id = Field()
+    side = Field()
+    type = Field()
+    time_in_force = Field()
+    post_only = Field()
+    status = Field()
+    settled = Field()
+    created_at = Field()
+    done_at = Field()
+    done_reason = Field()
+    price = Field(float)
+    size = Field(float)
+    funds = Field(float)
+    specified_funds = Field(float)
+    stop_price = Field(float)
+    fill_fees = Field(float)
+    filled_size = Field(float)
+    executed_value = Field(float)
+
+
+class Fill(Model):
+    __slots__ = ()
+    trade_id = Field()
+    order_id = Field()
+    product_id = Field()
+    profile_id = Field()
+    side = Field()
+    liquidity = Field()
+    settled = Field()
+    created_at = Field()
+    price = Field(float)
+    size = Field(float)
+    fee = Field(float)
+    usd_volume = Field(float)
+
+
+class LedgerEntry(Model):
+    __slots__ = ()
+    id = Field()
+    type = Field()
+    created_at = Field()
+    details = Field()
+    amount = Field(float)
+    balance = Field(float)
+
+
+class Trade(Model):
+    __slots__ = ()
+    trade_id = Field()
+    side = Field()
+    time = Field()
+    price = Field(float)
+    size = Field(float)
+
+
+class Ticker(Model):
+    __slots__ = ()
+    trade_id = Field()
+    time = Field()
+    price = Field(float)
+    size = Field(float)
+    bid = Field(float)
+    ask = Field(float)
+    volume = Field(float)
+
+
+class Candle(Model):
+    __slots__ = ()
+    time = Field()
+    low = Field()
+    high = Field()
+    open = Field()
+    close = Field()
+    volume = Field()
+
+    @classmethod
+    def one(cls, payload: list) -> "Candle":
+        instance = cls.__new__(cls)
+        instance._values = list(payload)
+        return instance
+
+    @classmethod
+    def many(cls, payloads: list) -> "Candles":
+        return Candles(payloads)
+
+
+class Candles(object):
+    # NOTE: Candles are stored column-wise in typed arrays, 48 bytes per row
+    __slots__ = ("time", "low", "high", "open", "close", "volume")
+
+    def __init__(self, rows: list = None):
+        self.time: array = array("q")
+        self.low: array = array("d")
+        self.high: array = array("d")
+        self.open: array = array("d")
+        self.close: array = array("d")
+        self.volume: array = array("d")
+        for row in rows if rows else []:
+            self.append(row)
+
+    def __repr__(self) -> str:
+        return f"Candles(length={len(self)})"
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def __getitem__(self, index: int) -> Candle:
+        return Candle.one([getattr(self, name)[index] for name in self.__slots__])
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def append(self, row: list):
+        self.time.append(int(row[0]))
+        for name, value in zip(self.__slots__[1:], row[1:]):
+            getattr(self, name).append(float(value))
+
+
+def load(model: type, payload: object) -> object:
+    if isinstance(payload, list):
+        return model.many(payload)
+    return model.one(payload)
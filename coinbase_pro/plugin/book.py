@@ -0,0 +1,523 @@
+# coinbase-pro - A Python API Adapter for Coinbase Pro and Coinbase Exchange
+# Copyright (C) 2021 teleprint.me
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from bisect import bisect_left, insort
+from collections import deque
+from threading import Thread
+from time import monotonic, perf_counter, sleep
+
+from coinbase_pro.abstract import AbstractRetry
+from coinbase_pro.client import Product
+from coinbase_pro.messenger import Messenger
+from coinbase_pro.retry import Retry
+from coinbase_pro.socket import Stream
+
+# NOTE: Live messages kept while a snapshot is fetched; older ones are dropped
+# and the gap they leave is detected and resynced on replay
+BUFFER: int = 100_000
+
+
+class Side(object):
+    # NOTE: Keys are kept ascending with the best price last, so the best level
+    # is O(1) and the levels that change most are moved the least; asks are
+    # stored negated so both sides share one ordering
+    def __init__(self, ask: bool = False):
+        self.__ask: bool = ask
+        self.__keys: list = list()
+        self.__sizes: dict = dict()
+
+    def __repr__(self) -> str:
+        return f"Side(ask={self.ask}, levels={len(self)})"
+
+    def __len__(self) -> int:
+        return len(self.__keys)
+
+    def __contains__(self, price: float) -> bool:
+        return self.key(price) in self.__sizes
+
+    def __iter__(self):
+        sizes = self.__sizes
+        for key in reversed(self.__keys):
+            yield self.price(key), sizes[key]
+
+    @property
+    def ask(self) -> bool:
+        return self.__ask
+
+    @property
+    def best(self) -> tuple:
+        if not self.__keys:
+            return None
+        key = self.__keys[-1]
+        return self.price(key), self.__sizes[key]
+
+    def key(self, price: float) -> float:
+        return -price if self.__ask else price
+
+    def price(self, key: float) -> float:
+        return -key if self.__ask else key
+
+    def size(self, price: float) -> float:
+        return self.__sizes.get(self.key(price), 0.0)
+
+    def update(self, price: float, size: float) -> None:
+        key = -price if self.__ask else price
+        sizes = self.__sizes
+        if size:
+            if key not in sizes:
+                insort(self.__keys, key)
+            sizes[key] = size
+        elif key in sizes:
+            del sizes[key]
+            del self.__keys[bisect_left(self.__keys, key)]
+
+    def load(self, levels: list) -> None:
+        sizes = {self.key(float(price)): float(size) for price, size, *_ in levels}
+        self.__sizes = {key: size for key, size in sizes.items() if size}
+        self.__keys = sorted(self.__sizes)
+
+    def top(self, levels: int = 10) -> list:
+        sizes = self.__sizes
+        keys = self.__keys[-levels:] if levels else []
+        return [(self.price(key), sizes[key]) for key in reversed(keys)]
+
+    def clear(self) -> None:
+        self.__keys.clear()
+        self.__sizes.clear()
+
+
+class Level2(object):
+    types: tuple = ("snapshot", "l2update")
+
+    def __init__(self, product_id: str):
+        self.__product_id: str = product_id
+        self.__bids: Side = Side()
+        self.__asks: Side = Side(ask=True)
+        self.__ready: bool = False
+        self.time: str = None
+
+    def __repr__(self) -> str:
+        return f"Level2(product_id={self.product_id}, bid={self.bid}, ask={self.ask})"
+
+    @property
+    def product_id(self) -> str:
+        return self.__product_id
+
+    @property
+    def bids(self) -> Side:
+        return self.__bids
+
+    @property
+    def asks(self) -> Side:
+        return self.__asks
+
+    @property
+    def ready(self) -> bool:
+        return self.__ready
+
+    @property
+    def bid(self) -> tuple:
+        return self.__bids.best
+
+    @property
+    def ask(self) -> tuple:
+        return self.__asks.best
+
+    @property
+    def spread(self) -> float:
+        bid, ask = self.bid, self.ask
+        return ask[0] - bid[0] if bid and ask else None
+
+    @property
+    def mid(self) -> float:
+        bid, ask = self.bid, self.ask
+        return (ask[0] + bid[0]) / 2 if bid and ask else None
+
+    def snapshot(self, message: dict) -> int:
+        self.__bids.load(message.get("bids", []))
+        self.__asks.load(message.get("asks", []))
+        self.__ready = True
+        self.time = message.get("time")
+        return len(self.__bids) + len(self.__asks)
+
+    def update(self, message: dict) -> int:
+        # NOTE: Updates before the first snapshot cannot be applied correctly
+        if not self.__ready:
+            return 0
+        bids, asks = self.__bids, self.__asks
+        changes = message.get("changes", [])
+        for side, price, size in changes:
+            (bids if "buy" == side else asks).update(float(price), float(size))
+        self.time = message.get("time", self.time)
+        return len(changes)
+
+    def apply(self, message: dict) -> int:
+        if "l2update" == message.get("type"):
+            return self.update(message)
+        return self.snapshot(message)
+
+    def depth(self, levels: int = 10) -> dict:
+        return {"bids": self.__bids.top(levels), "asks": self.__asks.top(levels)}
+
+    def clear(self) -> None:
+        self.__bids.clear()
+        self.__asks.clear()
+        self.__ready = False
+
+
+class Level3(object):
+    types: tuple = ("received", "open", "done", "match", "change", "activate")
+
+    def __init__(
+        self,
+        product_id: str,
+        product: Product = None,
+        limit: int = BUFFER,
+        retry: AbstractRetry = None,
+    ):
+        self.__product_id: str = product_id
+        self.__product: Product = product if product else Product(Messenger())
+        self.__retry: AbstractRetry = retry if retry else Retry()
+        self.__bids: Side = Side()
+        self.__asks: Side = Side(ask=True)
+        self.__orders: dict = dict()
+        self.__levels: dict = dict()
+        self.__sequence: int = 0
+        self.__buffer: deque = deque(maxlen=limit)
+        self.__thread: Thread = None
+        self.__snapshot: dict = None
+        self.__syncing: bool = False
+        self.__ready: bool = False
+        self.__attempt: int = 0
+        self.gaps: int = 0
+        self.stale: int = 0
+        self.resyncs: int = 0
+        self.failures: int = 0
+        self.time: str = None
+
+    def __repr__(self) -> str:
+        return f"Level3(product_id={self.product_id}, orders={len(self.orders)})"
+
+    @property
+    def product_id(self) -> str:
+        return self.__product_id
+
+    @property
+    def product(self) -> Product:
+        return self.__product
+
+    @property
+    def retry(self) -> AbstractRetry:
+        return self.__retry
+
+    @property
+    def bids(self) -> Side:
+        return self.__bids
+
+    @property
+    def asks(self) -> Side:
+        return self.__asks
+
+    @property
+    def orders(self) -> dict:
+        return self.__orders
+
+    @property
+    def sequence(self) -> int:
+        return self.__sequence
+
+    @property
+    def ready(self) -> bool:
+        return self.__ready and not self.__syncing
+
+    @property
+    def syncing(self) -> bool:
+        return self.__syncing
+
+    @property
+    def buffered(self) -> int:
+        return len(self.__buffer)
+
+    @property
+    def bid(self) -> tuple:
+        return self.__bids.best
+
+    @property
+    def ask(self) -> tuple:
+        return self.__asks.best
+
+    def depth(self, levels: int = 10) -> dict:
+        return {"bids": self.__bids.top(levels), "asks": self.__asks.top(levels)}
+
+    def resync(self, delay: float = 0.0) -> None:
+        # NOTE: The snapshot is fetched on its own thread so live messages keep
+        # being read and buffered instead of piling up in the socket
+        self.__syncing = True
+        self.__snapshot = None
+
+        def fetch():
+            if delay:
+                sleep(delay)
+            try:
+                self.__snapshot = self.product.book(self.product_id, {"level": 3})
+            except Exception:
+                self.__snapshot = None
+
+        self.__thread = Thread(target=fetch, daemon=True)
+        self.__thread.start()
+
+    def poll(self) -> bool:
+        if not self.__syncing or self.__thread.is_alive():
+            return False
+        snapshot = self.__snapshot
+        if not isinstance(snapshot, dict) or "sequence" not in snapshot:
+            # NOTE: A failed fetch waits before the next one, so an outage
+            # does not turn every incoming message into a request
+            self.failures += 1
+            self.resync(self.retry.backoff(self.__attempt))
+            self.__attempt = min(self.__attempt + 1, 32)
+            return False
+        self.__attempt = 0
+        self.__syncing = False
+        self.load(snapshot)
+        self.resyncs += 1
+        buffer, self.__buffer = self.__buffer, deque(maxlen=self.__buffer.maxlen)
+        # NOTE: Messages older than the snapshot are skipped as stale; a gap
+        # found while replaying starts another resync with what is left
+        while buffer:
+            message = buffer.popleft()
+            if self.__syncing:
+                self.__buffer.append(message)
+            else:
+                self.step(message)
+        return True
+
+    def wait(self, timeout: float = None) -> bool:
+        if self.__thread is not None:
+            self.__thread.join(timeout)
+        return self.poll()
+
+    def load(self, snapshot: dict) -> None:
+        self.__orders.clear()
+        self.__levels.clear()
+        self.__bids.clear()
+        self.__asks.clear()
+        for side, levels in (("buy", snapshot["bids"]), ("sell", snapshot["asks"])):
+            for price, size, order_id in levels:
+                self.add(order_id, side, float(price), float(size))
+        self.__sequence = int(snapshot["sequence"])
+        self.__ready = True
+
+    def apply(self, message: dict) -> int:
+        if self.__syncing:
+            self.__buffer.append(message)
+            self.poll()
+            return 0
+        if not self.__ready:
+            self.__buffer.append(message)
+            self.resync()
+            return 0
+        return self.step(message)
+
+    def step(self, message: dict) -> int:
+        sequence = message["sequence"]
+        if sequence <= self.__sequence:
+            self.stale += 1
+            return 0
+        if sequence != self.__sequence + 1:
+            self.gaps += 1
+            self.__buffer.append(message)
+            self.resync()
+            return 0
+        self.__sequence = sequence
+        self.time = message.get("time", self.time)
+        return self.change(message)
+
+    def change(self, message: dict) -> int:
+        # NOTE: received and activate do not touch the book; an open order
+        # rests with its remaining size and a match reduces the maker
+        kind = message["type"]
+        if "open" == kind:
+            price = float(message["price"])
+            size = float(message["remaining_size"])
+            return self.add(message["order_id"], message["side"], price, size)
+        if "done" == kind:
+            return self.remove(message["order_id"])
+        if "match" == kind:
+            return self.fill(message["maker_order_id"], float(message["size"]))
+        if "change" == kind and "new_size" in message:
+            order = self.__orders.get(message["order_id"])
+            if order is None:
+                return 0
+            return self.fill(message["order_id"], order[2] - float(message["new_size"]))
+        return 0
+
+    def add(self, order_id: str, side: str, price: float, size: float) -> int:
+        if order_id in self.__orders:
+            self.remove(order_id)
+        self.__orders[order_id] = [side, price, size]
+        self.level(side, price, 1, size)
+        return 1
+
+    def remove(self, order_id: str) -> int:
+        order = self.__orders.pop(order_id, None)
+        if order is None:
+            return 0
+        side, price, size = order
+        self.level(side, price, -1, -size)
+        return 1
+
+    def fill(self, order_id: str, size: float) -> int:
+        order = self.__orders.get(order_id)
+        if order is None:
+            return 0
+        side, price, remaining = order
+        order[2] = max(0.0, remaining - size)
+        self.level(side, price, 0, order[2] - remaining)
+        return 1
+
+    def level(self, side: str, price: float, count: int, size: float) -> None:
+        # NOTE: A level is removed by its order count, and its total is rounded
+        # past the 8 places sizes are quoted in so float drift never lingers
+        key = (side, price)
+        level = self.__levels.get(key)
+        if level is None:
+            level = self.__levels[key] = [0, 0.0]
+        level[0] += count
+        level[1] = round(level[1] + size, 10)
+        levels = self.__bids if "buy" == side else self.__asks
+        if level[0] <= 0:
+            del self.__levels[key]
+            levels.update(price, 0.0)
+        else:
+            levels.update(price, max(0.0, level[1]))
+
+
+class Books(object):
+    def __init__(
+        self,
+        stream: Stream = None,
+        product_ids: list = None,
+        channel: str = "level2",
+        product: Product = None,
+    ):
+        self.__stream: Stream = stream if stream else Stream()
+        self.__channel: str = channel
+        self.__product: Product = product
+        self.__kind: type = Level3 if "full" == channel else Level2
+        self.__books: dict = dict()
+        for product_id in product_ids if product_ids else []:
+            self.book(product_id)
+        self.__messages: int = 0
+        self.__changes: int = 0
+        self.__busy: float = 0.0
+        self.__start: float = monotonic()
+
+    def __repr__(self) -> str:
+        return f"Books(products={len(self)}, channel={self.channel})"
+
+    def __len__(self) -> int:
+        return len(self.__books)
+
+    def __contains__(self, product_id: str) -> bool:
+        return product_id in self.__books
+
+    def __getitem__(self, product_id: str) -> object:
+        return self.__books[product_id]
+
+    def __iter__(self):
+        return iter(self.__books.values())
+
+    @property
+    def stream(self) -> Stream:
+        return self.__stream
+
+    @property
+    def channel(self) -> str:
+        return self.__channel
+
+    @property
+    def product_ids(self) -> list:
+        return list(self.__books)
+
+    @property
+    def kind(self) -> type:
+        return self.__kind
+
+    def book(self, product_id: str) -> object:
+        book = self.__books.get(product_id)
+        if book is None:
+            if self.__kind is Level3:
+                book = Level3(product_id, self.__product)
+            else:
+                book = Level2(product_id)
+            self.__books[product_id] = book
+        return book
+
+    def message(self) -> dict:
+        return {
+            "type": "subscribe",
+            "product_ids": self.product_ids,
+            "channels": [self.channel],
+        }
+
+    def subscribe(self) -> None:
+        if not self.stream.connected:
+            self.stream.connect()
+        self.stream.send(self.message())
+
+    def apply(self, message: dict) -> object:
+        if message.get("type") not in self.__kind.types:
+            return None
+        start = perf_counter()
+        book = self.book(message["product_id"])
+        changes = book.apply(message)
+        self.__busy += perf_counter() - start
+        self.__messages += 1
+        self.__changes += changes
+        return book
+
+    def receive(self) -> object:
+        return self.apply(self.stream.receive())
+
+    def run(self, count: int = None, seconds: float = None) -> int:
+        # NOTE: Returns the number of book messages applied before a limit is hit
+        # or the stream disconnects
+        applied, start = 0, monotonic()
+        while self.stream.connected:
+            if count is not None and applied >= count:
+                break
+            if seconds is not None and monotonic() - start >= seconds:
+                break
+            if self.receive() is not None:
+                applied += 1
+        return applied
+
+    def stats(self) -> dict:
+        elapsed = monotonic() - self.__start
+        return {
+            "messages": self.__messages,
+            "changes": self.__changes,
+            "elapsed": elapsed,
+            "busy": self.__busy,
+            "messages_per_s": self.__messages / elapsed if elapsed else 0.0,
+            "changes_per_s": self.__changes / self.__busy if self.__busy else 0.0,
+        }
+
+    def reset(self) -> None:
+        self.__messages = 0
+        self.__changes = 0
+        self.__busy = 0.0
+        self.__start = monotonic()
@@ -0,0 +1,181 @@
+# coinbase-pro - A Python API Adapter for Coinbase Pro and Coinbase Exchange
+# Copyright (C) 2021 teleprint.me
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from threading import Lock
+
+import numpy as np
+from requests import HTTPError
+
+from coinbase_pro.batch import WORKERS
+from coinbase_pro.messenger import Subscriber
+
+# NOTE: The candles endpoint returns at most 300 buckets per request
+LIMIT: int = 300
+GRANULARITIES: tuple = (60, 300, 900, 3600, 21600, 86400)
+CANDLE: np.dtype = np.dtype(
+    [
+        ("time", "<i8"),
+        ("low", "<f8"),
+        ("high", "<f8"),
+        ("open", "<f8"),
+        ("close", "<f8"),
+        ("volume", "<f8"),
+    ]
+)
+
+
+def isoformat(seconds: int) -> str:
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat()
+
+
+def normalize(candles: np.ndarray) -> np.ndarray:
+    # NOTE: Deduplicate by time and order from oldest to newest
+    _, index = np.unique(candles["time"], return_index=True)
+    return candles[index]
+
+
+class Checkpoint(object):
+    def __init__(self, path: str):
+        self.path: str = path
+        self.part: str = f"{path}.part"
+        self.state: str = f"{path}.json"
+        self.done: set = set()
+        self.__lock: Lock = Lock()
+        if os.path.exists(self.state):
+            with open(self.state, "r") as file:
+                self.done = set(json.load(file)["done"])
+
+    def append(self, window: int, candles: np.ndarray) -> None:
+        # NOTE: Rows are appended before the window is marked as done, so a
+        # crash in between only produces duplicates which normalize removes
+        with self.__lock:
+            with open(self.part, "ab") as file:
+                file.write(candles.tobytes())
+                file.flush()
+                os.fsync(file.fileno())
+            self.done.add(window)
+            with open(f"{self.state}.tmp", "w") as file:
+                json.dump({"done": sorted(self.done)}, file)
+            os.replace(f"{self.state}.tmp", self.state)
+
+    def finish(self) -> np.ndarray:
+        candles = np.fromfile(self.part, dtype=CANDLE)
+        candles = normalize(candles) if len(candles) else candles
+        np.save(self.path, candles)
+        os.remove(self.part)
+        os.remove(self.state)
+        return candles
+
+
+class History(Subscriber):
+    def windows(self, start: int, end: int, granularity: int = 60) -> list:
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"granularity must be one of {GRANULARITIES}")
+        # NOTE: The end is inclusive, like the rows kept by window
+        span = granularity * LIMIT
+        start = start - start % granularity
+        return [
+            (t, min(t + span - granularity, end))
+            for t in range(start, end + granularity, span)
+        ]
+
+    def window(
+        self, product_id: str, start: int, end: int, granularity: int
+    ) -> np.ndarray:
+        data = {
+            "start": isoformat(start),
+            "end": isoformat(end),
+            "granularity": granularity,
+        }
+        response = self.messenger.get(f"/products/{product_id}/candles", data)
+        if self.error(response):
+            message = f"{response.status_code} {response.text}"
+            raise HTTPError(message, response=response)
+        rows = [tuple(row) for row in self.decode(response) if start <= row[0] <= end]
+        return np.array(rows, dtype=CANDLE)
+
+    def each(
+        self, product_id: str, windows: list, granularity: int, workers: int = None
+    ):
+        # NOTE: Yields (start, candles, error) as each window completes
+        with ThreadPoolExecutor(max_workers=workers if workers else WORKERS) as pool:
+            futures = {
+                pool.submit(self.window, product_id, s, e, granularity): s
+                for s, e in windows
+            }
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as error:
+                    yield futures[future], None, error
+
+    def fetch(
+        self,
+        product_id: str,
+        start: int,
+        end: int,
+        granularity: int = 60,
+        workers: int = None,
+    ) -> np.ndarray:
+        chunks = []
+        windows = self.windows(start, end, granularity)
+        for _, candles, error in self.each(product_id, windows, granularity, workers):
+            if error is not None:
+                raise error
+            chunks.append(candles)
+        if not chunks:
+            return np.empty(0, dtype=CANDLE)
+        return normalize(np.concatenate(chunks))
+
+    def download(
+        self,
+        product_id: str,
+        start: int,
+        end: int,
+        granularity: int = 60,
+        directory: str = ".",
+        workers: int = None,
+    ) -> np.ndarray:
+        name = f"{product_id}-{granularity}-{start}-{end}.npy"
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            return np.load(path)
+
+        checkpoint = Checkpoint(path)
+        windows = [
+            w
+            for w in self.windows(start, end, granularity)
+            if w[0] not in checkpoint.done
+        ]
+
+        errors = []
+        for window, candles, error in self.each(
+            product_id, windows, granularity, workers
+        ):
+            if error is not None:
+                errors.append(error)
+            else:
+                checkpoint.append(window, candles)
+
+        # NOTE: Completed windows are kept so the next call resumes from here
+        if errors:
+            raise errors[0]
+        if not os.path.exists(checkpoint.part):
+            open(checkpoint.part, "wb").close()
+        return checkpoint.finish()
@@ -0,0 +1,141 @@
+# coinbase-pro - A Python API Adapter for Coinbase Pro and Coinbase Exchange
+# Copyright (C) 2021 teleprint.me
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import os
+from threading import Lock
+from time import time
+
+import numpy as np
+
+from coinbase_pro.plugin.history import CANDLE, History, normalize
+
+
+class Series(object):
+    # NOTE: A read-only snapshot of one product and granularity; each column is
+    # a memory-mapped view and `time` doubles as the sorted index
+    def __init__(self, directory: str):
+        self.__directory: str = directory
+        self.__columns: dict = dict()
+        length = Series.length(directory)
+        for name in CANDLE.names:
+            path = os.path.join(directory, f"{name}.bin")
+            dtype = CANDLE.fields[name][0]
+            if length:
+                self.__columns[name] = np.memmap(path, dtype, "r", shape=(length,))
+            else:
+                self.__columns[name] = np.empty(0, dtype=dtype)
+
+    def __repr__(self) -> str:
+        return f"Series(directory={self.directory}, length={len(self)})"
+
+    def __len__(self) -> int:
+        return len(self.__columns["time"])
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.__columns[name]
+
+    @staticmethod
+    def length(directory: str) -> int:
+        # NOTE: A partially appended row is ignored until it is truncated
+        lengths = []
+        for name in CANDLE.names:
+            path = os.path.join(directory, f"{name}.bin")
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            lengths.append(size // CANDLE.fields[name][0].itemsize)
+        return min(lengths)
+
+    @property
+    def directory(self) -> str:
+        return self.__directory
+
+    @property
+    def columns(self) -> tuple:
+        return CANDLE.names
+
+    @property
+    def first(self) -> int:
+        return int(self["time"][0]) if len(self) else None
+
+    @property
+    def last(self) -> int:
+        return int(self["time"][-1]) if len(self) else None
+
+    def index(self, start: int = None, end: int = None) -> slice:
+        times = self["time"]
+        lower = 0 if start is None else int(np.searchsorted(times, start, "left"))
+        upper = len(times) if end is None else int(np.searchsorted(times, end, "right"))
+        return slice(lower, upper)
+
+    def between(self, start: int = None, end: int = None) -> dict:
+        index = self.index(start, end)
+        return {name: column[index] for name, column in self.__columns.items()}
+
+
+class Store(object):
+    def __init__(self, directory: str = "."):
+        self.__directory: str = directory
+        self.__lock: Lock = Lock()
+
+    def __repr__(self) -> str:
+        return f"Store(directory={self.directory})"
+
+    @property
+    def directory(self) -> str:
+        return self.__directory
+
+    def path(self, product_id: str, granularity: int = 60) -> str:
+        return os.path.join(self.directory, product_id, str(granularity))
+
+    def open(self, product_id: str, granularity: int = 60) -> Series:
+        return Series(self.path(product_id, granularity))
+
+    def append(self, product_id: str, granularity: int, candles: np.ndarray) -> int:
+        directory = self.path(product_id, granularity)
+        with self.__lock:
+            os.makedirs(directory, exist_ok=True)
+            length = Series.length(directory)
+            last = self.open(product_id, granularity).last
+            candles = normalize(np.asarray(candles, dtype=CANDLE))
+            if last is not None:
+                candles = candles[candles["time"] > last]
+            if not len(candles):
+                return 0
+            # NOTE: Time is written last so a crash never indexes missing values
+            for name in CANDLE.names[1:] + CANDLE.names[:1]:
+                path = os.path.join(directory, f"{name}.bin")
+                with open(path, "ab") as file:
+                    file.truncate(length * CANDLE.fields[name][0].itemsize)
+                    file.write(np.ascontiguousarray(candles[name]).tobytes())
+            return len(candles)
+
+    def sync(
+        self,
+        history: History,
+        product_id: str,
+        granularity: int = 60,
+        start: int = None,
+        end: int = None,
+    ) -> int:
+        last = self.open(product_id, granularity).last
+        if last is not None:
+            start = last + granularity
+        if start is None:
+            raise ValueError("start is required for a product that is not stored")
+        # NOTE: The current bucket is still open, so only closed buckets are stored
+        end = end if end else int(time()) // granularity * granularity - granularity
+        if start > end:
+            return 0
+        candles = history.fetch(product_id, start, end, granularity)
+        return self.append(product_id, granularity, candles)
@@ -0,0 +1,157 @@
+# coinbase-pro - A Python API Adapter for Coinbase Pro and Coinbase Exchange
+# Copyright (C) 2021 teleprint.me
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import json
+import os
+from threading import Lock
+
+from requests import HTTPError
+
+from coinbase_pro.messenger import Messenger, Pager, Subscriber
+
+# NOTE: Each key is stored as `<key>.jsonl`, oldest record first, and its
+# high-water mark is kept in `marks.json` next to it
+MARKS: str = "marks.json"
+
+
+class Sync(Subscriber):
+    def __init__(self, messenger: Messenger = None, directory: str = "."):
+        super().__init__(messenger)
+        self.__directory: str = directory
+        self.__lock: Lock = Lock()
+        self.__marks: dict = dict()
+        path = os.path.join(directory, MARKS)
+        if os.path.exists(path):
+            with open(path, "r") as file:
+                self.__marks = json.load(file)
+
+    def __repr__(self) -> str:
+        return f"Sync(directory={self.directory})"
+
+    @property
+    def directory(self) -> str:
+        return self.__directory
+
+    @property
+    def marks(self) -> dict:
+        return dict(self.__marks)
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.jsonl")
+
+    def mark(self, key: str) -> dict:
+        return self.__marks.get(key, {"cursor": None, "size": 0, "count": 0})
+
+    def save(self):
+        path = os.path.join(self.directory, MARKS)
+        with open(f"{path}.tmp", "w") as file:
+            json.dump(self.__marks, file, indent=4, sort_keys=True)
+        os.replace(f"{path}.tmp", path)
+
+    def pages(self, pager: Pager):
+        # NOTE: Yields the lines of each page, oldest first, with the newest
+        # cursor seen once that page was received
+        for records in pager.batches():
+            lines = [json.dumps(r, separators=(",", ":")) for r in reversed(records)]
+            yield lines, pager.before
+
+    def append(self, key: str, lines: list, cursor: str) -> int:
+        # NOTE: Records are appended before the mark moves, and the file is
+        # truncated to the marked size first, so a crash never duplicates
+        mark = self.mark(key)
+        with open(self.path(key), "ab") as file:
+            file.truncate(mark["size"])
+            file.write("".join(f"{line}\n" for line in lines).encode("utf-8"))
+            file.flush()
+            os.fsync(file.fileno())
+            size = file.tell()
+        self.__marks[key] = {
+            "cursor": cursor,
+            "size": size,
+            "count": mark["count"] + len(lines),
+        }
+        self.save()
+        return len(lines)
+
+    def walk(self, key: str, path: str, data: dict) -> int:
+        # NOTE: The full history arrives newest page first, so each page is
+        # spooled to a temporary file and the pages are copied back in
+        # reverse; only one page is held in memory at a time
+        pager = Pager(self.messenger, path, data, cursor="after")
+        spool, part = f"{self.path(key)}.spool", f"{self.path(key)}.part"
+        spans, count = list(), 0
+        try:
+            with open(spool, "w+b") as file:
+                for lines, _ in self.pages(pager):
+                    chunk = "".join(f"{line}\n" for line in lines).encode("utf-8")
+                    spans.append((file.tell(), len(chunk)))
+                    file.write(chunk)
+                    count += len(lines)
+                if not count:
+                    return 0
+                with open(part, "wb") as output:
+                    for offset, length in reversed(spans):
+                        file.seek(offset)
+                        output.write(file.read(length))
+                    output.flush()
+                    os.fsync(output.fileno())
+                    size = output.tell()
+            os.replace(part, self.path(key))
+        finally:
+            for name in (spool, part):
+                if os.path.exists(name):
+                    os.remove(name)
+        self.__marks[key] = {"cursor": pager.before, "size": size, "count": count}
+        self.save()
+        return count
+
+    def pull(self, key: str, path: str, data: dict = None) -> int:
+        with self.__lock:
+            mark = self.mark(key)
+            data = dict(data) if data else dict()
+            os.makedirs(self.directory, exist_ok=True)
+            # NOTE: Without a mark the full history is walked from the newest
+            # record; with one only records newer than the mark are requested,
+            # oldest page first, and the mark moves after every page
+            if mark["cursor"] is None:
+                return self.walk(key, path, data)
+            data["before"] = mark["cursor"]
+            pager = Pager(self.messenger, path, data, cursor="before")
+            return sum(self.append(key, *page) for page in self.pages(pager))
+
+    def read(self, key: str):
+        mark = self.mark(key)
+        if not mark["size"]:
+            return
+        remaining = mark["size"]
+        with open(self.path(key), "rb") as file:
+            for line in file:
+                remaining -= len(line)
+                if remaining < 0:
+                    return
+                yield json.loads(line)
+
+    def fills(self, product_id: str) -> int:
+        return self.pull(f"fills-{product_id}", "/fills", {"product_id": product_id})
+
+    def ledger(self, account_id: str) -> int:
+        return self.pull(f"ledger-{account_id}", f"/accounts/{account_id}/ledger")
+
+    def accounts(self) -> dict:
+        response = self.messenger.get("/accounts")
+        if self.error(response):
+            message = f"{response.status_code} {response.text}"
+            raise HTTPError(message, response=response)
+        return {a["id"]: self.ledger(a["id"]) for a in self.decode(response)}
@@ -0,0 +1,183 @@
+# coinbase-pro - A Python API Adapter for Coinbase Pro and Coinbase Exchange
+# Copyright (C) 2021 teleprint.me
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+
+from threading import Lock
+from typing import TYPE_CHECKING
+
+from coinbase_pro.abstract import AbstractMessenger
+from coinbase_pro.cache import Cache
+from coinbase_pro.limiter import Limiter
+from coinbase_pro.messenger import API, Auth, Messenger, Pager
+
+if TYPE_CHECKING:
+    from requests import Response, Session
+
+
+class Pool(AbstractMessenger):
+    def __init__(self, messengers: list):
+        if not messengers:
+            raise ValueError("a pool needs at least one messenger")
+        self.__messengers: list = list(messengers)
+        self.__profiles: dict = dict()
+        self.__accounts: dict = dict()
+        self.__counts: list = [0] * len(self.__messengers)
+        self.__lock: Lock = Lock()
+
+    def __repr__(self) -> str:
+        return f"Pool(keys={len(self.__messengers)})"
+
+    def __len__(self) -> int:
+        return len(self.__messengers)
+
+    @property
+    def messengers(self) -> list:
+        return list(self.__messengers)
+
+    @property
+    def primary(self) -> Messenger:
+        return self.__messengers[0]
+
+    @property
+    def auth(self) -> Auth:
+        return self.primary.auth
+
+    @property
+    def api(self) -> API:
+        return self.primary.api
+
+    @property
+    def session(self) -> Session:
+        return self.primary.session
+
+    @property
+    def limiter(self) -> Limiter:
+        return self.primary.limiter
+
+    @property
+    def cache(self) -> Cache:
+        return self.primary.cache
+
+    @property
+    def timeout(self) -> int:
+        return self.primary.timeout
+
+    @property
+    def profiles(self) -> dict:
+        return dict(self.__profiles)
+
+    @property
+    def counts(self) -> list:
+        with self.__lock:
+            return list(self.__counts)
+
+    def register(self, profile_id: str, messenger: Messenger, accounts: list = None):
+        with self.__lock:
+            # NOTE: A messenger registered by hand becomes a member of the pool
+            if not any(messenger is m for m in self.__messengers):
+                self.__messengers.append(messenger)
+                self.__counts.append(0)
+            self.__profiles[profile_id] = messenger
+            for account_id in accounts if accounts else []:
+                self.__accounts[account_id] = messenger
+
+    def discover(self) -> dict:
+        # NOTE: Each key belongs to one profile, which is read from its accounts
+        for messenger in self.__messengers:
+            response = messenger.get("/accounts")
+            if 200 != response.status_code:
+                continue
+            accounts = messenger.decode(response)
+            if accounts:
+                ids = [account["id"] for account in accounts]
+                self.register(accounts[0]["profile_id"], messenger, ids)
+        return self.profiles
+
+    def profile(self, profile_id: str) -> Messenger:
+        messenger = self.__profiles.get(profile_id)
+        if messenger is None:
+            raise ValueError(f"no credentials for profile {profile_id!r}")
+        return messenger
+
+    def budgets(self) -> list:
+        # NOTE: Only the private budget is per key; see Limiter.public
+        return [
+            {
+                "key": m.api.key,
+                "tokens": m.limiter.private.tokens,
+                "delay": m.limiter.delay(True),
+                "requests": count,
+            }
+            for m, count in zip(self.messengers, self.counts)
+        ]
+
+    def route(self, path: str, data: dict = None) -> Messenger:
+        # NOTE: Public traffic is limited per IP, so spreading it over keys
+        # adds no capacity and it always uses the primary key. Orders and
+        # fills without a profile_id cannot be traced to an owner either.
+        if data and data.get("profile_id"):
+            messenger = self.profile(data["profile_id"])
+        elif path.startswith("/accounts/"):
+            account_id = path.split("/")[2]
+            messenger = self.__accounts.get(account_id, self.primary)
+        else:
+            messenger = self.primary
+        with self.__lock:
+            index = next(i for i, m in enumerate(self.__messengers) if m is messenger)
+            self.__counts[index] += 1
+        return messenger
+
+    def decode(self, response: Response) -> object:
+        return self.primary.decode(response)
+
+    def request(
+        self, method: str, path: str, data: dict = None, wait: float = None
+    ) -> Response:
+        return self.route(path, data).request(method, path, data, wait)
+
+    def get(self, path: str, data: dict = None) -> Response:
+        return self.route(path, data).get(path, data)
+
+    def post(self, path: str, data: dict = None) -> Response:
+        return self.route(path, data).post(path, data)
+
+    def put(self, path: str, data: dict = None) -> Response:
+        return self.route(path, data).put(path, data)
+
+    def delete(self, path: str, data: dict = None) -> Response:
+        return self.route(path, data).delete(path, data)
+
+    def page(self, path: str, data: dict = None) -> list:
+        return self.route(path, data).page(path, data)
+
+    def paginate(
+        self,
+        path: str,
+        data: dict = None,
+        cursor: str = "after",
+        items: int = None,
+        seconds: float = None,
+        model: type = None,
+    ) -> Pager:
+        return Pager(self, path, data, cursor, items, seconds, model)
+
+    def close(self):
+        for messenger in self.__messengers:
+            messenger.close()
+
+
+def get_pool(settings: list) -> Pool:
+    return Pool([Messenger(Auth(API(s))) for s in settings])
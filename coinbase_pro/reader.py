@@ -0,0 +1,289 @@
+# coinbase-pro - A Python API Adapter for Coinbase Pro and Coinbase Exchange
+# Copyright (C) 2021 teleprint.me
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from collections import deque
+from threading import Condition, Lock, Thread
+from typing import Callable
+
+from coinbase_pro.socket import Stream
+
+BLOCK: str = "block"
+DROP: str = "drop"
+COALESCE: str = "coalesce"
+POLICIES: tuple = (BLOCK, DROP, COALESCE)
+
+# NOTE: Only messages that carry the whole state may replace each other
+REPLACEABLE: tuple = ("ticker", "status", "heartbeat")
+
+CAPACITY: int = 10_000
+WORKERS: int = 4
+
+
+class Ring(object):
+    # NOTE: A bounded FIFO; when it is full the reader either waits (block),
+    # evicts the oldest message (drop), or, with coalesce, replaces a queued
+    # replaceable message of the same type and product and otherwise waits
+    def __init__(self, capacity: int = CAPACITY, policy: str = DROP):
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {list(POLICIES)}")
+        self.__capacity: int = capacity
+        self.__policy: str = policy
+        self.__keys: deque = deque()
+        self.__items: dict = dict()
+        self.__latest: dict = dict()
+        self.__condition: Condition = Condition()
+        self.__closed: bool = False
+        self.__sequence: int = 0
+        self.pushed: int = 0
+        self.popped: int = 0
+        self.dropped: int = 0
+        self.coalesced: int = 0
+        self.peak: int = 0
+
+    def __repr__(self) -> str:
+        return f"Ring(capacity={self.capacity}, policy={self.policy})"
+
+    def __len__(self) -> int:
+        return len(self.__keys)
+
+    @property
+    def capacity(self) -> int:
+        return self.__capacity
+
+    @property
+    def policy(self) -> str:
+        return self.__policy
+
+    @property
+    def closed(self) -> bool:
+        return self.__closed
+
+    def slot(self, message: dict) -> tuple:
+        kind, product_id = message.get("type"), message.get("product_id")
+        if COALESCE != self.__policy or kind not in REPLACEABLE or not product_id:
+            return None
+        return (kind, product_id)
+
+    def put(self, message: dict) -> bool:
+        with self.__condition:
+            if self.__closed:
+                return False
+            slot = self.slot(message)
+            while len(self.__keys) >= self.__capacity:
+                # NOTE: Coalescing is a response to backpressure only, so a
+                # ring with room keeps every message
+                if slot in self.__latest:
+                    self.__items[self.__latest[slot]] = message
+                    self.coalesced += 1
+                    return True
+                if DROP == self.__policy:
+                    self.__items.pop(self.__keys.popleft())
+                    self.dropped += 1
+                    continue
+                self.__condition.wait()
+                if self.__closed:
+                    return False
+            self.__sequence += 1
+            self.__keys.append(self.__sequence)
+            self.__items[self.__sequence] = message
+            if slot is not None:
+                self.__latest[slot] = self.__sequence
+            self.pushed += 1
+            self.peak = max(self.peak, len(self.__keys))
+            self.__condition.notify_all()
+            return True
+
+    def get(self, timeout: float = None) -> dict:
+        with self.__condition:
+            while not self.__keys:
+                if self.__closed:
+                    return None
+                if not self.__condition.wait(timeout):
+                    return None
+            key = self.__keys.popleft()
+            message = self.__items.pop(key)
+            slot = self.slot(message)
+            if slot is not None and self.__latest.get(slot) == key:
+                del self.__latest[slot]
+            self.popped += 1
+            self.__condition.notify_all()
+            return message
+
+    def open(self) -> None:
+        with self.__condition:
+            self.__closed = False
+
+    def close(self) -> None:
+        with self.__condition:
+            self.__closed = True
+            self.__condition.notify_all()
+
+    def snapshot(self) -> dict:
+        with self.__condition:
+            return {
+                "depth": len(self.__keys),
+                "peak": self.peak,
+                "pushed": self.pushed,
+                "popped": self.popped,
+                "dropped": self.dropped,
+                "coalesced": self.coalesced,
+            }
+
+
+class Reader(object):
+    def __init__(
+        self,
+        stream: Stream = None,
+        workers: int = WORKERS,
+        capacity: int = CAPACITY,
+        policy: str = DROP,
+    ):
+        self.__stream: Stream = stream if stream else Stream()
+        self.__rings: list = [Ring(capacity, policy) for _ in range(workers)]
+        self.__handlers: dict = dict()
+        self.__workers: list = list()
+        self.__reader: Thread = None
+        self.__lock: Lock = Lock()
+        self.__running: bool = False
+        self.received: int = 0
+        self.dispatched: int = 0
+        self.errors: int = 0
+        self.error: Exception = None
+
+    def __repr__(self) -> str:
+        return f"Reader(workers={len(self.__rings)}, policy={self.policy})"
+
+    def __enter__(self) -> "Reader":
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    @property
+    def stream(self) -> Stream:
+        return self.__stream
+
+    @property
+    def rings(self) -> list:
+        return list(self.__rings)
+
+    @property
+    def policy(self) -> str:
+        return self.__rings[0].policy
+
+    @property
+    def running(self) -> bool:
+        return self.__running
+
+    def on(
+        self,
+        handler: Callable[[dict], None],
+        kind: str = None,
+        product_id: str = None,
+    ) -> None:
+        with self.__lock:
+            self.__handlers.setdefault((kind, product_id), []).append(handler)
+
+    def handlers(self, message: dict) -> list:
+        kind, product_id = message.get("type"), message.get("product_id")
+        handlers = self.__handlers
+        keys = ((kind, product_id), (kind, None), (None, product_id), (None, None))
+        return [h for key in dict.fromkeys(keys) for h in handlers.get(key, [])]
+
+    def ring(self, message: dict) -> Ring:
+        # NOTE: One product always lands on one ring, so its messages are
+        # handled in order by a single worker
+        product_id = message.get("product_id")
+        if product_id is None:
+            return self.__rings[0]
+        return self.__rings[hash(product_id) % len(self.__rings)]
+
+    def start(self) -> None:
+        if self.__running:
+            return
+        # NOTE: A reader left from a previous run finishes its pending receive
+        # and the old workers drain their rings first, so two threads never
+        # read from one socket or handle one product
+        for thread in self.__workers + [self.__reader]:
+            if thread is not None:
+                thread.join()
+        self.__running = True
+        for ring in self.__rings:
+            ring.open()
+        self.__workers = [
+            Thread(target=self.work, args=(ring,), daemon=True) for ring in self.__rings
+        ]
+        self.__reader = Thread(target=self.read, daemon=True)
+        for thread in self.__workers + [self.__reader]:
+            thread.start()
+
+    def read(self) -> None:
+        # NOTE: The reader only decodes and queues, so a slow handler never
+        # keeps the socket from being drained
+        try:
+            while self.__running:
+                message = self.stream.receive()
+                if not message:
+                    if not self.stream.connected:
+                        break
+                    continue
+                self.received += 1
+                self.ring(message).put(message)
+        except Exception as error:
+            with self.__lock:
+                self.errors += 1
+                self.error = error
+        finally:
+            self.__running = False
+            for ring in self.__rings:
+                ring.close()
+
+    def work(self, ring: Ring) -> None:
+        while True:
+            message = ring.get()
+            if message is None:
+                return
+            for handler in self.handlers(message):
+                try:
+                    handler(message)
+                except Exception as error:
+                    with self.__lock:
+                        self.errors += 1
+                        self.error = error
+            with self.__lock:
+                self.dispatched += 1
+
+    def stop(self, timeout: float = None) -> None:
+        # NOTE: Queued messages are still handled. The reader thread exits
+        # after its pending receive, or at once if the stream is disconnected
+        self.__running = False
+        for ring in self.__rings:
+            ring.close()
+        for thread in self.__workers:
+            thread.join(timeout)
+        self.__workers = list()
+
+    def stats(self) -> dict:
+        rings = [ring.snapshot() for ring in self.__rings]
+        return {
+            "received": self.received,
+            "dispatched": self.dispatched,
+            "errors": self.errors,
+            "depth": sum(r["depth"] for r in rings),
+            "dropped": sum(r["dropped"] for r in rings),
+            "coalesced": sum(r["coalesced"] for r in rings),
+            "rings": rings,
+        }
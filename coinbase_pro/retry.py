@@ -0,0 +1,98 @@
+# coinbase-pro - A Python API Adapter for Coinbase Pro and Coinbase Exchange
+# Copyright (C) 2021 teleprint.me
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from email.utils import parsedate_to_datetime
+from random import uniform
+from time import time
+
+from coinbase_pro.abstract import AbstractRetry
+
+# NOTE: POST is never resent after a failure it may have survived; orders are
+# recovered by client_oid instead, see Order.place
+IDEMPOTENT: tuple = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+STATUSES: tuple = (429, 500, 502, 503, 504)
+
+ATTEMPTS: int = 3
+BASE: float = 0.25
+CAP: float = 10.0
+
+
+def after(value: str) -> float:
+    # NOTE: Retry-After is either a number of seconds or an HTTP date
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time())
+    except (TypeError, ValueError):
+        return None
+
+
+class Retry(AbstractRetry):
+    def __init__(
+        self,
+        attempts: int = ATTEMPTS,
+        base: float = BASE,
+        cap: float = CAP,
+        statuses: tuple = STATUSES,
+        methods: tuple = IDEMPOTENT,
+    ):
+        self.__attempts: int = attempts
+        self.__base: float = base
+        self.__cap: float = cap
+        self.__statuses: frozenset = frozenset(statuses)
+        self.__methods: frozenset = frozenset(methods)
+
+    def __repr__(self) -> str:
+        return f"Retry(attempts={self.attempts}, base={self.base}, cap={self.cap})"
+
+    @property
+    def attempts(self) -> int:
+        return self.__attempts
+
+    @property
+    def base(self) -> float:
+        return self.__base
+
+    @property
+    def cap(self) -> float:
+        return self.__cap
+
+    @property
+    def statuses(self) -> frozenset:
+        return self.__statuses
+
+    @property
+    def methods(self) -> frozenset:
+        return self.__methods
+
+    def retryable(self, method: str, status: int, attempt: int) -> bool:
+        # NOTE: A status of None is a connection error or a timeout
+        if attempt >= self.attempts:
+            return False
+        # NOTE: A 429 is rejected before it is processed, so any method is resent
+        if 429 == status and status in self.statuses:
+            return True
+        return method in self.methods and (status is None or status in self.statuses)
+
+    def backoff(self, attempt: int, headers: dict = None) -> float:
+        seconds = after(headers.get("Retry-After")) if headers else None
+        if seconds is not None:
+            return min(self.cap, seconds)
+        # NOTE: Full jitter spreads out clients that failed at the same time
+        return uniform(0.0, min(self.cap, self.base * 2**attempt))
@@ -0,0 +1,320 @@
+# coinbase-pro - A Python API Adapter for Coinbase Pro and Coinbase Exchange
+# Copyright (C) 2021 teleprint.me
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+
+from collections import deque
+from contextlib import contextmanager
+from threading import Condition, Event, Thread, local
+from time import monotonic
+from typing import TYPE_CHECKING
+
+from coinbase_pro.abstract import AbstractMessenger
+from coinbase_pro.limiter import Limiter, is_private
+from coinbase_pro.messenger import API, Auth, Messenger, Pager, collect
+from coinbase_pro.metrics import WAIT, Histogram
+
+if TYPE_CHECKING:
+    from requests import Response, Session
+
+# NOTE: Classes are listed from the most to the least urgent
+ORDER: str = "order"
+CANCEL: str = "cancel"
+ACCOUNT: str = "account"
+MARKET: str = "market"
+BACKFILL: str = "backfill"
+CLASSES: tuple = (ORDER, CANCEL, ACCOUNT, MARKET, BACKFILL)
+
+# NOTE: Paginated history that is safe to delay behind everything else
+HISTORY: tuple = ("/candles", "/trades", "/ledger", "/holds")
+MARKETS: tuple = ("/products", "/currencies", "/time")
+
+# NOTE: A waiting request gains one class of urgency every AGING seconds
+AGING: float = 5.0
+
+
+def classify(method: str, path: str) -> str:
+    path = path.split("?", 1)[0]
+    if "POST" == method and path.startswith("/orders"):
+        return ORDER
+    if "DELETE" == method and path.startswith("/orders"):
+        return CANCEL
+    if path.endswith(HISTORY):
+        return BACKFILL
+    if path.startswith(MARKETS):
+        return MARKET
+    return ACCOUNT
+
+
+class Ticket(object):
+    __slots__ = ("method", "path", "data", "rank", "stamp", "deadline", "wait", "ready")
+
+    def __init__(self, method: str, path: str, data: dict, rank: int, deadline: float):
+        self.method: str = method
+        self.path: str = path
+        self.data: dict = data
+        self.rank: int = rank
+        self.stamp: float = monotonic()
+        self.deadline: float = deadline
+        self.wait: float = None
+        self.ready: Event = Event()
+
+    def score(self, now: float, aging: float) -> float:
+        return self.rank - (now - self.stamp) / aging
+
+
+class Queue(object):
+    def __init__(self, name: str):
+        self.__name: str = name
+        self.__tickets: deque = deque()
+        self.__delay: Histogram = Histogram(WAIT)
+        self.__submitted: int = 0
+        self.__expired: int = 0
+
+    def __repr__(self) -> str:
+        return f"Queue(name={self.name}, depth={len(self)})"
+
+    def __len__(self) -> int:
+        return len(self.__tickets)
+
+    @property
+    def name(self) -> str:
+        return self.__name
+
+    @property
+    def head(self) -> Ticket:
+        return self.__tickets[0] if self.__tickets else None
+
+    def push(self, ticket: Ticket) -> None:
+        self.__submitted += 1
+        self.__tickets.append(ticket)
+
+    def pop(self, now: float) -> Ticket:
+        ticket = self.__tickets.popleft()
+        ticket.wait = now - ticket.stamp
+        self.__delay.observe(ticket.wait)
+        return ticket
+
+    def expire(self, now: float = None) -> None:
+        # NOTE: Expired tickets are released without a token and fail on wake;
+        # without a time every ticket is released, as on shutdown
+        for ticket in [
+            t
+            for t in self.__tickets
+            if now is None or (t.deadline and t.deadline <= now)
+        ]:
+            self.__tickets.remove(ticket)
+            self.__expired += 1
+            ticket.ready.set()
+
+    def snapshot(self) -> dict:
+        return {
+            "depth": len(self),
+            "submitted": self.__submitted,
+            "dispatched": self.__delay.count,
+            "expired": self.__expired,
+            "delay": self.__delay.snapshot(),
+        }
+
+
+class Scheduler(AbstractMessenger):
+    def __init__(
+        self,
+        messenger: Messenger = None,
+        deadlines: dict = None,
+        aging: float = AGING,
+    ):
+        self.__messenger: Messenger = messenger if messenger else Messenger()
+        self.__deadlines: dict = deadlines if deadlines else dict()
+        self.__aging: float = aging
+        self.__queues: dict = {name: Queue(name) for name in CLASSES}
+        self.__condition: Condition = Condition()
+        self.__local: local = local()
+        self.__thread: Thread = None
+        self.__running: bool = False
+
+    def __repr__(self) -> str:
+        return f"Scheduler(messenger={self.messenger}, pending={self.pending})"
+
+    @property
+    def messenger(self) -> Messenger:
+        return self.__messenger
+
+    @property
+    def auth(self) -> Auth:
+        return self.messenger.auth
+
+    @property
+    def api(self) -> API:
+        return self.messenger.api
+
+    @property
+    def session(self) -> Session:
+        return self.messenger.session
+
+    @property
+    def limiter(self) -> Limiter:
+        return self.messenger.limiter
+
+    @property
+    def timeout(self) -> int:
+        return self.messenger.timeout
+
+    @property
+    def aging(self) -> float:
+        return self.__aging
+
+    @property
+    def deadlines(self) -> dict:
+        return dict(self.__deadlines)
+
+    @property
+    def pending(self) -> int:
+        with self.__condition:
+            return sum(len(queue) for queue in self.__queues.values())
+
+    @contextmanager
+    def priority(self, name: str):
+        if name not in self.__queues:
+            raise ValueError(f"priority must be one of {list(CLASSES)}")
+        previous = getattr(self.__local, "name", None)
+        self.__local.name = name
+        try:
+            yield self
+        finally:
+            self.__local.name = previous
+
+    def classify(self, method: str, path: str) -> str:
+        name = getattr(self.__local, "name", None)
+        return name if name else classify(method, path)
+
+    def start(self) -> None:
+        with self.__condition:
+            if self.__running:
+                return
+            self.__running = True
+            self.__thread = Thread(target=self.dispatch, daemon=True)
+            self.__thread.start()
+
+    def stop(self) -> None:
+        with self.__condition:
+            self.__running = False
+            self.__condition.notify_all()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+    def select(self, now: float) -> Queue:
+        # NOTE: The lowest score wins, so a request that waited long enough
+        # overtakes more urgent classes and backfills cannot starve
+        best, score = None, None
+        for queue in self.__queues.values():
+            queue.expire(now)
+            if queue.head is None:
+                continue
+            value = queue.head.score(now, self.aging)
+            if score is None or value < score:
+                best, score = queue, value
+        return best
+
+    def dispatch(self) -> None:
+        with self.__condition:
+            while self.__running:
+                now = monotonic()
+                queue = self.select(now)
+                if queue is None:
+                    self.__condition.wait(self.horizon(now))
+                    continue
+                # NOTE: The class is chosen when a token is free, not before,
+                # so a request that arrives during the wait is not overtaken
+                private = is_private(queue.head.path)
+                delay = self.limiter.delay(private)
+                if delay:
+                    self.__condition.wait(min(delay, self.horizon(now) or delay))
+                    continue
+                self.limiter.reserve(private)
+                queue.pop(now).ready.set()
+            for queue in self.__queues.values():
+                queue.expire(None)
+
+    def horizon(self, now: float) -> float:
+        heads = [queue.head for queue in self.__queues.values() if queue.head]
+        deadlines = [ticket.deadline for ticket in heads if ticket.deadline]
+        return max(0.0, min(deadlines) - now) if deadlines else None
+
+    def submit(self, method: str, path: str, data: dict = None) -> Response:
+        name = self.classify(method, path)
+        seconds = self.__deadlines.get(name)
+        deadline = monotonic() + seconds if seconds else None
+        ticket = Ticket(method, path, data, CLASSES.index(name), deadline)
+        self.start()
+        with self.__condition:
+            self.__queues[name].push(ticket)
+            self.__condition.notify()
+        ticket.ready.wait()
+        if ticket.wait is None:
+            raise TimeoutError(
+                f"{method} {path} was not dispatched from the {name} queue"
+            )
+        return self.messenger.request(method, path, data, ticket.wait)
+
+    def snapshot(self) -> dict:
+        with self.__condition:
+            return {name: queue.snapshot() for name, queue in self.__queues.items()}
+
+    def decode(self, response: Response) -> object:
+        return self.messenger.decode(response)
+
+    def request(self, method: str, path: str, data: dict = None) -> Response:
+        return self.submit(method, path, data)
+
+    def get(self, path: str, data: dict = None) -> Response:
+        cache = self.messenger.cache
+        ttl = cache.ttl(path) if cache is not None else 0
+        if not ttl:
+            return self.submit("GET", path, data)
+        return cache.fetch(
+            cache.key(path, data, self.api.key),
+            lambda: self.submit("GET", path, data),
+            ttl,
+            lambda response: 200 == response.status_code,
+        )
+
+    def post(self, path: str, data: dict = None) -> Response:
+        return self.submit("POST", path, data)
+
+    def put(self, path: str, data: dict = None) -> Response:
+        return self.submit("PUT", path, data)
+
+    def delete(self, path: str, data: dict = None) -> Response:
+        return self.submit("DELETE", path, data)
+
+    def page(self, path: str, data: dict = None) -> list:
+        return collect(self, path, data)
+
+    def paginate(
+        self,
+        path: str,
+        data: dict = None,
+        cursor: str = "after",
+        items: int = None,
+        seconds: float = None,
+        model: type = None,
+    ) -> Pager:
+        return Pager(self, path, data, cursor, items, seconds, model)
+
+    def close(self):
+        self.stop()
+        self.messenger.close()
@@ -0,0 +1,1044 @@
+# coinbase-pro - A Python API Adapter for Coinbase Pro and Coinbase Exchange
+# Copyright (C) 2021 teleprint.me
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import base64
+import hashlib
+import hmac
+import json
+import random
+import re
+import threading
+from argparse import ArgumentParser
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timezone
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import count
+from time import sleep, time
+from urllib.parse import parse_qsl, urlsplit
+from uuid import uuid4
+
+from coinbase_pro.limiter import (
+    PRIVATE_BURST,
+    PRIVATE_RATE,
+    PUBLIC_BURST,
+    PUBLIC_RATE,
+    Bucket,
+)
+
+# NOTE: A local stand-in for the REST API; state lives in memory and is lost
+# when the process exits. It is meant for tests and benchmarks, not for
+# simulating a realistic market.
+PRODUCTS: dict = {
+    "BTC-USD": {"price": "40000.00", "quote_increment": "0.01", "size": "0.5"},
+    "ETH-USD": {"price": "3000.00", "quote_increment": "0.01", "size": "5"},
+    "ETH-BTC": {"price": "0.07500", "quote_increment": "0.00001", "size": "5"},
+}
+BALANCES: dict = {"USD": "1000000", "BTC": "100", "ETH": "1000"}
+LEVELS: int = 20
+SPREAD: Decimal = Decimal("0.0005")
+MAKER_FEE: Decimal = Decimal("0.004")
+TAKER_FEE: Decimal = Decimal("0.006")
+LIMIT: int = 100
+MAXIMUM: int = 1000
+CANDLES: int = 300
+GRANULARITIES: tuple = (60, 300, 900, 3600, 21600, 86400)
+WINDOW: float = 30.0
+PRIVATE: tuple = ("/accounts", "/orders", "/fills", "/fees")
+
+
+class Reject(Exception):
+    def __init__(self, status: int, message: str, headers: dict = None):
+        super().__init__(message)
+        self.status: int = status
+        self.message: str = message
+        self.headers: dict = headers if headers else dict()
+
+
+def number(value: Decimal, places: int = 8) -> str:
+    return f"{value:.{places}f}"
+
+
+def isoformat(seconds: float) -> str:
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat()
+
+
+def timestamp(value: str) -> int:
+    try:
+        return int(float(value))
+    except ValueError:
+        value = value.replace("Z", "+00:00")
+        return int(datetime.fromisoformat(value).timestamp())
+
+
+def page(records: list, query: dict) -> tuple:
+    # NOTE: Records are (cursor, payload) pairs sorted oldest first; pages are
+    # returned newest first with CB-BEFORE and CB-AFTER set to their bounds
+    limit = min(int(query.get("limit", LIMIT)), MAXIMUM)
+    cursors = [cursor for cursor, _ in records]
+    if "before" in query:
+        lower = bisect_right(cursors, int(query["before"]))
+        upper = lower + limit
+    else:
+        upper = len(records)
+        if "after" in query:
+            upper = bisect_left(cursors, int(query["after"]))
+        lower = max(0, upper - limit)
+    chunk = records[lower:upper][::-1]
+    headers = dict()
+    if chunk:
+        headers["CB-BEFORE"] = str(chunk[0][0])
+        headers["CB-AFTER"] = str(chunk[-1][0])
+    return [payload for _, payload in chunk], headers
+
+
+class Book(object):
+    def __init__(self, product_id: str, places: int = 8):
+        self.product_id: str = product_id
+        self.places: int = places
+        self.bids: list = list()
+        self.asks: list = list()
+        self.sequence: int = 0
+
+    def __repr__(self) -> str:
+        return f"Book(product_id={self.product_id}, sequence={self.sequence})"
+
+    def side(self, side: str) -> list:
+        return self.bids if "buy" == side else self.asks
+
+    def add(self, order: dict):
+        # NOTE: Bids sort on negated price so both sides are best first
+        price = order["price"]
+        key = -price if "buy" == order["side"] else price
+        insort(self.side(order["side"]), (key, order["sequence"], order))
+        self.sequence += 1
+
+    def remove(self, order: dict):
+        levels = self.side(order["side"])
+        for index, (_, _, resting) in enumerate(levels):
+            if resting is order:
+                del levels[index]
+                self.sequence += 1
+                return
+
+    def levels(self, side: str, level: int) -> list:
+        rows = list()
+        for _, _, order in self.side(side):
+            remaining = order["size"] - order["filled_size"]
+            if 3 == level:
+                price = number(order["price"], self.places)
+                rows.append([price, number(remaining), order["id"]])
+            elif rows and rows[-1][0] == order["price"]:
+                rows[-1][1] += remaining
+                rows[-1][2] += 1
+            else:
+                rows.append([order["price"], remaining, 1])
+            if 1 == level and rows:
+                break
+        if 3 != level:
+            rows = [[number(p, self.places), number(s), n] for p, s, n in rows]
+        return rows
+
+    def snapshot(self, level: int) -> dict:
+        return {
+            "sequence": self.sequence,
+            "bids": self.levels("buy", level),
+            "asks": self.levels("sell", level),
+        }
+
+
+class Profile(object):
+    def __init__(self, key: str, secret: str, passphrase: str, balances: dict):
+        self.key: str = key
+        self.secret: bytes = base64.b64decode(secret)
+        self.passphrase: str = passphrase
+        self.id: str = str(uuid4())
+        self.accounts: dict = {
+            currency: {
+                "id": str(uuid4()),
+                "currency": currency,
+                "balance": Decimal(balance),
+                "ledger": list(),
+            }
+            for currency, balance in balances.items()
+        }
+        self.orders: list = list()
+        self.fills: list = list()
+        self.bucket: Bucket = Bucket(PRIVATE_RATE, PRIVATE_BURST)
+
+    def __repr__(self) -> str:
+        return f"Profile(key={self.key}, id={self.id})"
+
+
+class Exchange(object):
+    def __init__(
+        self,
+        products: dict = None,
+        balances: dict = None,
+        limits: bool = False,
+        latency: float = 0.0,
+        skew: float = 0.0,
+    ):
+        self.__products: dict = products if products else PRODUCTS
+        self.__balances: dict = balances if balances else BALANCES
+        self.__limits: bool = limits
+        self.__latency: float = latency
+        self.__skew: float = skew
+        self.__lock: threading.RLock = threading.RLock()
+        self.__sequence = count(1)
+        self.__profiles: dict = dict()
+        self.__buckets: dict = dict()
+        self.__books: dict = {
+            product_id: Book(product_id, self.places(product_id))
+            for product_id in self.__products
+        }
+        self.__orders: dict = dict()
+        self.__trades: dict = {product_id: list() for product_id in self.__products}
+        self.requests: int = 0
+        self.statuses: dict = dict()
+        self.faults: int = 0
+        for product_id in self.__products:
+            self.seed(product_id)
+
+    def __repr__(self) -> str:
+        return f"Exchange(products={list(self.__products)})"
+
+    def __iter__(self):
+        return iter(self.__products)
+
+    @property
+    def latency(self) -> float:
+        return self.__latency
+
+    @property
+    def profiles(self) -> dict:
+        return self.__profiles
+
+    def time(self) -> float:
+        return time() + self.__skew
+
+    def register(
+        self, key: str = None, secret: str = None, passphrase: str = None
+    ) -> dict:
+        key = key if key else uuid4().hex
+        secret = secret if secret else base64.b64encode(uuid4().bytes * 4).decode()
+        passphrase = passphrase if passphrase else uuid4().hex[:12]
+        with self.__lock:
+            self.__profiles[key] = Profile(key, secret, passphrase, self.__balances)
+        return {"key": key, "secret": secret, "passphrase": passphrase}
+
+    def places(self, product_id: str) -> int:
+        return -Decimal(self.__products[product_id]["quote_increment"]).as_tuple()[2]
+
+    def step(self, product_id: str) -> Decimal:
+        spec = self.__products[product_id]
+        tick = Decimal(spec["quote_increment"])
+        return max(tick, (Decimal(spec["price"]) * SPREAD).quantize(tick))
+
+    def seed(self, product_id: str):
+        # NOTE: Resting liquidity owned by no profile; it is replaced once taken
+        spec = self.__products[product_id]
+        price = Decimal(spec["price"])
+        step = self.step(product_id)
+        for level in range(1, LEVELS + 1):
+            offset = step * level
+            for side, value in (("buy", price - offset), ("sell", price + offset)):
+                self.rest(product_id, side, value, Decimal(spec["size"]))
+
+    def replenish(self, maker: dict):
+        # NOTE: Taken liquidity reappears behind the far end of its side so the
+        # book moves with the trades and never crosses
+        levels = self.__books[maker["product_id"]].side(maker["side"])
+        price = levels[-1][2]["price"] if levels else maker["price"]
+        step = self.step(maker["product_id"])
+        price = price - step if "buy" == maker["side"] else price + step
+        if price > 0:
+            self.rest(maker["product_id"], maker["side"], price, maker["size"])
+
+    def rest(self, product_id: str, side: str, price: Decimal, size: Decimal) -> dict:
+        order = self.order(None, product_id, side, "limit", price, size)
+        order["status"] = "open"
+        self.__books[product_id].add(order)
+        return order
+
+    def order(
+        self,
+        profile: Profile,
+        product_id: str,
+        side: str,
+        kind: str,
+        price: Decimal = None,
+        size: Decimal = None,
+        funds: Decimal = None,
+    ) -> dict:
+        order = {
+            "id": str(uuid4()),
+            "sequence": next(self.__sequence),
+            "profile": profile,
+            "client_oid": None,
+            "product_id": product_id,
+            "side": side,
+            "type": kind,
+            "price": price,
+            "size": size,
+            "funds": funds,
+            "time_in_force": "GTC",
+            "post_only": False,
+            "created_at": isoformat(self.time()),
+            "done_at": None,
+            "done_reason": None,
+            "status": "pending",
+            "filled_size": Decimal(0),
+            "executed_value": Decimal(0),
+            "fill_fees": Decimal(0),
+        }
+        self.__orders[order["id"]] = order
+        return order
+
+    def render(self, order: dict) -> dict:
+        places = self.places(order["product_id"])
+        payload = {
+            "id": order["id"],
+            "client_oid": order["client_oid"] or "",
+            "product_id": order["product_id"],
+            "profile_id": order["profile"].id,
+            "side": order["side"],
+            "type": order["type"],
+            "time_in_force": order["time_in_force"],
+            "post_only": order["post_only"],
+            "created_at": order["created_at"],
+            "fill_fees": number(order["fill_fees"], 16),
+            "filled_size": number(order["filled_size"]),
+            "executed_value": number(order["executed_value"], 16),
+            "status": order["status"],
+            "settled": "done" == order["status"],
+        }
+        if order["price"] is not None:
+            payload["price"] = number(order["price"], places)
+        if order["size"] is not None:
+            payload["size"] = number(order["size"])
+        if order["funds"] is not None:
+            payload["funds"] = number(order["funds"], 16)
+        if order["done_at"]:
+            payload["done_at"] = order["done_at"]
+            payload["done_reason"] = order["done_reason"]
+        return payload
+
+    def limit(self, request: "Request") -> None:
+        if not self.__limits:
+            return
+        if request.profile is not None:
+            bucket = request.profile.bucket
+        else:
+            host = request.host
+            if host not in self.__buckets:
+                self.__buckets[host] = Bucket(PUBLIC_RATE, PUBLIC_BURST)
+            bucket = self.__buckets[host]
+        with self.__lock:
+            delay = bucket.delay()
+            if delay:
+                # NOTE: Fractional seconds keep retries in tests fast
+                headers = {"Retry-After": f"{delay:.3f}"}
+                raise Reject(429, "Rate limit exceeded", headers)
+            bucket.reserve()
+
+    def fault(self) -> None:
+        # NOTE: Fails the next `faults` requests to exercise client retries
+        with self.__lock:
+            if self.faults <= 0:
+                return
+            self.faults -= 1
+        raise Reject(503, "Service Unavailable")
+
+    def authenticate(self, request: "Request") -> None:
+        # NOTE: Public endpoints ignore credentials, like the exchange does
+        if not request.path.startswith(PRIVATE):
+            return
+        headers = request.headers
+        key = headers.get("CB-ACCESS-KEY")
+        profile = self.__profiles.get(key)
+        if profile is None:
+            raise Reject(401, "Invalid API Key")
+        if headers.get("CB-ACCESS-PASSPHRASE") != profile.passphrase:
+            raise Reject(401, "Invalid Passphrase")
+        stamp = headers.get("CB-ACCESS-TIMESTAMP", "0")
+        try:
+            if abs(self.time() - float(stamp)) > WINDOW:
+                raise Reject(400, "request timestamp expired")
+        except ValueError:
+            raise Reject(400, "invalid timestamp")
+        message = f"{stamp}{request.method}{request.target}{request.body}"
+        digest = hmac.new(profile.secret, message.encode("utf-8"), hashlib.sha256)
+        signature = base64.b64encode(digest.digest()).decode("utf-8")
+        if not hmac.compare_digest(signature, headers.get("CB-ACCESS-SIGN", "")):
+            raise Reject(401, "invalid signature")
+        request.profile = profile
+
+    def product(self, product_id: str) -> dict:
+        if product_id not in self.__products:
+            raise Reject(404, "NotFound")
+        return self.__products[product_id]
+
+    def products(self, request: "Request") -> list:
+        return [self.describe(product_id) for product_id in self]
+
+    def describe(self, product_id: str) -> dict:
+        spec = self.product(product_id)
+        base, quote = product_id.split("-")
+        return {
+            "id": product_id,
+            "base_currency": base,
+            "quote_currency": quote,
+            "quote_increment": spec["quote_increment"],
+            "base_increment": "0.00000001",
+            "display_name": f"{base}/{quote}",
+            "min_market_funds": "1",
+            "margin_enabled": False,
+            "post_only": False,
+            "limit_only": False,
+            "cancel_only": False,
+            "trading_disabled": False,
+            "status": "online",
+            "status_message": "",
+        }
+
+    def get_product(self, request: "Request", product_id: str) -> dict:
+        return self.describe(product_id)
+
+    def currencies(self, request: "Request") -> list:
+        currencies = sorted({c for p in self for c in p.split("-")})
+        return [{"id": c, "name": c, "min_size": "0.00000001"} for c in currencies]
+
+    def book(self, request: "Request", product_id: str) -> dict:
+        self.product(product_id)
+        level = int(request.query.get("level", 1))
+        if level not in (1, 2, 3):
+            raise Reject(400, "Invalid level")
+        with self.__lock:
+            return self.__books[product_id].snapshot(level)
+
+    def ticker(self, request: "Request", product_id: str) -> dict:
+        self.product(product_id)
+        with self.__lock:
+            book = self.__books[product_id]
+            trades = self.__trades[product_id]
+            bid = book.levels("buy", 1)
+            ask = book.levels("sell", 1)
+            last = trades[-1][1] if trades else None
+            volume = sum(Decimal(trade["size"]) for _, trade in trades)
+        return {
+            "trade_id": last["trade_id"] if last else 0,
+            "price": last["price"] if last else self.__products[product_id]["price"],
+            "size": last["size"] if last else number(Decimal(0)),
+            "time": last["time"] if last else isoformat(self.time()),
+            "bid": bid[0][0] if bid else "0",
+            "ask": ask[0][0] if ask else "0",
+            "volume": number(volume),
+        }
+
+    def stats(self, request: "Request", product_id: str) -> dict:
+        spec = self.product(product_id)
+        with self.__lock:
+            prices = [Decimal(t["price"]) for _, t in self.__trades[product_id]]
+            volume = sum(Decimal(t["size"]) for _, t in self.__trades[product_id])
+        prices = prices if prices else [Decimal(spec["price"])]
+        return {
+            "open": str(prices[0]),
+            "high": str(max(prices)),
+            "low": str(min(prices)),
+            "last": str(prices[-1]),
+            "volume": number(volume),
+            "volume_30day": number(volume),
+        }
+
+    def trades(self, request: "Request", product_id: str) -> tuple:
+        self.product(product_id)
+        with self.__lock:
+            records = list(self.__trades[product_id])
+        return page(records, request.query)
+
+    def candles(self, request: "Request", product_id: str) -> list:
+        spec = self.product(product_id)
+        granularity = int(request.query.get("granularity", 60))
+        if granularity not in GRANULARITIES:
+            raise Reject(400, "Unsupported granularity")
+        now = int(self.time()) // granularity * granularity
+        end = timestamp(request.query["end"]) if "end" in request.query else now
+        start = request.query.get("start")
+        start = timestamp(start) if start else end - granularity * (CANDLES - 1)
+        start = start - start % granularity
+        end = min(end - end % granularity, now)
+        if (end - start) // granularity + 1 > CANDLES:
+            raise Reject(400, "granularity too small for the requested time range")
+        # NOTE: Candles are synthetic and deterministic for a product and time
+        price = float(spec["price"])
+        rows = list()
+        for bucket in range(end, start - 1, -granularity):
+            rng = random.Random(f"{product_id}:{granularity}:{bucket}")
+            drift = 1 + (rng.random() - 0.5) * 0.01
+            open_, close = price * drift, price * drift * (
+                1 + (rng.random() - 0.5) * 0.002
+            )
+            low = min(open_, close) * (1 - rng.random() * 0.001)
+            high = max(open_, close) * (1 + rng.random() * 0.001)
+            rows.append([bucket, low, high, open_, close, rng.random() * 10])
+        return rows
+
+    def now(self, request: "Request") -> dict:
+        now = self.time()
+        return {"iso": isoformat(now), "epoch": now}
+
+    def accounts(self, request: "Request") -> list:
+        profile = request.profile
+        with self.__lock:
+            return [self.account(profile, a) for a in profile.accounts.values()]
+
+    def account(self, profile: Profile, account: dict) -> dict:
+        hold = self.hold(profile, account["currency"])
+        return {
+            "id": account["id"],
+            "currency": account["currency"],
+            "balance": number(account["balance"], 16),
+            "hold": number(hold, 16),
+            "available": number(account["balance"] - hold, 16),
+            "profile_id": profile.id,
+            "trading_enabled": True,
+        }
+
+    def find(self, profile: Profile, account_id: str) -> dict:
+        for account in profile.accounts.values():
+            if account["id"] == account_id:
+                return account
+        raise Reject(404, "NotFound")
+
+    def get_account(self, request: "Request", account_id: str) -> dict:
+        with self.__lock:
+            account = self.find(request.profile, account_id)
+            return self.account(request.profile, account)
+
+    def ledger(self, request: "Request", account_id: str) -> tuple:
+        with self.__lock:
+            records = list(self.find(request.profile, account_id)["ledger"])
+        return page(records, request.query)
+
+    def holds(self, request: "Request", account_id: str) -> tuple:
+        with self.__lock:
+            account = self.find(request.profile, account_id)
+            records = [
+                (order["sequence"], self.held(order, account["currency"]))
+                for order in request.profile.orders
+                if "open" == order["status"]
+            ]
+        records = [(c, h) for c, h in records if h is not None]
+        return page(records, request.query)
+
+    def held(self, order: dict, currency: str) -> dict:
+        base, quote = order["product_id"].split("-")
+        remaining = order["size"] - order["filled_size"]
+        if "buy" == order["side"] and currency == quote:
+            amount = remaining * order["price"] * (1 + TAKER_FEE)
+        elif "sell" == order["side"] and currency == base:
+            amount = remaining
+        else:
+            return None
+        return {
+            "id": order["id"],
+            "created_at": order["created_at"],
+            "amount": number(amount, 16),
+            "type": "order",
+            "ref": order["id"],
+        }
+
+    def hold(self, profile: Profile, currency: str) -> Decimal:
+        total = Decimal(0)
+        for order in profile.orders:
+            if "open" == order["status"]:
+                held = self.held(order, currency)
+                total += Decimal(held["amount"]) if held else 0
+        return total
+
+    def available(self, profile: Profile, currency: str) -> Decimal:
+        return profile.accounts[currency]["balance"] - self.hold(profile, currency)
+
+    def fees(self, request: "Request") -> dict:
+        return {
+            "maker_fee_rate": str(MAKER_FEE),
+            "taker_fee_rate": str(TAKER_FEE),
+            "usd_volume": "0",
+        }
+
+    def post_order(self, request: "Request") -> dict:
+        data = request.json()
+        profile = request.profile
+        product_id = data.get("product_id")
+        self.product(product_id)
+        side = data.get("side")
+        kind = data.get("type", "limit")
+        if side not in ("buy", "sell"):
+            raise Reject(400, "side is not valid")
+        if kind not in ("limit", "market"):
+            raise Reject(400, "type is not valid")
+        try:
+            price = Decimal(str(data["price"])) if "price" in data else None
+            size = Decimal(str(data["size"])) if "size" in data else None
+            funds = Decimal(str(data["funds"])) if "funds" in data else None
+        except ArithmeticError:
+            raise Reject(400, "Invalid number")
+        if "limit" == kind and (price is None or size is None):
+            raise Reject(400, "price and size are required for limit orders")
+        if "market" == kind and size is None and funds is None:
+            raise Reject(400, "size or funds is required for market orders")
+        for value in (price, size, funds):
+            if value is not None and value <= 0:
+                raise Reject(400, "Invalid number")
+        with self.__lock:
+            oid = data.get("client_oid")
+            if oid and any(o["client_oid"] == oid for o in profile.orders):
+                raise Reject(400, "client_oid is already in use")
+            self.afford(profile, product_id, side, kind, price, size, funds)
+            order = self.order(profile, product_id, side, kind, price, size, funds)
+            order["client_oid"] = oid
+            order["time_in_force"] = data.get("time_in_force", "GTC")
+            order["post_only"] = bool(data.get("post_only", False))
+            profile.orders.append(order)
+            self.match(order)
+            return self.render(order)
+
+    def afford(
+        self,
+        profile: Profile,
+        product_id: str,
+        side: str,
+        kind: str,
+        price: Decimal,
+        size: Decimal,
+        funds: Decimal,
+    ):
+        base, quote = product_id.split("-")
+        if "sell" == side:
+            needed, currency = size, base
+        elif funds is not None:
+            needed, currency = funds, quote
+        elif price is not None:
+            needed, currency = size * price * (1 + TAKER_FEE), quote
+        else:
+            ask = self.__books[product_id].levels("sell", 1)
+            needed = size * Decimal(ask[0][0]) if ask else Decimal(0)
+            currency = quote
+        if needed is None or needed > self.available(profile, currency):
+            raise Reject(400, "Insufficient funds")
+
+    def crosses(self, order: dict, resting: dict) -> bool:
+        if order["price"] is None:
+            return True
+        if "buy" == order["side"]:
+            return order["price"] >= resting["price"]
+        return order["price"] <= resting["price"]
+
+    def match(self, order: dict):
+        book = self.__books[order["product_id"]]
+        opposite = book.side("sell" if "buy" == order["side"] else "buy")
+        crossing = bool(opposite) and self.crosses(order, opposite[0][2])
+        if order["post_only"] and crossing:
+            order["status"] = "rejected"
+            order["done_reason"] = "post only"
+            return
+        if "FOK" == order["time_in_force"] and not self.fills_fully(order):
+            self.finish(order, "canceled")
+            return
+        taken = list()
+        while opposite and not self.complete(order):
+            resting = opposite[0][2]
+            if not self.crosses(order, resting):
+                break
+            size = self.quantity(order, resting)
+            if size <= 0:
+                break
+            self.trade(order, resting, size)
+            if resting["filled_size"] >= resting["size"]:
+                del opposite[0]
+                book.sequence += 1
+                self.finish(resting, "filled")
+                taken.append(resting)
+        if self.complete(order):
+            self.finish(order, "filled")
+        elif "market" == order["type"] or order["time_in_force"] in ("IOC", "FOK"):
+            self.finish(order, "filled" if order["filled_size"] else "canceled")
+        else:
+            order["status"] = "open"
+            book.add(order)
+        for resting in taken:
+            if resting["profile"] is None:
+                self.replenish(resting)
+
+    def fills_fully(self, order: dict) -> bool:
+        book = self.__books[order["product_id"]]
+        opposite = book.side("sell" if "buy" == order["side"] else "buy")
+        available = Decimal(0)
+        for _, _, resting in opposite:
+            if not self.crosses(order, resting):
+                break
+            available += resting["size"] - resting["filled_size"]
+        return available >= order["size"]
+
+    def complete(self, order: dict) -> bool:
+        if order["size"] is not None:
+            return order["filled_size"] >= order["size"]
+        return order["executed_value"] >= order["funds"]
+
+    def quantity(self, order: dict, resting: dict) -> Decimal:
+        size = resting["size"] - resting["filled_size"]
+        if order["size"] is not None:
+            return min(size, order["size"] - order["filled_size"])
+        funds = order["funds"] - order["executed_value"]
+        return min(size, (funds / resting["price"]).quantize(Decimal("1e-8")))
+
+    def trade(self, taker: dict, maker: dict, size: Decimal):
+        product_id = taker["product_id"]
+        price = maker["price"]
+        trades = self.__trades[product_id]
+        trade_id = trades[-1][0] + 1 if trades else 1
+        now = isoformat(self.time())
+        trade = {
+            "time": now,
+            "trade_id": trade_id,
+            "price": number(price, self.places(product_id)),
+            "size": number(size),
+            "side": maker["side"],
+        }
+        trades.append((trade_id, trade))
+        for order, liquidity, rate in (
+            (taker, "T", TAKER_FEE),
+            (maker, "M", MAKER_FEE),
+        ):
+            value = price * size
+            fee = value * rate
+            order["filled_size"] += size
+            order["executed_value"] += value
+            order["fill_fees"] += fee
+            if order["profile"] is not None:
+                self.settle(order, trade_id, price, size, fee, liquidity, now)
+
+    def settle(
+        self,
+        order: dict,
+        trade_id: int,
+        price: Decimal,
+        size: Decimal,
+        fee: Decimal,
+        liquidity: str,
+        now: str,
+    ):
+        profile = order["profile"]
+        product_id = order["product_id"]
+        base, quote = product_id.split("-")
+        value = price * size
+        fill = {
+            "created_at": now,
+            "trade_id": trade_id,
+            "product_id": product_id,
+            "order_id": order["id"],
+            "profile_id": profile.id,
+            "liquidity": liquidity,
+            "price": number(price, self.places(product_id)),
+            "size": number(size),
+            "fee": number(fee, 16),
+            "side": order["side"],
+            "settled": True,
+            "usd_volume": number(value, 16) if "USD" == quote else "0",
+        }
+        profile.fills.append((next(self.__sequence), fill))
+        sign = 1 if "buy" == order["side"] else -1
+        details = {"order_id": order["id"], "trade_id": str(trade_id)}
+        details["product_id"] = product_id
+        for currency, amount, kind in (
+            (base, sign * size, "match"),
+            (quote, -sign * value, "match"),
+            (quote, -fee, "fee"),
+        ):
+            account = profile.accounts.get(currency)
+            if account is None:
+                continue
+            account["balance"] += amount
+            entry = {
+                "id": str(next(self.__sequence)),
+                "created_at": now,
+                "amount": number(amount, 16),
+                "balance": number(account["balance"], 16),
+                "type": kind,
+                "details": details,
+            }
+            account["ledger"].append((int(entry["id"]), entry))
+
+    def finish(self, order: dict, reason: str):
+        order["status"] = "done"
+        order["done_reason"] = reason
+        order["done_at"] = isoformat(self.time())
+        if order["profile"] is None:
+            self.__orders.pop(order["id"], None)
+        # NOTE: Canceled orders without fills are forgotten like the real API
+        elif "canceled" == reason and not order["filled_size"]:
+            self.__orders.pop(order["id"], None)
+            order["profile"].orders.remove(order)
+
+    def owned(self, request: "Request", order_id: str) -> dict:
+        if order_id.startswith("client:"):
+            oid = order_id.split(":", 1)[1]
+            for order in request.profile.orders:
+                if order["client_oid"] == oid:
+                    return order
+            raise Reject(404, "NotFound")
+        order = self.__orders.get(order_id)
+        if order is None or order["profile"] is not request.profile:
+            raise Reject(404, "NotFound")
+        return order
+
+    def get_order(self, request: "Request", order_id: str) -> dict:
+        with self.__lock:
+            return self.render(self.owned(request, order_id))
+
+    def orders(self, request: "Request") -> tuple:
+        status = request.query.get("status", "open")
+        status = ("open", "pending", "active") if "all" != status else None
+        product_id = request.query.get("product_id")
+        with self.__lock:
+            records = [
+                (order["sequence"], self.render(order))
+                for order in request.profile.orders
+                if (status is None or order["status"] in status)
+                and (product_id is None or order["product_id"] == product_id)
+            ]
+        return page(records, request.query)
+
+    def cancel(self, request: "Request", order_id: str) -> str:
+        with self.__lock:
+            order = self.owned(request, order_id)
+            if "open" != order["status"]:
+                raise Reject(404, "NotFound")
+            self.__books[order["product_id"]].remove(order)
+            self.finish(order, "canceled")
+            return order["id"]
+
+    def cancel_all(self, request: "Request") -> list:
+        product_id = request.query.get("product_id")
+        if product_id is None and request.body:
+            product_id = request.json().get("product_id")
+        with self.__lock:
+            canceled = list()
+            for order in list(request.profile.orders):
+                if "open" != order["status"]:
+                    continue
+                if product_id is not None and order["product_id"] != product_id:
+                    continue
+                self.__books[order["product_id"]].remove(order)
+                self.finish(order, "canceled")
+                canceled.append(order["id"])
+            return canceled
+
+    def fills(self, request: "Request") -> tuple:
+        product_id = request.query.get("product_id")
+        order_id = request.query.get("order_id")
+        if product_id is None and order_id is None:
+            raise Reject(400, "product_id or order_id is required")
+        with self.__lock:
+            records = [
+                (cursor, fill)
+                for cursor, fill in request.profile.fills
+                if (product_id is None or fill["product_id"] == product_id)
+                and (order_id is None or fill["order_id"] == order_id)
+            ]
+        return page(records, request.query)
+
+
+class Request(object):
+    def __init__(self, method: str, target: str, headers: dict, body: str, host: str):
+        split = urlsplit(target)
+        self.method: str = method
+        self.target: str = target
+        self.path: str = split.path
+        self.query: dict = dict(parse_qsl(split.query))
+        self.headers: dict = headers
+        self.body: str = body
+        self.host: str = host
+        self.profile: Profile = None
+
+    def __repr__(self) -> str:
+        return f"Request(method={self.method}, target={self.target})"
+
+    def json(self) -> dict:
+        try:
+            data = json.loads(self.body) if self.body else dict()
+        except ValueError:
+            raise Reject(400, "Invalid JSON")
+        if not isinstance(data, dict):
+            raise Reject(400, "Invalid JSON")
+        return data
+
+
+ROUTES: list = [
+    ("GET", r"/time", "now"),
+    ("GET", r"/currencies", "currencies"),
+    ("GET", r"/products", "products"),
+    ("GET", r"/products/([^/]+)", "get_product"),
+    ("GET", r"/products/([^/]+)/book", "book"),
+    ("GET", r"/products/([^/]+)/ticker", "ticker"),
+    ("GET", r"/products/([^/]+)/stats", "stats"),
+    ("GET", r"/products/([^/]+)/trades", "trades"),
+    ("GET", r"/products/([^/]+)/candles", "candles"),
+    ("GET", r"/accounts", "accounts"),
+    ("GET", r"/accounts/([^/]+)", "get_account"),
+    ("GET", r"/accounts/([^/]+)/ledger", "ledger"),
+    ("GET", r"/accounts/([^/]+)/holds", "holds"),
+    ("GET", r"/fees", "fees"),
+    ("GET", r"/fills", "fills"),
+    ("GET", r"/orders", "orders"),
+    ("GET", r"/orders/([^/]+)", "get_order"),
+    ("POST", r"/orders", "post_order"),
+    ("DELETE", r"/orders", "cancel_all"),
+    ("DELETE", r"/orders/([^/]+)", "cancel"),
+]
+ROUTES = [(method, re.compile(f"^{path}$"), name) for method, path, name in ROUTES]
+
+
+class Handler(BaseHTTPRequestHandler):
+    # NOTE: HTTP/1.1 keeps connections alive so clients can reuse them, and
+    # Nagle is disabled so headers and body are not held for a delayed ACK
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: "Server"
+
+    def log_message(self, *args):
+        pass
+
+    def dispatch(self):
+        exchange = self.server.exchange
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length).decode("utf-8") if length else ""
+        request = Request(
+            self.command, self.path, self.headers, body, self.client_address[0]
+        )
+        status, payload, headers = 200, None, dict()
+        try:
+            handler, args = self.route(request)
+            exchange.fault()
+            exchange.authenticate(request)
+            exchange.limit(request)
+            if exchange.latency:
+                sleep(exchange.latency)
+            payload = handler(request, *args)
+            if isinstance(payload, tuple):
+                payload, headers = payload
+        except Reject as error:
+            status, payload = error.status, {"message": error.message}
+            headers = error.headers
+        except Exception as error:
+            status, payload = 500, {"message": f"{type(error).__name__}: {error}"}
+        self.respond(status, payload, headers)
+
+    def route(self, request: Request) -> tuple:
+        exchange = self.server.exchange
+        allowed = False
+        for method, pattern, name in ROUTES:
+            matched = pattern.match(request.path)
+            if matched is None:
+                continue
+            allowed = True
+            if method == request.method:
+                return getattr(exchange, name), matched.groups()
+        raise Reject(405 if allowed else 404, "NotFound")
+
+    def respond(self, status: int, payload: object, headers: dict):
+        exchange = self.server.exchange
+        with self.server.lock:
+            exchange.requests += 1
+            exchange.statuses[status] = exchange.statuses.get(status, 0) + 1
+        content = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = do_POST = do_PUT = do_DELETE = dispatch
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self, exchange: Exchange = None, host: str = "127.0.0.1", port: int = 0
+    ):
+        super().__init__((host, port), Handler)
+        self.exchange: Exchange = exchange if exchange else Exchange()
+        self.lock: threading.Lock = threading.Lock()
+        self.thread: threading.Thread = None
+        self.credentials: dict = self.exchange.register()
+
+    def __repr__(self) -> str:
+        return f"Server(url={self.url})"
+
+    def __enter__(self) -> "Server":
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def settings(self) -> dict:
+        return dict(self.credentials, rest=self.url)
+
+    def register(self) -> dict:
+        return dict(self.exchange.register(), rest=self.url)
+
+    def start(self) -> "Server":
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self.thread is not None:
+            self.thread.join()
+
+
+def main():
+    parser = ArgumentParser(description="Run a local fake exchange")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--limits", action="store_true", help="enforce rate limits")
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="seconds per request"
+    )
+    args = parser.parse_args()
+
+    exchange = Exchange(limits=args.limits, latency=args.latency)
+    server = Server(exchange, args.host, args.port)
+    print(json.dumps(server.settings, indent=4))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
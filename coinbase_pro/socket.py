@@ -13,16 +13,27 @@
 #
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
-import base64
-import hashlib
+from __future__ import annotations
+
 import hmac
-import json
 from dataclasses import dataclass, field
-from time import time
+from time import monotonic, sleep, time
+from typing import TYPE_CHECKING
 
-from websocket import WebSocket, create_connection, enableTrace
+from coinbase_pro.abstract import (
+    AbstractClock,
+    AbstractCodec,
+    AbstractRetry,
+    AbstractStream,
+    AbstractToken,
+    AbstractWSS,
+)
+from coinbase_pro.codec import get_codec
+from coinbase_pro.keyed import Keyed
+from coinbase_pro.retry import Retry
 
-from coinbase_pro.abstract import AbstractStream, AbstractToken, AbstractWSS
+if TYPE_CHECKING:
+    from websocket import WebSocket
 
 
 @dataclass
@@ -59,11 +70,13 @@ class WSS(AbstractWSS):
 
 
 class Token(AbstractToken):
-    def __init__(self, wss: WSS = None):
+    def __init__(self, wss: WSS = None, clock: AbstractClock = None):
         self.__wss = wss if wss else WSS()
+        self.__clock: AbstractClock = clock
+        self.__keyed: Keyed = Keyed()
 
     def __call__(self) -> dict:
-        timestamp = str(time())
+        timestamp = str(self.clock.time() if self.clock else time())
         signature = self.signature(timestamp)
         return self.header(timestamp, signature)
 
@@ -71,13 +84,17 @@ class Token(AbstractToken):
     def wss(self) -> WSS:
         return self.__wss
 
+    @property
+    def clock(self) -> AbstractClock:
+        return self.__clock
+
+    @property
+    def mac(self) -> hmac.HMAC:
+        return self.__keyed.mac(self.wss.secret)
+
     def signature(self, timestamp: str) -> bytes:
-        key = base64.b64decode(self.wss.secret)
-        msg = f"{timestamp}GET/users/self/verify".encode("ascii")
-        sig = hmac.new(key, msg, hashlib.sha256)
-        digest = sig.digest()
-        b64signature = base64.b64encode(digest)
-        return b64signature.decode("utf-8")
+        message = f"{timestamp}GET/users/self/verify"
+        return self.__keyed.sign(self.wss.secret, message)
 
     def header(self, timestamp: str, signature: bytes) -> dict:
         return {
@@ -89,9 +106,10 @@ class Token(AbstractToken):
 
 
 class Stream(AbstractStream):
-    def __init__(self, token: Token = None):
+    def __init__(self, token: Token = None, codec: AbstractCodec = None):
         self.__token: Token = token if token else Token()
         self.__wss: WSS = self.__token.wss
+        self.__codec: AbstractCodec = codec if codec else get_codec()
         self.socket: WebSocket = None
 
     @property
@@ -102,6 +120,10 @@ class Stream(AbstractStream):
     def wss(self) -> WSS:
         return self.__wss
 
+    @property
+    def codec(self) -> AbstractCodec:
+        return self.__codec
+
     @property
     def auth(self) -> bool:
         return self.wss.key and self.wss.secret and self.wss.passphrase
@@ -110,23 +132,30 @@ class Stream(AbstractStream):
     def connected(self) -> bool:
         return False if not self.socket else self.socket.connected
 
-    def connect(self, trace: bool = False) -> bool:
+    def connect(self, trace: bool = False, timeout: float = None) -> bool:
+        # NOTE: websocket-client is imported on first connect to keep imports fast
+        from websocket import create_connection, enableTrace
+
         enableTrace(trace)
+        options = {"timeout": timeout} if timeout else {}
         if self.auth:
-            self.socket = create_connection(url=self.wss.url, header=self.token())
-        else:
-            self.socket = create_connection(url=self.wss.url)
+            options["header"] = self.token()
+        self.socket = create_connection(url=self.wss.url, **options)
         return self.connected
 
     def send(self, message: dict) -> None:
         if self.connected:
-            self.socket.send(json.dumps(message))
+            self.socket.send(self.codec.encode(message))
 
     def receive(self) -> dict:
         if self.connected:
             payload = self.socket.recv()
             if payload:
-                return json.loads(payload)
+                message = self.codec.decode(payload)
+                # NOTE: Heartbeats carry the exchange time for clock tracking
+                if self.token.clock and "heartbeat" == message.get("type"):
+                    self.token.clock.heartbeat(message)
+                return message
         return dict()
 
     def disconnect(self) -> bool:
@@ -135,6 +164,193 @@ class Stream(AbstractStream):
         return not self.connected
 
 
+# NOTE: Seconds without a frame before the feed is pinged; a feed that stays
+# silent for another LIVENESS seconds is considered stalled
+LIVENESS: float = 5.0
+RECONNECTS: int = 100
+
+
+class SupervisedStream(Stream):
+    def __init__(
+        self,
+        token: Token = None,
+        codec: AbstractCodec = None,
+        timeout: float = LIVENESS,
+        retry: AbstractRetry = None,
+        heartbeat: bool = True,
+    ):
+        super().__init__(token, codec)
+        self.__timeout: float = timeout
+        self.__retry: AbstractRetry = (
+            retry if retry else Retry(attempts=RECONNECTS, base=0.5, cap=30.0)
+        )
+        self.__heartbeat: bool = heartbeat
+        self.__subscriptions: dict = dict()
+        self.__pinged: bool = False
+        self.__closed: bool = True
+        self.__down: float = None
+        self.seen: float = None
+        self.messages: int = 0
+        self.reconnects: int = 0
+        self.stalls: int = 0
+        self.downtime: float = 0.0
+        self.error: str = None
+
+    @property
+    def timeout(self) -> float:
+        return self.__timeout
+
+    @property
+    def retry(self) -> AbstractRetry:
+        return self.__retry
+
+    @property
+    def subscriptions(self) -> dict:
+        return {channel: sorted(ids) for channel, ids in self.__subscriptions.items()}
+
+    def connect(self, trace: bool = False, timeout: float = None) -> bool:
+        # NOTE: Token is called on every connect, so each attempt is signed anew
+        # and a stalled handshake times out like a stalled feed
+        super().connect(trace, timeout if timeout else self.timeout)
+        self.socket.settimeout(self.timeout)
+        self.__closed = False
+        self.__pinged = False
+        self.seen = monotonic()
+        if self.__subscriptions:
+            self.resubscribe()
+        return self.connected
+
+    def message(self, kind: str, channels: list) -> dict:
+        message = {"type": kind, "channels": channels}
+        # NOTE: The feed authenticates the subscription, not the connection
+        if self.auth:
+            message.update(self.token())
+        return message
+
+    def track(self, message: dict) -> None:
+        kind = message.get("type")
+        if kind not in ("subscribe", "unsubscribe"):
+            return
+        for channel in message.get("channels", []):
+            if isinstance(channel, dict):
+                name, ids = channel["name"], channel.get("product_ids", [])
+            else:
+                name, ids = channel, message.get("product_ids", [])
+            current = self.__subscriptions.setdefault(name, set())
+            if "subscribe" == kind:
+                current.update(ids)
+            else:
+                current.difference_update(ids)
+                if not current:
+                    del self.__subscriptions[name]
+
+    def send(self, message: dict) -> None:
+        self.track(message)
+        super().send(message)
+
+    def subscribe(self, product_ids: list, channels: list) -> None:
+        if self.__heartbeat and "heartbeat" not in channels:
+            channels = list(channels) + ["heartbeat"]
+        channels = [{"name": c, "product_ids": list(product_ids)} for c in channels]
+        self.send(self.message("subscribe", channels))
+
+    def unsubscribe(self, product_ids: list, channels: list) -> None:
+        channels = [{"name": c, "product_ids": list(product_ids)} for c in channels]
+        self.send(self.message("unsubscribe", channels))
+
+    def resubscribe(self) -> None:
+        channels = [
+            {"name": name, "product_ids": ids}
+            for name, ids in self.subscriptions.items()
+            if ids
+        ]
+        super().send(self.message("subscribe", channels))
+
+    def receive(self) -> dict:
+        from websocket import ABNF, WebSocketTimeoutException
+
+        while not self.__closed:
+            if not self.connected:
+                self.reconnect()
+                continue
+            try:
+                opcode, payload = self.socket.recv_data(control_frame=True)
+            except WebSocketTimeoutException:
+                # NOTE: A silent feed is pinged once before it is dropped
+                if self.__pinged:
+                    self.stalls += 1
+                    self.fail("stalled")
+                else:
+                    self.__pinged = True
+                    try:
+                        self.socket.ping()
+                    except Exception as error:
+                        self.fail(type(error).__name__)
+                continue
+            except Exception as error:
+                self.fail(type(error).__name__)
+                continue
+            self.__pinged = False
+            self.seen = monotonic()
+            if opcode in (ABNF.OPCODE_PING, ABNF.OPCODE_PONG):
+                continue
+            if opcode == ABNF.OPCODE_CLOSE or not payload:
+                self.fail("closed")
+                continue
+            message = self.codec.decode(payload)
+            self.messages += 1
+            # NOTE: Heartbeats carry the exchange time for clock tracking
+            if self.token.clock and "heartbeat" == message.get("type"):
+                self.token.clock.heartbeat(message)
+            return message
+        return dict()
+
+    def fail(self, error: str) -> None:
+        self.error = error
+        if self.__down is None:
+            self.__down = monotonic()
+        # NOTE: A dead peer never answers a close frame, so the socket is shut
+        if self.socket is not None:
+            self.socket.shutdown()
+
+    def reconnect(self) -> bool:
+        attempt = 0
+        while not self.__closed:
+            if attempt:
+                sleep(self.retry.backoff(attempt - 1))
+            try:
+                self.connect()
+            except Exception as error:
+                self.error = type(error).__name__
+                if not self.retry.retryable("GET", None, attempt):
+                    self.__closed = True
+                    raise
+                attempt += 1
+                continue
+            self.reconnects += 1
+            if self.__down is not None:
+                self.downtime += monotonic() - self.__down
+                self.__down = None
+            return True
+        return False
+
+    def disconnect(self) -> bool:
+        self.__closed = True
+        return super().disconnect()
+
+    def stats(self) -> dict:
+        down = monotonic() - self.__down if self.__down is not None else 0.0
+        return {
+            "connected": self.connected,
+            "messages": self.messages,
+            "reconnects": self.reconnects,
+            "stalls": self.stalls,
+            "downtime": self.downtime + down,
+            "error": self.error,
+            "idle": monotonic() - self.seen if self.seen else None,
+        }
+
+
 def get_message() -> dict:
     return {"type": "subscribe", "product_ids": ["BTC-USD"], "channels": ["ticker"]}
 
@@ -1,10 +1,26 @@
+import base64
+import hashlib
+import hmac
 import json
 import os
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
 
 import pytest
 from coinbase_pro.client import CoinbasePro
 from coinbase_pro.messenger import API, Auth, Messenger
+from coinbase_pro.server import Server
 from coinbase_pro.socket import WSS, Stream, Token
+from requests import Response
+
+
+def reference(secret: str, message: str) -> str:
+    # NOTE: Signs from scratch on every call, as the exchange documents it
+    key = base64.b64decode(secret)
+    sig = hmac.new(key, message.encode("ascii"), hashlib.sha256)
+    return base64.b64encode(sig.digest()).decode("utf-8")
 
 
 def pytest_addoption(parser):
@@ -104,3 +120,88 @@ def conversion_id(private_client: CoinbasePro) -> str:
     data = {"from": "USD", "to": "USDC", "amount": 10.0}
     conversion = private_client.convert.post(data)
     return conversion["id"]
+
+
+class Echo(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def reply(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length).decode("utf-8") if length else ""
+        split = urlsplit(self.path)
+        payload = {
+            "method": self.command,
+            "path": self.path,
+            "body": body,
+            "headers": dict(self.headers),
+        }
+        headers = {}
+        if split.path == "/pages":
+            after = int(parse_qs(split.query).get("after", ["0"])[0])
+            payload = [{"id": after + 1}] if after < 3 else []
+            headers["CB-AFTER"] = str(after + 1)
+        content = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = do_POST = do_PUT = do_DELETE = reply
+
+
+@pytest.fixture(scope="module")
+def echo() -> str:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Echo)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(scope="module")
+def echo_auth(echo: str) -> Auth:
+    secret = base64.b64encode(b"secret").decode("utf-8")
+    settings = {"key": "key", "secret": secret, "passphrase": "pass", "rest": echo}
+    return Auth(API(settings))
+
+
+@pytest.fixture(scope="module")
+def server() -> Server:
+    server = Server().start()
+    yield server
+    server.stop()
+
+
+class Candles(object):
+    # NOTE: Serves /candles newest first, failing the windows that start at
+    # a time in fail
+    def __init__(self, fail: set = None):
+        self.fail = fail if fail else set()
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def decode(self, response: Response) -> object:
+        return response.json()
+
+    def get(self, path: str, data: dict = None) -> Response:
+        start = int(datetime.fromisoformat(data["start"]).timestamp())
+        end = int(datetime.fromisoformat(data["end"]).timestamp())
+        granularity = data["granularity"]
+        with self.lock:
+            self.calls.append(start)
+        response = Response()
+        if start in self.fail:
+            response.status_code = 500
+            response._content = b'{"message": "Internal Server Error"}'
+            return response
+        # NOTE: Newest first with one overlapping candle to exercise dedup
+        times = range(end, start - granularity - 1, -granularity)
+        rows = [[t, 1.0, 2.0, 1.5, 1.75, float(t % 7)] for t in times]
+        response.status_code = 200
+        response._content = json.dumps(rows).encode("utf-8")
+        return response
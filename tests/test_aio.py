@@ -0,0 +1,263 @@
+import asyncio
+import binascii
+import json
+
+import pytest
+
+web = pytest.importorskip("aiohttp.web")
+
+from coinbase_pro.abstract import AbstractClient, AbstractMessenger, AbstractStream
+from coinbase_pro.aio.client import AsyncCoinbasePro, Product, get_client
+from coinbase_pro.aio.messenger import (
+    AsyncMessenger,
+    AsyncPager,
+    AsyncSubscriber,
+    Reply,
+)
+from coinbase_pro.aio.socket import AsyncStream
+from coinbase_pro.cache import Cache
+from coinbase_pro.messenger import API, Auth
+from coinbase_pro.socket import WSS, Token
+
+
+def verify(auth: Auth, payload: dict):
+    headers = payload["headers"]
+    timestamp = headers["CB-ACCESS-TIMESTAMP"]
+    message = f"{timestamp}{payload['method']}{payload['path']}{payload['body']}"
+    assert headers["CB-ACCESS-KEY"] == auth.api.key
+    assert headers["CB-ACCESS-SIGN"] == auth.signature(message)
+
+
+def test_messenger_instance(echo_auth: Auth):
+    messenger = AsyncMessenger(echo_auth)
+    assert isinstance(messenger, AbstractMessenger)
+    assert messenger.auth is echo_auth
+    assert messenger.api is echo_auth.api
+    assert messenger.private is True
+    assert isinstance(messenger.timeout, int)
+
+    subscriber = AsyncSubscriber(messenger)
+    assert subscriber.messenger is messenger
+    assert subscriber.error(Reply(404, {}, b"{}")) is True
+
+
+def test_messenger_requests(echo_auth: Auth):
+    async def run():
+        async with AsyncMessenger(echo_auth) as messenger:
+            get = await messenger.get("/products", {"limit": 5, "after": None})
+            post = await messenger.post("/orders", {"size": "1.0"})
+            delete = await messenger.delete("/orders")
+            return get, post, delete
+
+    get, post, delete = asyncio.run(run())
+
+    assert isinstance(get, Reply)
+    assert get.status_code == 200
+    assert get.json()["path"] == "/products?limit=5"
+    verify(echo_auth, get.json())
+
+    assert post.json()["body"] == json.dumps({"size": "1.0"})
+    verify(echo_auth, post.json())
+
+    assert delete.json()["body"] == ""
+    verify(echo_auth, delete.json())
+
+
+def test_messenger_page(echo_auth: Auth):
+    async def run():
+        async with AsyncMessenger(echo_auth) as messenger:
+            return await messenger.page("/pages")
+
+    responses = asyncio.run(run())
+    assert [r.json()[0]["id"] for r in responses] == [1, 2, 3]
+
+
+def test_messenger_page_copies(echo_auth: Auth):
+    data = {"limit": 5}
+
+    async def run():
+        async with AsyncMessenger(echo_auth) as messenger:
+            return await messenger.page("/pages", data)
+
+    assert len(asyncio.run(run())) == 3
+    assert data == {"limit": 5}
+
+
+def test_messenger_sign_error():
+    auth = Auth(API({"key": "key", "secret": "not base64!", "passphrase": "pass"}))
+
+    async def run():
+        async with AsyncMessenger(auth) as messenger:
+            return await messenger.get("/accounts")
+
+    with pytest.raises(binascii.Error):
+        asyncio.run(run())
+
+
+def test_messenger_paginate(echo_auth: Auth):
+    async def run():
+        async with AsyncMessenger(echo_auth) as messenger:
+            pager = messenger.paginate("/pages", items=2)
+            return [record async for record in pager], pager
+
+    records, pager = asyncio.run(run())
+    assert isinstance(pager, AsyncPager)
+    assert records == [{"id": 1}, {"id": 2}]
+    assert pager.after == "2"
+
+
+class Slow(AsyncMessenger):
+    def __init__(self, cache: Cache, status: int = 200):
+        super().__init__(cache=cache)
+        self.status = status
+        self.calls = 0
+
+    async def request(self, method: str, path: str, data: dict = None) -> Reply:
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        if 500 == self.status:
+            raise ConnectionError("connection reset")
+        return Reply(self.status, {}, b'{"id": "BTC-USD"}', self.codec)
+
+
+def test_messenger_single_flight():
+    cache = Cache()
+    messenger = Slow(cache)
+
+    async def run():
+        replies = await asyncio.gather(
+            *[messenger.get("/currencies") for _ in range(8)]
+        )
+        return replies + [await messenger.get("/currencies")]
+
+    replies = asyncio.run(run())
+    assert messenger.calls == 1
+    assert all(reply is replies[0] for reply in replies)
+    assert cache.stats["misses"] == 1
+    assert cache.stats["shared"] == 7
+    assert cache.stats["hits"] == 1
+
+    async def fail():
+        calls = [messenger.get("/currencies/BTC") for _ in range(3)]
+        return await asyncio.gather(*calls, return_exceptions=True)
+
+    messenger = Slow(Cache(), status=500)
+    errors = asyncio.run(fail())
+    assert messenger.calls == 1
+    assert all(isinstance(error, ConnectionError) for error in errors)
+    assert len(messenger.cache) == 0
+
+
+def test_client_concurrent(echo_auth: Auth):
+    async def run():
+        async with AsyncCoinbasePro(AsyncMessenger(echo_auth)) as client:
+            ids = [f"P{i}-USD" for i in range(20)]
+            return await asyncio.gather(*[client.product.ticker(i) for i in ids])
+
+    tickers = asyncio.run(run())
+    assert len(tickers) == 20
+    assert tickers[7]["path"] == "/products/P7-USD/ticker"
+
+
+def test_client():
+    client = get_client()
+    assert isinstance(client, AbstractClient)
+    assert isinstance(client, AsyncCoinbasePro)
+    assert isinstance(client.product, Product)
+    assert isinstance(client.messenger, AsyncMessenger)
+
+
+class Feed(object):
+    # NOTE: A websocket feed that publishes one message per subscribed product
+    # and channel whenever it receives a "publish" request
+    def __init__(self):
+        self.subscriptions = set()
+        self.requests = []
+
+    async def handle(self, request: web.Request) -> web.WebSocketResponse:
+        socket = web.WebSocketResponse()
+        await socket.prepare(request)
+        async for payload in socket:
+            message = json.loads(payload.data)
+            self.requests.append(message)
+            pairs = {
+                (c, p) for c in message["channels"] for p in message["product_ids"]
+            }
+            if "subscribe" == message["type"]:
+                self.subscriptions |= pairs
+            elif "unsubscribe" == message["type"]:
+                self.subscriptions -= pairs
+            for channel, product_id in sorted(self.subscriptions):
+                kind = {"level2": "l2update", "full": "match"}.get(channel, channel)
+                await socket.send_json({"type": kind, "product_id": product_id})
+            await socket.send_json({"type": "subscriptions", "channels": []})
+        return socket
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_get("/", self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"ws://127.0.0.1:{port}/"
+
+
+def test_stream():
+    async def run():
+        feed = Feed()
+        stream = AsyncStream(Token(WSS({"feed": await feed.start()})))
+        async with stream:
+            assert isinstance(stream, AbstractStream)
+            assert stream.connected is True
+            everything = stream.__aiter__()
+            tickers = stream.listen("ticker")
+            eth = stream.listen("ticker", "ETH-USD")
+            full = stream.listen("full")
+            matches = stream.listen("matches", "BTC-USD")
+            first = asyncio.create_task(stream.receive())
+            await asyncio.sleep(0)
+
+            await stream.subscribe(["BTC-USD", "ETH-USD"], ["ticker", "full"])
+            while stream.messages < 5:
+                await asyncio.sleep(0.01)
+            assert stream.subscriptions == {
+                "full": ["BTC-USD", "ETH-USD"],
+                "ticker": ["BTC-USD", "ETH-USD"],
+            }
+
+            await stream.unsubscribe(["ETH-USD"], ["ticker", "full"])
+            while stream.messages < 8:
+                await asyncio.sleep(0.01)
+            assert stream.subscriptions == {"full": ["BTC-USD"], "ticker": ["BTC-USD"]}
+        await feed.runner.cleanup()
+
+        assert stream.connected is False
+        assert feed.requests[1]["type"] == "unsubscribe"
+        consumers = (everything, tickers, eth, full, matches)
+        return await first, [[m async for m in c] for c in consumers]
+
+    first, (everything, tickers, eth, full, matches) = asyncio.run(run())
+
+    assert first == {"type": "match", "product_id": "BTC-USD"}
+    assert len(everything) == 8
+    assert [m["product_id"] for m in tickers] == ["BTC-USD", "ETH-USD", "BTC-USD"]
+    assert [m["product_id"] for m in eth] == ["ETH-USD"]
+    assert [m["product_id"] for m in full] == ["BTC-USD", "ETH-USD", "BTC-USD"]
+    assert [m["type"] for m in matches] == ["match", "match"]
+
+
+def test_consumer_drops_oldest():
+    async def run():
+        stream = AsyncStream()
+        consumer = stream.listen("ticker", size=2)
+        for trade_id in range(5):
+            stream.publish({"type": "ticker", "trade_id": trade_id})
+        stream.publish({"type": "heartbeat"})
+        consumer.close()
+        return [message["trade_id"] async for message in consumer], consumer
+
+    trade_ids, consumer = asyncio.run(run())
+    assert trade_ids == [3, 4]
+    assert consumer.dropped == 3
@@ -1,7 +1,12 @@
+import base64
+
 import pytest
 import requests
 from coinbase_pro.abstract import AbstractAuth
-from coinbase_pro.messenger import Auth
+from coinbase_pro.keyed import Keyed
+from coinbase_pro.messenger import API, Auth
+
+from tests.conftest import reference
 
 
 class TestAuth:
@@ -30,3 +35,36 @@ class TestAuth:
         assert "sandbox" in auth.api.rest, auth.api.rest
         response = requests.get(auth.api.url("/accounts"), auth=auth, timeout=30)
         assert response.status_code == 200, response.json()["message"]
+
+
+def test_signature():
+    secret = base64.b64encode(b"secret").decode("utf-8")
+    api = API({"key": "key", "secret": secret, "passphrase": "pass"})
+    auth = Auth(api)
+
+    assert auth.signature("message") == reference(secret, "message")
+    assert auth.mac is auth.mac
+
+    header = auth.header("1.0", "message")
+    assert header["CB-ACCESS-TIMESTAMP"] == "1.0"
+    assert header["CB-ACCESS-SIGN"] == reference(secret, "message")
+    assert header["CB-ACCESS-KEY"] == "key"
+    assert header["CB-ACCESS-PASSPHRASE"] == "pass"
+    assert "coinbase-pro" in header["User-Agent"]
+    assert "CB-ACCESS-SIGN" not in auth.template
+
+    other = base64.b64encode(b"other").decode("utf-8")
+    api.settings.update({"key": "other", "secret": other})
+    assert auth.signature("message") == reference(other, "message")
+    assert auth.header("1.0", "message")["CB-ACCESS-KEY"] == "other"
+
+
+def test_keyed():
+    keyed = Keyed()
+    secret = base64.b64encode(b"secret").decode("utf-8")
+    other = base64.b64encode(b"other").decode("utf-8")
+
+    assert keyed.mac(secret) is keyed.mac(secret)
+    assert keyed.sign(secret, "message") == reference(secret, "message")
+    assert keyed.sign(secret, "message") == keyed.sign(secret, "message")
+    assert keyed.sign(other, "message") == reference(other, "message")
@@ -0,0 +1,198 @@
+import json
+import threading
+import time
+
+import pytest
+from coinbase_pro.batch import Batch, gather
+from coinbase_pro.client import Order, Product, Unconfirmed
+from coinbase_pro.limiter import Bucket, Limiter
+from coinbase_pro.messenger import API, Auth, Messenger
+from coinbase_pro.server import Server
+from requests import ConnectionError, HTTPError, Response
+
+
+def reply(status_code: int, payload: object) -> Response:
+    response = Response()
+    response.status_code = status_code
+    response._content = json.dumps(payload).encode("utf-8")
+    return response
+
+
+class Desk(object):
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.paths = []
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def decode(self, response: Response) -> object:
+        return response.json()
+
+    def get(self, path: str, data: dict = None) -> Response:
+        with self.lock:
+            self.paths.append(path)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        product_id = path.split("/")[2]
+        if product_id == "BAD-USD":
+            return reply(404, {"message": "NotFound"})
+        if product_id == "DOWN-USD":
+            raise ConnectionError("connection reset")
+        return reply(200, {"product_id": product_id, "data": data})
+
+
+def test_gather():
+    batch = gather(lambda key: reply(200, key * 2), [1, 2, 3], workers=2)
+
+    assert isinstance(batch, Batch)
+    assert batch.results == {1: 2, 2: 4, 3: 6}
+    assert batch.errors == {}
+    assert batch.ok is True
+    assert len(batch) == 3
+    assert batch.elapsed > 0
+
+
+def test_gather_errors():
+    desk = Desk()
+    product = Product(desk)
+    batch = product.ticker_many(["BTC-USD", "BAD-USD", "DOWN-USD"])
+
+    assert batch.ok is False
+    assert list(batch.results) == ["BTC-USD"]
+    assert isinstance(batch.errors["BAD-USD"], HTTPError)
+    assert batch.errors["BAD-USD"].response.status_code == 404
+    assert isinstance(batch.errors["DOWN-USD"], ConnectionError)
+
+
+def test_gather_malformed():
+    def task(key: str) -> Response:
+        if "html" == key:
+            response = reply(200, None)
+            response._content = b"<html>502 Bad Gateway</html>"
+            return response
+        return reply(200, {"key": key})
+
+    batch = gather(task, ["json", "html"])
+
+    assert batch.results == {"json": {"key": "json"}}
+    assert isinstance(batch.errors["html"], ValueError)
+    assert len(batch) == 2
+
+
+def test_gather_concurrent():
+    desk = Desk(delay=0.05)
+    product = Product(desk)
+    product_ids = [f"P{i}-USD" for i in range(16)]
+
+    batch = product.stats_many(product_ids, workers=4)
+
+    assert len(batch.results) == 16
+    assert desk.peak == 4
+    assert batch.elapsed < 16 * 0.05
+    assert sorted(desk.paths) == sorted(f"/products/{p}/stats" for p in product_ids)
+
+
+def test_book_many():
+    product = Product(Desk())
+    batch = product.book_many(["BTC-USD", "ETH-USD"], {"level": 2})
+
+    assert batch.results["ETH-USD"]["data"] == {"level": 2}
+
+
+def ladder(product_id: str, start: float, count: int) -> list:
+    return [
+        {
+            "product_id": product_id,
+            "side": "buy",
+            "type": "limit",
+            "price": f"{start + i:.2f}",
+            "size": "0.01",
+        }
+        for i in range(count)
+    ]
+
+
+def test_post_many(server: Server):
+    limiter = Limiter(Bucket(10_000, 10_000), Bucket(10_000, 10_000))
+    order = Order(Messenger(Auth(API(server.register())), limiter))
+    orders = ladder("BTC-USD", 100, 20) + [dict(ladder("ETH-USD", 1, 1)[0], size="-1")]
+    orders[0]["client_oid"] = "ladder-0"
+
+    batch = order.post_many(orders, workers=4)
+    assert len(batch) == 21
+    assert "ladder-0" in batch.results
+    assert all(r["status"] == "open" for r in batch.results.values())
+    assert all(oid == r["client_oid"] for oid, r in batch.results.items())
+    assert len(batch.errors) == 1
+    assert set(batch.timings) == set(batch.results) | set(batch.errors)
+
+    order_ids = [r["id"] for r in batch.results.values()]
+    canceled = order.cancel_many(order_ids[:5] + ["missing"])
+    assert sorted(canceled.results) == sorted(order_ids[:5])
+    assert isinstance(canceled.errors["missing"], HTTPError)
+
+    order.post_many(ladder("ETH-USD", 1, 3))
+    swept = order.cancel_all_many(["BTC-USD", "ETH-USD"])
+    assert len(swept.results["BTC-USD"]) == 15
+    assert len(swept.results["ETH-USD"]) == 3
+    assert order.list({}) == []
+
+
+class Flaky(Desk):
+    def __init__(self, visible: int):
+        super().__init__()
+        self.visible = visible
+        self.posts = 0
+
+    def post(self, path: str, data: dict = None) -> Response:
+        self.posts += 1
+        if 1 == self.posts:
+            raise ConnectionError("connection reset")
+        return reply(200, dict(data, id="second"))
+
+    def get(self, path: str, data: dict = None) -> Response:
+        self.paths.append(path)
+        if 0 <= self.visible < len(self.paths):
+            return reply(200, {"id": "first", "client_oid": path.split(":")[1]})
+        return reply(404, {"message": "NotFound"})
+
+
+@pytest.mark.parametrize("visible", [0, 2])
+def test_post_many_recovers(visible: int, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr("coinbase_pro.client.POLL", 0.01)
+    desk = Flaky(visible)
+    orders = [{"product_id": "BTC-USD", "client_oid": "oid"}]
+    batch = Order(desk).post_many(orders, wait=1.0)
+
+    assert desk.paths == ["/orders/client:oid"] * (visible + 1)
+    assert batch.results["oid"]["id"] == "first"
+    assert desk.posts == 1
+
+
+def test_place_unconfirmed(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr("coinbase_pro.client.POLL", 0.01)
+    desk = Flaky(-1)
+    order = {"product_id": "BTC-USD", "client_oid": "oid"}
+
+    with pytest.raises(Unconfirmed) as raised:
+        Order(desk).place(order, wait=0.05)
+    assert raised.value.client_oid == "oid"
+    assert isinstance(raised.value.__cause__, ConnectionError)
+    assert desk.posts == 1
+    assert len(desk.paths) > 1
+
+    batch = Order(Flaky(-1)).post_many([order], wait=0.05)
+    assert isinstance(batch.errors["oid"], Unconfirmed)
+
+
+def test_post_many_duplicates():
+    desk = Flaky(0)
+    orders = [{"client_oid": "oid", "price": "1"}, {"client_oid": "oid", "price": "2"}]
+
+    with pytest.raises(ValueError, match="oid"):
+        Order(desk).post_many(orders)
+    assert desk.posts == 0
@@ -0,0 +1,42 @@
+import json
+
+from coinbase_pro.benchmark import WORKLOADS, compare, main, run
+
+
+def test_run():
+    results = run(["stream", "decoding"], scale=0.01)
+
+    assert set(results["results"]) == {"stream", "decoding"}
+    assert results["meta"]["scale"] == 0.01
+    assert results["results"]["stream"]["json_messages_per_s"] > 0
+    assert results["results"]["decoding"]["json_page_us"] > 0
+
+
+def test_workloads():
+    results = run(["rest", "pagination"], scale=0.01)
+
+    assert results["results"]["rest"]["order_per_s"] > 0
+    assert results["results"]["pagination"]["pager_records_per_s"] > 0
+    assert set(WORKLOADS) >= {"signing", "rest", "pagination", "stream"}
+
+
+def test_compare():
+    baseline = {"results": {"rest": {"order_us": 100.0, "order_per_s": 1000.0}}}
+    current = {"results": {"rest": {"order_us": 150.0, "order_per_s": 1100.0}}}
+    rows = {row["metric"]: row for row in compare(current, baseline, 0.1)}
+
+    assert rows["order_us"]["regression"] is True
+    assert round(rows["order_us"]["change"], 3) == -0.333
+    assert rows["order_per_s"]["regression"] is False
+    assert round(rows["order_per_s"]["change"], 3) == 0.1
+
+
+def test_main(tmp_path):
+    output = tmp_path / "results.json"
+    assert 0 == main(["--only", "stream", "--scale", "0.01", "--output", str(output)])
+    results = json.loads(output.read_text())
+
+    for name in results["results"]["stream"]:
+        results["results"]["stream"][name] *= 1000
+    output.write_text(json.dumps(results))
+    assert 1 == main(["--only", "stream", "--scale", "0.01", "--baseline", str(output)])
@@ -0,0 +1,295 @@
+import json
+import time
+from random import Random
+
+import pytest
+from coinbase_pro.benchmark import Replay, ladder
+from coinbase_pro.client import Product
+from coinbase_pro.limiter import Bucket, Limiter
+from coinbase_pro.messenger import API, Auth, Messenger
+from coinbase_pro.plugin.book import Books, Level2, Level3, Side
+from coinbase_pro.retry import Retry
+from coinbase_pro.server import Server
+from coinbase_pro.socket import Stream
+
+SNAPSHOT: dict = {
+    "type": "snapshot",
+    "product_id": "BTC-USD",
+    "bids": [["100.00", "1.5"], ["99.00", "2.0"], ["98.00", "0"]],
+    "asks": [["101.00", "1.0"], ["102.50", "3.0"]],
+}
+
+
+def update(product_id: str, *changes) -> dict:
+    return {"type": "l2update", "product_id": product_id, "changes": list(changes)}
+
+
+def test_side():
+    bids, asks = Side(), Side(ask=True)
+    for price in (3.0, 1.0, 2.0):
+        bids.update(price, price)
+        asks.update(price, price)
+
+    assert bids.best == (3.0, 3.0)
+    assert asks.best == (1.0, 1.0)
+    assert bids.top(2) == [(3.0, 3.0), (2.0, 2.0)]
+    assert asks.top(5) == [(1.0, 1.0), (2.0, 2.0), (3.0, 3.0)]
+
+    asks.update(1.0, 0.0)
+    asks.update(7.0, 0.0)
+    assert asks.best == (2.0, 2.0)
+    assert 1.0 not in asks and len(asks) == 2
+    assert list(bids) == bids.top(3)
+
+
+def test_level2():
+    book = Level2("BTC-USD")
+    assert book.update(update("BTC-USD", ["buy", "100.50", "1"])) == 0
+
+    book.snapshot(SNAPSHOT)
+    assert book.ready is True
+    assert book.bid == (100.0, 1.5)
+    assert book.ask == (101.0, 1.0)
+    assert book.spread == 1.0
+    assert book.mid == 100.5
+    assert len(book.bids) == 2
+
+    changes = update("BTC-USD", ["buy", "100.50", "0.25"], ["sell", "101.00", "0"])
+    assert book.update(changes) == 2
+    assert book.depth(2) == {
+        "bids": [(100.5, 0.25), (100.0, 1.5)],
+        "asks": [(102.5, 3.0)],
+    }
+
+
+def test_level2_matches_reference():
+    snapshot, updates = ladder(Random(11), 2000, levels=50)
+    book = Level2("BTC-USD")
+    book.snapshot(snapshot)
+    bids = {float(p): float(s) for p, s in snapshot["bids"]}
+    asks = {float(p): float(s) for p, s in snapshot["asks"]}
+    for message in updates:
+        book.update(message)
+        for side, price, size in message["changes"]:
+            levels = bids if "buy" == side else asks
+            if float(size):
+                levels[float(price)] = float(size)
+            else:
+                levels.pop(float(price), None)
+
+    assert book.depth(0) == {"bids": [], "asks": []}
+    assert book.bids.top(len(bids)) == sorted(bids.items(), reverse=True)
+    assert book.asks.top(len(asks)) == sorted(asks.items())
+
+
+def test_books():
+    eth = dict(SNAPSHOT, product_id="ETH-USD")
+    messages = [
+        {"type": "subscriptions", "channels": []},
+        SNAPSHOT,
+        eth,
+        update("BTC-USD", ["sell", "100.75", "2"]),
+        update("ETH-USD", ["buy", "100.00", "0"]),
+        {"type": "heartbeat", "product_id": "BTC-USD"},
+    ]
+    stream = Stream()
+    stream.socket = Replay([json.dumps(message) for message in messages])
+    books = Books(stream, ["BTC-USD", "ETH-USD"])
+
+    assert books.message()["channels"] == ["level2"]
+    assert books.message()["product_ids"] == ["BTC-USD", "ETH-USD"]
+    assert books.run(count=4) == 4
+    assert books["BTC-USD"].ask == (100.75, 2.0)
+    assert books["ETH-USD"].bid == (99.0, 2.0)
+
+    stats = books.stats()
+    assert stats["messages"] == 4
+    assert stats["changes"] == 2 * 4 + 2
+    assert stats["changes_per_s"] > 0
+    assert books.apply({"type": "l2update", "product_id": "SOL-USD"}) is not None
+    assert "SOL-USD" in books and len(books) == 3
+
+
+class Desk(object):
+    # NOTE: Serves level 3 snapshots of a simulated book as of `position`
+    def __init__(self, history: list):
+        self.history = history
+        self.position = 0
+        self.calls = 0
+
+    def book(self, product_id: str, data: dict = None) -> dict:
+        self.calls += 1
+        return self.history[self.position]
+
+
+def simulate(random: Random, number: int) -> tuple:
+    orders, messages, history = dict(), list(), list()
+
+    def state(sequence: int) -> dict:
+        levels = {"buy": [], "sell": []}
+        for order_id, (side, price, size) in orders.items():
+            levels[side].append([f"{price:.2f}", f"{size:.8f}", order_id])
+        return {"sequence": sequence, "bids": levels["buy"], "asks": levels["sell"]}
+
+    history.append(state(0))
+    for sequence in range(1, number + 1):
+        kind = random.choice(("open", "open", "match", "done", "change"))
+        if not orders or "open" == kind:
+            side = random.choice(("buy", "sell"))
+            price = 100 + random.randint(-5, 5) * (-1 if "buy" == side else 1)
+            order_id = f"o{sequence}"
+            orders[order_id] = [side, price, random.randint(1, 9) / 100]
+            message = {
+                "type": "open",
+                "order_id": order_id,
+                "side": side,
+                "price": f"{price:.2f}",
+                "remaining_size": f"{orders[order_id][2]:.8f}",
+            }
+        else:
+            order_id = random.choice(sorted(orders))
+            side, price, size = orders[order_id]
+            if "done" == kind or size <= 0.01:
+                del orders[order_id]
+                message = {"type": "done", "order_id": order_id, "reason": "canceled"}
+            elif "match" == kind:
+                orders[order_id][2] = round(size - 0.01, 2)
+                message = {"type": "match", "maker_order_id": order_id, "size": "0.01"}
+            else:
+                orders[order_id][2] = round(size / 2, 2)
+                message = {
+                    "type": "change",
+                    "order_id": order_id,
+                    "new_size": f"{orders[order_id][2]:.8f}",
+                }
+        message.update(sequence=sequence, product_id="BTC-USD", side=side)
+        messages.append(message)
+        history.append(state(sequence))
+    return messages, history
+
+
+def levels(snapshot: dict, side: str) -> list:
+    totals = dict()
+    for price, size, _ in snapshot["bids" if "buy" == side else "asks"]:
+        totals[float(price)] = round(totals.get(float(price), 0.0) + float(size), 8)
+    return sorted(totals.items(), reverse="buy" == side)
+
+
+def test_level3_resync():
+    messages, history = simulate(Random(5), 40)
+    desk = Desk(history)
+    desk.position = 10
+    book = Level3("BTC-USD", desk)
+
+    for message in messages[8:20]:
+        book.apply(message)
+    book.wait(1.0)
+    assert book.ready and book.sequence == 20
+    assert book.stale == 2 and book.resyncs == 1
+
+    desk.position = 30
+    for message in messages[20:25] + messages[26:40]:
+        book.apply(message)
+    assert book.gaps == 1
+    book.wait(1.0)
+
+    assert book.sequence == 40 and book.resyncs == 2 and desk.calls == 2
+    final = history[40]
+    assert set(book.orders) == {o for *_, o in final["bids"] + final["asks"]}
+    assert book.bids.top(100) == levels(final, "buy")
+
+
+class Outage(Desk):
+    def __init__(self, history: list, failures: int):
+        super().__init__(history)
+        self.failures = failures
+
+    def book(self, product_id: str, data: dict = None) -> dict:
+        if self.failures:
+            self.calls += 1
+            self.failures -= 1
+            return {"message": "Service Unavailable"}
+        return super().book(product_id, data)
+
+
+class Fixed(Retry):
+    def __init__(self, seconds: float):
+        super().__init__()
+        self.seconds = seconds
+        self.attempts_seen = []
+
+    def backoff(self, attempt: int, headers: dict = None) -> float:
+        self.attempts_seen.append(attempt)
+        return self.seconds
+
+
+def test_level3_backoff():
+    messages, history = simulate(Random(7), 40)
+    desk, retry = Outage(history, 3), Fixed(0.05)
+    desk.position = 10
+    book = Level3("BTC-USD", desk, retry=retry)
+
+    start = time.monotonic()
+    for message in messages[10:40]:
+        book.apply(message)
+        time.sleep(0.001)
+    while not book.ready:
+        book.wait(1.0)
+        assert time.monotonic() - start < 5.0
+
+    assert desk.calls == 4 and book.failures == 3
+    assert retry.attempts_seen == [0, 1, 2]
+    assert time.monotonic() - start >= 0.15
+    assert book.sequence == 40
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_level3_matches_reference(seed: int):
+    random = Random(seed)
+    messages, history = simulate(random, 1000)
+    desk = Desk(history)
+    book = Level3("BTC-USD", desk)
+
+    for message in messages:
+        if random.random() < 0.01:
+            continue
+        book.apply(message)
+        desk.position = message["sequence"]
+        if random.random() < 0.05:
+            book.poll()
+    while book.syncing:
+        book.wait(1.0)
+
+    final = history[book.sequence]
+    top = book.depth(100)
+    assert [(p, round(s, 8)) for p, s in top["bids"]] == levels(final, "buy")
+    assert [(p, round(s, 8)) for p, s in top["asks"]] == levels(final, "sell")
+    assert book.gaps > 0
+
+
+def test_level3_server(server: Server):
+    limiter = Limiter(Bucket(10_000, 10_000), Bucket(10_000, 10_000))
+    product = Product(Messenger(Auth(API(server.register())), limiter))
+    snapshot = product.book("BTC-USD", {"level": 3})
+    stream = Stream()
+    opened = {
+        "type": "open",
+        "product_id": "BTC-USD",
+        "sequence": snapshot["sequence"] + 1,
+        "order_id": "live",
+        "side": "buy",
+        "price": "1.00",
+        "remaining_size": "2.0",
+    }
+    stream.socket = Replay([json.dumps(opened)])
+    books = Books(stream, ["BTC-USD"], channel="full", product=product)
+    book = books["BTC-USD"]
+
+    assert isinstance(book, Level3)
+    assert books.run(count=1) == 1
+    book.wait(5.0)
+    assert book.ready
+    assert len(book.orders) == 1 + len(snapshot["bids"]) + len(snapshot["asks"])
+    assert book.orders["live"] == ["buy", 1.0, 2.0]
+    assert book.bids.size(1.0) == 2.0
+    assert book.ask[0] == float(snapshot["asks"][0][0])
@@ -0,0 +1,131 @@
+import threading
+import time
+
+import pytest
+from coinbase_pro.cache import Cache, match
+from coinbase_pro.client import Currency, Fee, Product
+from coinbase_pro.messenger import API, Auth, Messenger
+from coinbase_pro.server import Server
+from requests import Response
+
+
+class Counter(Messenger):
+    def __init__(self, cache: Cache, status_code: int = 200, delay: float = 0):
+        super().__init__(cache=cache)
+        self.status_code = status_code
+        self.delay = delay
+        self.calls = []
+
+    def request(self, method: str, path: str, data: dict = None) -> Response:
+        self.calls.append((method, path))
+        time.sleep(self.delay)
+        response = Response()
+        response.status_code = self.status_code
+        response._content = b'{"id": "BTC-USD"}'
+        return response
+
+
+def test_match():
+    assert match("/products", "/products")
+    assert match("/products/*", "/products/BTC-USD")
+    assert match("/products/*", "/products/BTC-USD?level=2")
+    assert not match("/products/*", "/products/BTC-USD/ticker")
+    assert not match("/products/*", "/products")
+
+
+def test_ttl():
+    cache = Cache()
+    assert cache.ttl("/currencies") > 0
+    assert cache.ttl("/products/BTC-USD") > 0
+    assert cache.ttl("/products/BTC-USD/ticker") == 0
+    assert cache.ttl("/accounts") == 0
+    assert Cache({"/accounts": 5}).ttl("/accounts") == 5
+
+
+def test_lru():
+    cache = Cache(size=2)
+    cache.put(cache.key("/a"), 1, 60)
+    cache.put(cache.key("/b"), 2, 60)
+    assert cache.get(cache.key("/a")) == 1
+    cache.put(cache.key("/c"), 3, 60)
+
+    assert cache.get(cache.key("/b")) is None
+    assert cache.get(cache.key("/a")) == 1
+    assert cache.evictions == 1
+    assert len(cache) == 2
+
+
+def test_expiry():
+    cache = Cache()
+    cache.put(cache.key("/a"), 1, 0.01)
+    assert cache.get(cache.key("/a")) == 1
+    time.sleep(0.02)
+    assert cache.get(cache.key("/a")) is None
+
+
+def test_key():
+    cache = Cache()
+    assert cache.key("/a", {"x": 1, "y": 2}) == cache.key("/a", {"y": 2, "x": 1})
+    assert cache.key("/a", {"x": 1}) != cache.key("/a", {"x": 2})
+    assert cache.key("/fees", None, "a") != cache.key("/fees", None, "b")
+    assert cache.key("/products", None, "a") == cache.key("/products", None, "b")
+
+
+def test_shared_owners(server: Server):
+    cache = Cache()
+    members = [Messenger(Auth(API(server.register())), cache=cache) for _ in "ab"]
+    for _ in range(2):
+        for messenger in members:
+            Fee(messenger).get()
+            Currency(messenger).list()
+
+    assert cache.stats == dict(cache.stats, hits=5, misses=3)
+
+
+def test_single_flight():
+    cache = Cache()
+    messenger = Counter(cache, delay=0.05)
+    product = Product(messenger)
+
+    threads = [
+        threading.Thread(target=product.get, args=("BTC-USD",)) for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(messenger.calls) == 1
+    assert cache.misses == 1
+    assert cache.shared == 7
+
+    assert product.get("BTC-USD") == {"id": "BTC-USD"}
+    assert cache.hits == 1
+    assert cache.stats["entries"] == 1
+
+
+def test_uncached():
+    cache = Cache()
+    messenger = Counter(cache)
+    product = Product(messenger)
+    product.ticker("BTC-USD")
+    product.ticker("BTC-USD")
+    assert len(messenger.calls) == 2
+    assert cache.stats["misses"] == 0
+
+    messenger = Counter(cache, status_code=500)
+    Currency(messenger).list()
+    Currency(messenger).list()
+    assert len(messenger.calls) == 2
+    assert len(cache) == 0
+
+
+def test_errors():
+    cache = Cache()
+
+    def fail():
+        raise ConnectionError("reset")
+
+    with pytest.raises(ConnectionError):
+        cache.fetch(cache.key("/a"), fail, 60)
+    assert cache.fetch(cache.key("/a"), lambda: 1, 60) == 1
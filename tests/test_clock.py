@@ -0,0 +1,131 @@
+import json
+import time
+
+import pytest
+from coinbase_pro.cache import Cache
+from coinbase_pro.clock import Clock, Sample, parse
+from coinbase_pro.client import CoinbasePro
+from coinbase_pro.messenger import API, Auth, Messenger
+from coinbase_pro.pool import Pool
+from coinbase_pro.scheduler import Scheduler
+from coinbase_pro.server import Exchange, Server
+from coinbase_pro.socket import WSS, Stream, Token
+from requests import Response
+
+
+class Remote(object):
+    def __init__(self, offset: float, delays: list):
+        self.offset = offset
+        self.delays = list(delays)
+
+    def decode(self, response: Response) -> object:
+        return response.json()
+
+    def request(self, method: str, path: str, data: dict = None) -> Response:
+        delay = self.delays.pop(0)
+        time.sleep(delay / 2)
+        response = Response()
+        response.status_code = 200
+        response._content = json.dumps({"epoch": time.time() + self.offset}).encode()
+        time.sleep(delay / 2)
+        return response
+
+
+class Replay(object):
+    connected = True
+
+    def __init__(self, messages: list):
+        self.messages = [json.dumps(message) for message in messages]
+
+    def recv(self) -> str:
+        return self.messages.pop(0)
+
+
+def test_parse():
+    assert parse("1970-01-01T00:00:01.5Z") == 1.5
+    assert parse("1970-01-01T00:00:01.123456789Z") == pytest.approx(1.123456)
+    assert parse("1970-01-01T00:00:02+00:00") == 2.0
+
+
+def test_filter():
+    clock = Clock()
+    clock.add(Sample(offset=5.0, rtt=0.2, stamp=1.0))
+    clock.add(Sample(offset=3.0, rtt=0.01, stamp=2.0))
+    clock.add(Sample(offset=9.0, rtt=0.5, stamp=3.0))
+
+    assert clock.rtt == 0.01
+    assert len(clock.samples) == 3
+
+
+def test_sync():
+    clock = Clock()
+    offset = clock.sync(Remote(42.0, [0.08, 0.002, 0.06, 0.04]))
+
+    assert offset == pytest.approx(42.0, abs=0.01)
+    assert clock.rtt < 0.04
+    assert clock.time() - time.time() == pytest.approx(42.0, abs=0.01)
+
+
+def test_sync_bypasses_cache(server: Server):
+    cache = Cache({"/time": 60.0})
+    messenger = Messenger(Auth(API(server.register())), cache=cache)
+    messenger.get("/time")
+
+    clock = Clock()
+    clock.sync(messenger, 3)
+    stamps = {sample.stamp for sample in clock.samples}
+
+    assert cache.stats == dict(cache.stats, hits=0, misses=1)
+    assert len(stamps) == 3
+    assert all(sample.rtt > 0 for sample in clock.samples)
+    assert "/time" not in Cache().rules
+
+
+def test_heartbeat():
+    clock = Clock()
+    assert clock.offset == 0.0
+
+    server = time.time() + 10.0
+    iso = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(server))
+    fraction = f"{server % 1:.6f}"[1:]
+    token = Token(WSS(), clock)
+    stream = Stream(token)
+    stream.socket = Replay([{"type": "heartbeat", "time": f"{iso}{fraction}Z"}])
+
+    assert stream.receive()["type"] == "heartbeat"
+    assert clock.offset == pytest.approx(10.0, abs=0.1)
+    assert float(token()["timestamp"]) - time.time() == pytest.approx(10.0, abs=0.1)
+
+
+def test_skewed_exchange():
+    with Server(Exchange(skew=-90.0)) as server:
+        settings = server.settings
+        skewed = CoinbasePro(Messenger(Auth(API(settings))))
+        assert skewed.account.list() == {"message": "request timestamp expired"}
+
+        clock = Clock(interval=0.05)
+        messenger = Messenger(Auth(API(settings), clock))
+        clock.start(messenger)
+        try:
+            assert clock.offset == pytest.approx(-90.0, abs=0.5)
+            assert isinstance(CoinbasePro(messenger).account.list(), list)
+            time.sleep(0.2)
+            assert len(clock.samples) > 4
+        finally:
+            clock.stop()
+        assert not clock.running
+
+
+@pytest.mark.parametrize("wrap", [lambda m: Pool([m]), Scheduler])
+def test_skewed_wrappers(wrap):
+    # NOTE: Every AbstractMessenger can be sampled, not only Messenger
+    with Server(Exchange(skew=-90.0)) as server:
+        messenger = wrap(Messenger(Auth(API(server.settings)), cache=Cache()))
+        clock = Clock(interval=0.05)
+        clock.start(messenger)
+        try:
+            assert clock.errors == 0 and clock.rtt is not None
+            assert clock.offset == pytest.approx(-90.0, abs=0.5)
+        finally:
+            clock.stop()
+            messenger.close()
@@ -0,0 +1,86 @@
+import json
+from decimal import Decimal
+
+import pytest
+from coinbase_pro.abstract import AbstractCodec
+from coinbase_pro.client import CoinbasePro
+from coinbase_pro.codec import CODECS, JSON, DecimalJSON, get_codec
+from coinbase_pro.messenger import Auth, Messenger
+from coinbase_pro.socket import Stream
+
+
+def available() -> list:
+    names = []
+    for name in CODECS:
+        try:
+            get_codec(name)
+            names.append(name)
+        except ImportError:
+            pass
+    return names
+
+
+@pytest.mark.parametrize("name", available())
+def test_roundtrip(name: str):
+    codec = get_codec(name)
+    message = {"type": "ticker", "price": "42000.01", "sequence": 1, "ok": True}
+
+    assert isinstance(codec, AbstractCodec)
+    assert codec.name == name
+    assert isinstance(codec.encode(message), bytes)
+    assert codec.decode(codec.encode(message)) == message
+    assert codec.decode(json.dumps(message)) == message
+    assert codec.decode(codec.encode({"size": Decimal("0.1")})) == {"size": "0.1"}
+
+
+def test_get_codec():
+    assert isinstance(get_codec(), JSON)
+    assert get_codec("fast").name in available()
+    with pytest.raises(ValueError):
+        get_codec("yaml")
+
+
+def test_decimal():
+    codec = DecimalJSON()
+    payload = codec.decode(b"[[1640995200, 46216.93, 46731.04, 0.1]]")
+
+    assert payload[0][0] == 1640995200
+    assert payload[0][1] == Decimal("46216.93")
+    assert payload[0][3] == Decimal("0.1")
+    assert codec.encode({"price": Decimal("46216.93")}) == b'{"price": "46216.93"}'
+
+
+def test_messenger(echo_auth: Auth):
+    messenger = Messenger(echo_auth, codec=DecimalJSON())
+    client = CoinbasePro(messenger)
+
+    assert messenger.codec.name == "decimal"
+    payload = client.order.post({"product_id": "BTC-USD", "price": Decimal("1.5")})
+    assert payload["body"] == '{"product_id": "BTC-USD", "price": "1.5"}'
+    assert payload["headers"]["Content-Type"] == "application/json"
+
+    timestamp = payload["headers"]["CB-ACCESS-TIMESTAMP"]
+    message = f"{timestamp}POST/orders{payload['body']}"
+    assert payload["headers"]["CB-ACCESS-SIGN"] == echo_auth.signature(message)
+
+
+class Socket(object):
+    connected = True
+
+    def __init__(self):
+        self.sent = []
+
+    def send(self, payload: bytes):
+        self.sent.append(payload)
+
+    def recv(self) -> str:
+        return '{"type": "ticker", "price": 0.25}'
+
+
+def test_stream():
+    stream = Stream(codec=DecimalJSON())
+    stream.socket = Socket()
+
+    stream.send({"type": "subscribe"})
+    assert stream.socket.sent == [b'{"type": "subscribe"}']
+    assert stream.receive() == {"type": "ticker", "price": Decimal("0.25")}
@@ -0,0 +1,77 @@
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from coinbase_pro.client import CoinbasePro
+from coinbase_pro.plugin.history import CANDLE, LIMIT, History
+from requests import HTTPError
+
+from tests.conftest import Candles
+
+
+def test_windows():
+    history = History(Candles())
+    windows = history.windows(0, 1000 * 60, 60)
+
+    assert windows[0] == (0, (LIMIT - 1) * 60)
+    assert windows[1][0] == LIMIT * 60
+    assert windows[-1][1] == 1000 * 60
+    assert len(windows) == 4
+
+    with pytest.raises(ValueError):
+        history.windows(0, 60, 61)
+
+
+def test_windows_inclusive():
+    history = History(Candles())
+    span = LIMIT * 60
+
+    assert history.windows(0, span, 60) == [(0, span - 60), (span, span)]
+    assert history.windows(0, span - 60, 60) == [(0, span - 60)]
+    assert history.windows(120, 120, 60) == [(120, 120)]
+    assert history.windows(150, 150, 60) == [(120, 150)]
+
+    candles = history.fetch("BTC-USD", 0, span, 60)
+    assert candles["time"][-1] == span
+
+
+def test_download(tmp_path):
+    exchange = Candles()
+    client = CoinbasePro(exchange)
+    client.plug(History, "history")
+
+    start, end = 1_599_999_960, 1_599_999_960 + 1000 * 60
+    candles = client.history.download("BTC-USD", start, end, 60, str(tmp_path))
+
+    assert candles.dtype == CANDLE
+    assert len(candles) == 1001
+    assert candles["time"][0] == start
+    assert candles["time"][-1] == end
+    assert np.all(np.diff(candles["time"]) == 60)
+    assert len(exchange.calls) == 4
+    assert sorted(os.listdir(tmp_path)) == [f"BTC-USD-60-{start}-{end}.npy"]
+
+    again = client.history.download("BTC-USD", start, end, 60, str(tmp_path))
+    assert len(exchange.calls) == 4
+    assert np.array_equal(again, candles)
+
+
+def test_resume(tmp_path):
+    start, end = 1_599_999_960, 1_599_999_960 + 1000 * 60
+    failing = start + LIMIT * 60
+    exchange = Candles(fail={failing})
+    history = History(exchange)
+
+    with pytest.raises(HTTPError):
+        history.download("ETH-USD", start, end, 60, str(tmp_path))
+    assert len(exchange.calls) == 4
+
+    exchange.fail.clear()
+    exchange.calls.clear()
+    candles = history.download("ETH-USD", start, end, 60, str(tmp_path))
+
+    assert exchange.calls == [failing]
+    assert len(candles) == 1001
+    assert np.all(np.diff(candles["time"]) == 60)
@@ -0,0 +1,112 @@
+import threading
+import time
+
+from coinbase_pro.abstract import AbstractLimiter
+from coinbase_pro.limiter import Bucket, Limiter, get_limiter, is_private
+from coinbase_pro.messenger import API, Auth, Messenger
+
+
+def test_bucket_burst():
+    bucket = Bucket(rate=10, burst=5)
+
+    assert bucket.rate == 10
+    assert bucket.burst == 5
+    assert bucket.delay() == 0
+
+    for _ in range(5):
+        assert bucket.reserve() == 0
+
+    assert 0 < bucket.delay() <= 0.1
+    assert 0 < bucket.reserve() <= 0.1
+    assert 0.1 < bucket.reserve() <= 0.2
+
+
+def test_bucket_refill():
+    bucket = Bucket(rate=100, burst=2)
+    bucket.reserve()
+    bucket.reserve()
+    assert bucket.tokens < 1
+
+    time.sleep(0.05)
+    assert 1 < bucket.tokens <= 2
+    assert bucket.reserve() == 0
+
+
+def test_bucket_threads():
+    bucket = Bucket(rate=1, burst=100)
+
+    def reserve():
+        for _ in range(25):
+            bucket.reserve()
+
+    threads = [threading.Thread(target=reserve) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert bucket.tokens < 1
+
+
+def test_limiter():
+    limiter = Limiter(Bucket(10, 1), Bucket(20, 1))
+
+    assert isinstance(limiter, AbstractLimiter)
+    assert limiter.bucket(False) is limiter.public
+    assert limiter.bucket(True) is limiter.private
+
+    assert limiter.wait(True) == 0
+    assert limiter.wait(False) == 0
+    assert 0 < limiter.delay(True) <= 0.05
+    assert 0 < limiter.delay(False) <= 0.1
+
+    start = time.monotonic()
+    waited = limiter.wait(True)
+    assert 0 < waited <= 0.05
+    assert time.monotonic() - start >= waited * 0.9
+
+
+def test_get_limiter():
+    assert get_limiter("key") is get_limiter("key")
+    assert get_limiter("key") is not get_limiter("other")
+    assert get_limiter() is get_limiter("")
+    assert get_limiter("key").public is get_limiter("other").public
+    assert get_limiter("key").private is not get_limiter("other").private
+
+
+def test_is_private():
+    assert is_private("/products/BTC-USD/ticker") is False
+    assert is_private("/products?type=spot") is False
+    assert is_private("/currencies") is False
+    assert is_private("/time") is False
+    assert is_private("/orders") is True
+    assert is_private("/profiles") is True
+    assert is_private("/accounts/a/ledger") is True
+
+
+def test_messenger_limiter():
+    api = API({"key": "shared"})
+    first = Messenger(Auth(api))
+    second = Messenger(Auth(api))
+
+    assert first.private is True
+    assert Messenger().private is False
+    assert first.limiter is second.limiter
+    assert first.limiter is get_limiter("shared")
+
+    limiter = Limiter()
+    assert Messenger(Auth(api), limiter).limiter is limiter
+
+
+def test_messenger_buckets(server):
+    public, private = Bucket(0.001, 100), Bucket(0.001, 100)
+    messenger = Messenger(Auth(API(server.register())), Limiter(public, private))
+
+    messenger.get("/products/BTC-USD/ticker")
+    messenger.get("/time")
+    assert round(public.tokens) == 98
+    assert round(private.tokens) == 100
+
+    messenger.get("/accounts")
+    assert round(public.tokens) == 98
+    assert round(private.tokens) == 99
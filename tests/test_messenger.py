@@ -1,7 +1,10 @@
+import json
+
 import pytest
 from coinbase_pro.abstract import AbstractMessenger
-from coinbase_pro.messenger import API, Auth, Messenger, Subscriber
-from requests import Response, Session
+from coinbase_pro.messenger import API, Auth, Messenger, Pager, Subscriber, collect
+from coinbase_pro.server import page
+from requests import HTTPError, Response, Session
 
 from tests.teardown import Teardown
 
@@ -11,6 +14,7 @@ class TestMessenger(Teardown):
         assert hasattr(private_messenger, "auth")
         assert hasattr(private_messenger, "api")
         assert hasattr(private_messenger, "session")
+        assert hasattr(private_messenger, "limiter")
         assert hasattr(private_messenger, "timeout")
 
     def test_messenger_methods(self, private_messenger):
@@ -19,6 +23,7 @@ class TestMessenger(Teardown):
         assert callable(private_messenger.put)
         assert callable(private_messenger.delete)
         assert callable(private_messenger.page)
+        assert callable(private_messenger.paginate)
 
     def test_messenger_instance(self, private_messenger):
         assert isinstance(private_messenger, AbstractMessenger)
@@ -82,3 +87,99 @@ def test_subscriber(public_messenger):
     assert hasattr(dummy, "error")
 
     assert callable(dummy.error)
+
+
+class Ledger(object):
+    def __init__(self, size: int):
+        self.records = [{"id": i} for i in range(size, 0, -1)]
+        self.calls = 0
+
+    def decode(self, response: Response) -> object:
+        return response.json()
+
+    def get(self, path: str, data: dict = None) -> Response:
+        self.calls += 1
+        response = Response()
+        if path != "/ledger":
+            response.status_code = 404
+            response._content = b'{"message": "NotFound"}'
+            return response
+        # NOTE: Cursors behave exactly as they do on the fake exchange
+        records, headers = page([(r["id"], r) for r in reversed(self.records)], data)
+        response.status_code = 200
+        response._content = json.dumps(records).encode("utf-8")
+        response.headers.update(headers)
+        return response
+
+
+def test_pager_after():
+    ledger = Ledger(250)
+    pager = Pager(ledger, "/ledger")
+
+    assert isinstance(pager, Pager)
+    assert [r["id"] for r in pager] == list(range(250, 0, -1))
+    assert pager.count == 250
+    assert pager.pages == 4
+    assert pager.before == "250"
+    assert pager.after == "1"
+
+
+def test_collect():
+    ledger, data = Ledger(250), {"profile_id": "default"}
+    responses = collect(ledger, "/ledger", data)
+
+    assert [len(r.json()) for r in responses] == [100, 100, 50]
+    assert data == {"profile_id": "default"}
+    assert collect(ledger, "/missing")[0].status_code == 404
+
+
+def test_pager_bounds():
+    ledger = Ledger(250)
+    pager = Pager(ledger, "/ledger", {"limit": 20}, items=45)
+    assert len(list(pager)) == 45
+    assert ledger.calls == 3
+
+    ledger = Ledger(250)
+    for record in Pager(ledger, "/ledger", {"limit": 10}):
+        if record["id"] == 245:
+            break
+    assert ledger.calls == 1
+
+    ledger = Ledger(250)
+    assert list(Pager(ledger, "/ledger", seconds=-1)) == []
+    assert ledger.calls == 0
+
+
+def test_pager_batches():
+    ledger = Ledger(250)
+    pager = Pager(ledger, "/ledger", {"limit": 20}, items=45)
+
+    assert [len(records) for records in pager.batches()] == [20, 20, 5]
+    assert pager.count == 45
+    assert ledger.calls == 3
+
+
+def test_pager_before():
+    ledger = Ledger(250)
+    pager = Pager(ledger, "/ledger", {"before": 200, "limit": 20}, cursor="before")
+    records = [r["id"] for r in pager]
+
+    assert sorted(records) == list(range(201, 251))
+    assert pager.before == "250"
+    assert pager.after == "201"
+
+
+def test_pager_error():
+    with pytest.raises(HTTPError):
+        list(Pager(Ledger(10), "/missing"))
+
+    with pytest.raises(ValueError):
+        Pager(Ledger(10), "/ledger", cursor="sideways")
+
+
+def test_messenger_paginate(public_messenger):
+    pager = public_messenger.paginate("/fills", {"product_id": "BTC-USD"}, items=5)
+    assert isinstance(pager, Pager)
+    assert pager.messenger is public_messenger
+    assert pager.data == {"product_id": "BTC-USD", "limit": 100}
+    assert pager.items == 5
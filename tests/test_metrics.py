@@ -0,0 +1,111 @@
+import pytest
+from coinbase_pro.client import Product
+from coinbase_pro.limiter import Bucket, Limiter
+from coinbase_pro.messenger import API, Auth, Messenger
+from coinbase_pro.metrics import Collector, Event, Histogram, template
+from requests import ConnectionError
+
+
+def test_template():
+    assert template("/products") == "/products"
+    assert template("/products/BTC-USD/book") == "/products/{id}/book"
+    assert template("/products/BTC-USD/book?level=2") == "/products/{id}/book"
+    assert template("/orders/client:abc") == "/orders/{id}"
+    assert (
+        template("/accounts/71452118-efc7-4cc4-8780-a5e22d4baa53/ledger")
+        == "/accounts/{id}/ledger"
+    )
+    assert template("/payment-methods") == "/payment-methods"
+
+
+def test_histogram():
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.05, 0.5, 2.0):
+        histogram.observe(value)
+
+    assert histogram.count == 4
+    assert histogram.sum == pytest.approx(2.6)
+    assert histogram.cumulative() == [2, 3, 4]
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(1.0) == float("inf")
+
+
+def test_collector():
+    events = []
+    collector = Collector(hooks=[events.append])
+    collector.record(Event("GET", "/products/BTC-USD/ticker", 200, 0.02, 0.5, 0, 64))
+    collector.record(Event("GET", "/products/ETH-USD/ticker", 429, 0.01, 0.0, 0, 32))
+    collector.record(Event("GET", "/products/ETH-USD/ticker", error="Timeout"))
+    collector.decoded(0.0002)
+
+    snapshot = collector.snapshot()
+    endpoint = snapshot["requests"]["GET /products/{id}/ticker"]
+    assert len(events) == 3
+    assert endpoint["count"] == 3
+    assert endpoint["status"] == {"200": 1, "429": 1}
+    assert endpoint["errors"] == 1
+    assert endpoint["received"] == 96
+    assert endpoint["wait"]["sum"] == 0.5
+    assert snapshot["decode"]["count"] == 1
+
+    collector.reset()
+    assert collector.snapshot()["requests"] == {}
+
+
+def test_prometheus():
+    collector = Collector()
+    collector.record(Event("POST", "/orders", 200, 0.2, 0.0, 40, 120))
+    collector.record(Event("GET", "/time", 200, 0.1, retries=2))
+    collector.record(Event("GET", "/time", 200, 0.1, retries=1))
+    text = collector.prometheus()
+
+    assert "# TYPE coinbase_pro_request_seconds histogram" in text
+    assert (
+        'coinbase_pro_request_seconds_bucket{method="POST",path="/orders",le="0.25"} 1'
+        in text
+    )
+    assert (
+        'coinbase_pro_request_seconds_bucket{method="POST",path="/orders",le="+Inf"} 1'
+        in text
+    )
+    assert (
+        'coinbase_pro_responses_total{method="POST",path="/orders",status="200"} 1'
+        in text
+    )
+    assert 'coinbase_pro_sent_bytes_total{method="POST",path="/orders"} 40' in text
+    assert "coinbase_pro_decode_seconds_count 0" in text
+    assert "# HELP coinbase_pro_retries_total Retry attempts" in text
+    assert 'coinbase_pro_retries_total{method="GET",path="/time"} 3' in text
+
+
+def test_messenger_metrics(echo_auth: Auth):
+    collector = Collector()
+    limiter = Limiter(public=Bucket(10, 1))
+    messenger = Messenger(echo_auth, limiter=limiter, metrics=collector)
+    product = Product(messenger)
+
+    product.ticker("BTC-USD")
+    product.ticker("ETH-USD")
+    messenger.post("/orders", {"size": "0.01"})
+
+    snapshot = collector.snapshot()
+    ticker = snapshot["requests"]["GET /products/{id}/ticker"]
+    orders = snapshot["requests"]["POST /orders"]
+    assert ticker["count"] == 2
+    assert ticker["status"] == {"200": 2}
+    assert ticker["received"] > 0
+    assert ticker["wait"]["sum"] > 0
+    assert orders["sent"] == len(b'{"size": "0.01"}')
+    assert snapshot["decode"]["count"] == 2
+
+
+def test_messenger_metrics_error():
+    collector = Collector()
+    settings = {"rest": "http://127.0.0.1:9"}
+    messenger = Messenger(Auth(API(settings)), metrics=collector)
+
+    with pytest.raises(ConnectionError):
+        messenger.get("/time")
+    endpoint = collector.snapshot()["requests"]["GET /time"]
+    assert endpoint["errors"] == 1
+    assert endpoint["status"] == {}
@@ -0,0 +1,118 @@
+import json
+from array import array
+
+from coinbase_pro import models
+from coinbase_pro.client import Account, Order, Product
+from coinbase_pro.messenger import Pager
+from requests import Response
+
+
+def reply(status_code: int, payload: object) -> Response:
+    response = Response()
+    response.status_code = status_code
+    response._content = json.dumps(payload).encode("utf-8")
+    return response
+
+
+FILL = {
+    "trade_id": 74,
+    "order_id": "d50ec984-77a8-460a-b958-66f114b0de9b",
+    "product_id": "BTC-USD",
+    "price": "10.00",
+    "size": "0.01",
+    "fee": "0.00025",
+    "side": "buy",
+    "liquidity": "T",
+    "settled": True,
+}
+
+CANDLES = [
+    [1600000060, "9.5", "10.5", "10.0", "10.25", "3.5"],
+    [1600000000, 9.0, 11.0, 9.5, 10.0, 1.25],
+]
+
+
+class Feed(object):
+    def __init__(self, payload: object, status_code: int = 200):
+        self.payload = payload
+        self.status_code = status_code
+        self.paths = []
+
+    def decode(self, response: Response) -> object:
+        return response.json()
+
+    def get(self, path: str, data: dict = None) -> Response:
+        self.paths.append(path)
+        return reply(self.status_code, self.payload)
+
+    def post(self, path: str, data: dict = None) -> Response:
+        self.paths.append(path)
+        return reply(self.status_code, self.payload)
+
+
+def test_model_lazy():
+    fill = models.Fill.one(FILL)
+
+    assert not hasattr(fill, "__dict__")
+    assert fill._values[models.Fill.price.index] == "10.00"
+    assert fill.price == 10.0
+    assert fill._values[models.Fill.price.index] == 10.0
+    assert fill.size == 0.01
+    assert fill.side == "buy"
+    assert fill.usd_volume is None
+
+
+def test_model_dict():
+    fill = models.Fill.one(FILL)
+
+    assert fill.dict()["fee"] == 0.00025
+    assert fill == models.Fill.one(dict(FILL))
+    assert fill != models.Fill.one({**FILL, "size": "1"})
+    assert models.Fill(price="1.5").price == 1.5
+    assert "Fill(" in repr(fill)
+
+
+def test_candles():
+    candles = models.Candle.many(CANDLES)
+
+    assert isinstance(candles, models.Candles)
+    assert len(candles) == 2
+    assert isinstance(candles.time, array)
+    assert list(candles.time) == [1600000060, 1600000000]
+    assert list(candles.close) == [10.25, 10.0]
+    assert candles[0].low == 9.5
+    assert [candle.volume for candle in candles] == [3.5, 1.25]
+
+
+def test_typed_client():
+    feed = Feed([FILL, FILL])
+    fills = Order(feed).fills({"product_id": "BTC-USD"}, typed=True)
+
+    assert len(fills) == 2
+    assert all(isinstance(fill, models.Fill) for fill in fills)
+    assert Order(feed).fills({"product_id": "BTC-USD"}) == [FILL, FILL]
+
+    ticker = Product(Feed({"price": "333.99", "trade_id": 4729088})).ticker(
+        "BTC-USD", typed=True
+    )
+    assert isinstance(ticker, models.Ticker)
+    assert ticker.price == 333.99
+
+    candles = Product(Feed(CANDLES)).candles("BTC-USD", typed=True)
+    assert isinstance(candles, models.Candles)
+
+
+def test_typed_error():
+    feed = Feed({"message": "NotFound"}, 404)
+    payload = Account(feed).ledger("missing", typed=True)
+
+    assert payload == {"message": "NotFound"}
+
+
+def test_typed_pager():
+    feed = Feed([FILL])
+    pager = Pager(feed, "/fills", {"product_id": "BTC-USD"}, items=1, model=models.Fill)
+
+    records = list(pager)
+    assert len(records) == 1
+    assert isinstance(records[0], models.Fill)
@@ -0,0 +1,133 @@
+import time
+
+import pytest
+from coinbase_pro.client import CoinbasePro, Order
+from coinbase_pro.limiter import Bucket, Limiter
+from coinbase_pro.messenger import API, Auth, Messenger
+from coinbase_pro.pool import Pool
+from coinbase_pro.scheduler import Scheduler
+from coinbase_pro.server import Server
+from requests import ConnectionError
+
+
+def messenger(settings: dict, rate: float = 10_000) -> Messenger:
+    limiter = Limiter(Bucket(rate, 1), Bucket(rate, 1))
+    return Messenger(Auth(API(settings)), limiter)
+
+
+def test_pool_routes_profiles(server: Server):
+    pool = Pool([messenger(server.register()) for _ in range(3)])
+    profiles = pool.discover()
+    client = CoinbasePro(pool)
+
+    assert len(profiles) == 3
+    for profile_id, member in profiles.items():
+        order = client.order.post(
+            {
+                "profile_id": profile_id,
+                "product_id": "BTC-USD",
+                "side": "buy",
+                "type": "limit",
+                "price": "1.00",
+                "size": "0.01",
+            }
+        )
+        assert order["profile_id"] == profile_id
+        assert CoinbasePro(member).order.get(order["id"])["id"] == order["id"]
+
+    for member in pool.messengers:
+        account = CoinbasePro(member).account.list()[0]
+        assert client.account.get(account["id"])["profile_id"] == account["profile_id"]
+
+    with pytest.raises(ValueError):
+        pool.route("/orders", {"profile_id": "missing"})
+
+
+def test_pool_public(server: Server):
+    pool = Pool([messenger(server.register()) for _ in range(3)])
+    client = CoinbasePro(pool)
+    for _ in range(9):
+        client.product.ticker("BTC-USD")
+    client.order.list({})
+
+    assert pool.counts == [10, 0, 0]
+    assert [b["key"] for b in pool.budgets()] == [m.api.key for m in pool.messengers]
+
+
+def test_pool_counts_members(server: Server):
+    settings = server.register()
+    pool = Pool([messenger(settings), messenger(settings)])
+    pool.register("other", pool.messengers[1])
+    client = CoinbasePro(pool)
+    client.order.list({"profile_id": "other"})
+    client.order.list({})
+
+    assert pool.counts == [1, 1]
+    assert [b["requests"] for b in pool.budgets()] == [1, 1]
+
+
+def test_pool_scheduler(server: Server):
+    members = [messenger(server.register()) for _ in range(2)]
+    pool = Pool(members)
+    pool.discover()
+    scheduler = Scheduler(pool)
+    try:
+        client = CoinbasePro(scheduler)
+        for member in members:
+            account = CoinbasePro(member).account.list()[0]
+            assert client.account.get(account["id"])["id"] == account["id"]
+        assert client.product.ticker("BTC-USD")["price"]
+    finally:
+        scheduler.close()
+
+    assert pool.cache is None
+    assert pool.counts == [2, 1]
+
+
+def test_pool_place_lookup(server: Server):
+    members = [messenger(server.register()) for _ in range(2)]
+    pool = Pool(members)
+    profile_id = next(p for p, m in pool.discover().items() if m is members[1])
+    post = members[1].post
+
+    def lost(path: str, data: dict = None):
+        # NOTE: The order is placed but its response never arrives
+        post(path, data)
+        raise ConnectionError("connection reset")
+
+    members[1].post = lost
+    order = {
+        "profile_id": profile_id,
+        "client_oid": "3c0a7e3e-2f52-4a45-9d57-7a8c1f0c4a11",
+        "product_id": "BTC-USD",
+        "side": "buy",
+        "type": "limit",
+        "price": "1.00",
+        "size": "0.01",
+    }
+    response = Order(pool).place(order, wait=1.0)
+
+    assert response.json()["profile_id"] == profile_id
+    assert response.json()["client_oid"] == order["client_oid"]
+
+
+def test_pool_throughput(server: Server):
+    members = [messenger(server.register(), rate=40) for _ in range(4)]
+    pool = Pool(members)
+    pool.discover()
+    accounts = [CoinbasePro(m).account.list()[0]["id"] for m in members]
+    time.sleep(0.1)
+
+    def elapsed(target, account_ids: list) -> float:
+        client = CoinbasePro(target)
+        start = time.perf_counter()
+        for i in range(12):
+            client.account.get(account_ids[i % len(account_ids)])
+        return time.perf_counter() - start
+
+    single = elapsed(members[0], accounts[:1])
+    time.sleep(0.1)
+    pooled = elapsed(pool, accounts)
+
+    assert single > 0.25
+    assert pooled < single / 2
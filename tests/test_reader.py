@@ -0,0 +1,194 @@
+import json
+import threading
+import time
+
+import pytest
+from coinbase_pro.reader import BLOCK, COALESCE, DROP, Reader, Ring
+from coinbase_pro.socket import Stream
+
+
+class Script(object):
+    # NOTE: A socket that plays a fixed list of messages and then disconnects
+    def __init__(self, messages: list, hold: threading.Event = None):
+        self.messages = [json.dumps(message) for message in messages]
+        self.connected = True
+        self.hold = hold
+        self.sent = 0
+
+    def recv(self) -> str:
+        # NOTE: With a hold, only the first message is sent until it is set
+        if self.hold is not None and self.sent:
+            self.hold.wait(5.0)
+        self.sent += 1
+        if not self.messages:
+            self.connected = False
+            return ""
+        return self.messages.pop(0)
+
+    def close(self) -> None:
+        self.connected = False
+
+
+def ticker(product_id: str, sequence: int) -> dict:
+    return {"type": "ticker", "product_id": product_id, "sequence": sequence}
+
+
+def scripted(messages: list, hold: threading.Event = None) -> Stream:
+    stream = Stream()
+    stream.socket = Script(messages, hold)
+    return stream
+
+
+def wait(predicate, seconds: float = 5.0):
+    deadline = time.monotonic() + seconds
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_ring():
+    ring = Ring(3, DROP)
+    for sequence in range(5):
+        ring.put(ticker("BTC-USD", sequence))
+    assert [ring.get()["sequence"] for _ in range(3)] == [2, 3, 4]
+    assert ring.snapshot()["dropped"] == 2
+
+    ring = Ring(2, COALESCE)
+    for sequence in range(6):
+        ring.put(ticker("BTC-USD" if sequence % 2 else "ETH-USD", sequence))
+    blocked = threading.Thread(target=ring.put, args=({"type": "subscriptions"},))
+    blocked.start()
+    time.sleep(0.05)
+    assert blocked.is_alive()
+    assert [ring.get()["sequence"] for _ in range(2)] == [4, 5]
+    blocked.join(1.0)
+    assert ring.get()["type"] == "subscriptions"
+    assert ring.snapshot()["coalesced"] == 4
+    assert ring.snapshot()["dropped"] == 0
+
+    ring = Ring(1, BLOCK)
+    ring.put(ticker("BTC-USD", 0))
+    blocked = threading.Thread(target=ring.put, args=(ticker("BTC-USD", 1),))
+    blocked.start()
+    time.sleep(0.05)
+    assert blocked.is_alive() and len(ring) == 1
+    assert ring.get()["sequence"] == 0
+    blocked.join(1.0)
+    assert ring.get()["sequence"] == 1
+    ring.close()
+    assert ring.get() is None
+
+    with pytest.raises(ValueError):
+        Ring(1, "newest")
+
+
+def test_ring_coalesce_deltas():
+    ring = Ring(4, COALESCE)
+    update = {"type": "l2update", "product_id": "BTC-USD"}
+    ring.put(dict(update, changes=[["buy", "1.00", "1"]]))
+    ring.put(dict(update, changes=[["buy", "2.00", "1"]]))
+    ring.put(ticker("BTC-USD", 0))
+    ring.put(ticker("BTC-USD", 1))
+
+    snapshot = ring.snapshot()
+    assert snapshot["coalesced"] == 0 and snapshot["depth"] == 4
+
+    blocked = threading.Thread(target=ring.put, args=(dict(update, changes=[]),))
+    blocked.start()
+    ring.put(ticker("BTC-USD", 2))
+    time.sleep(0.05)
+    assert blocked.is_alive() and ring.snapshot()["coalesced"] == 1
+
+    messages = [ring.get() for _ in range(4)]
+    blocked.join(1.0)
+    assert [m.get("sequence") for m in messages] == [None, None, 0, 2]
+    assert ring.get()["changes"] == []
+
+
+def test_reader_dispatch():
+    products = ["BTC-USD", "ETH-USD", "SOL-USD"]
+    messages = [ticker(products[i % 3], i) for i in range(300)]
+    messages.append({"type": "heartbeat", "product_id": "BTC-USD"})
+    reader = Reader(scripted(messages), workers=3)
+    seen, btc, everything = [], [], []
+    lock = threading.Lock()
+
+    def record(message: dict):
+        with lock:
+            seen.append(message)
+
+    reader.on(record, "ticker")
+    reader.on(btc.append, "ticker", "BTC-USD")
+    reader.on(everything.append, product_id="BTC-USD")
+    reader.on(lambda message: 1 / 0, "heartbeat")
+    with reader:
+        wait(lambda: reader.dispatched == 301)
+
+    assert len(seen) == 300
+    assert [m["sequence"] for m in btc] == list(range(0, 300, 3))
+    assert len(everything) == 101
+    for product_id in products:
+        ordered = [m["sequence"] for m in seen if m["product_id"] == product_id]
+        assert ordered == sorted(ordered)
+    stats = reader.stats()
+    assert stats["received"] == 301
+    assert stats["errors"] == 1 and isinstance(reader.error, ZeroDivisionError)
+    assert stats["dropped"] == 0 and stats["depth"] == 0
+
+
+@pytest.mark.parametrize(
+    "policy, handled, dropped, coalesced",
+    [(BLOCK, 50, 0, 0), (DROP, 5, 45, 0), (COALESCE, 5, 0, 45)],
+)
+def test_reader_backpressure(policy: str, handled: int, dropped: int, coalesced: int):
+    # NOTE: The worker is held on its first message until the socket is drained
+    messages = [ticker("BTC-USD" if i % 2 else "ETH-USD", i) for i in range(50)]
+    started, gate, calls = threading.Event(), threading.Event(), []
+    reader = Reader(scripted(messages, started), 1, capacity=4, policy=policy)
+
+    def handle(message: dict):
+        calls.append(message)
+        started.set()
+        gate.wait(5.0)
+
+    reader.on(handle)
+    reader.start()
+    if BLOCK != policy:
+        wait(lambda: reader.received == 50)
+        assert reader.stats()["depth"] == 4
+    gate.set()
+    wait(lambda: reader.received == 50)
+    wait(lambda: reader.stats()["depth"] == 0)
+    reader.stop()
+
+    stats = reader.stats()
+    assert len(calls) == handled
+    assert stats["dropped"] == dropped
+    assert stats["coalesced"] == coalesced
+    assert max(m["sequence"] for m in calls) == 49
+    assert stats["rings"][0]["peak"] <= 4
+
+
+def test_reader_receive_error():
+    class Closed(Script):
+        def recv(self) -> str:
+            if not self.messages:
+                raise ConnectionError("socket is already closed")
+            return super().recv()
+
+    stream = Stream()
+    stream.socket = Closed([ticker("BTC-USD", 0)])
+    calls = []
+    reader = Reader(stream, workers=1)
+    reader.on(calls.append)
+    reader.start()
+    wait(lambda: not reader.running and reader.dispatched == 1)
+
+    assert reader.errors == 1 and isinstance(reader.error, ConnectionError)
+    assert all(ring.closed for ring in reader.rings)
+
+    stream.socket = Closed([ticker("BTC-USD", 1)])
+    reader.start()
+    wait(lambda: not reader.running and reader.dispatched == 2)
+    reader.stop()
+    assert [m["sequence"] for m in calls] == [0, 1]
@@ -0,0 +1,113 @@
+import asyncio
+from email.utils import formatdate
+from time import time
+
+import pytest
+from coinbase_pro.batch import gather
+from coinbase_pro.limiter import Bucket, Limiter
+from coinbase_pro.messenger import API, Auth, Messenger
+from coinbase_pro.metrics import Collector
+from coinbase_pro.retry import Retry, after
+from coinbase_pro.server import Exchange, Server
+
+
+def messenger(settings: dict, retry: Retry = None, events: list = None) -> Messenger:
+    limiter = Limiter(Bucket(10_000, 10_000), Bucket(10_000, 10_000))
+    collector = Collector([events.append] if events is not None else None)
+    return Messenger(Auth(API(settings)), limiter, metrics=collector, retry=retry)
+
+
+def test_after():
+    assert after("2") == 2.0
+    assert after("0.25") == 0.25
+    assert after(None) is None
+    assert after("soon") is None
+    assert 55 < after(formatdate(time() + 60, usegmt=True)) <= 60
+
+
+def test_retryable():
+    retry = Retry(attempts=2)
+
+    assert retry.retryable("GET", 503, 0) is True
+    assert retry.retryable("GET", None, 1) is True
+    assert retry.retryable("GET", 503, 2) is False
+    assert retry.retryable("GET", 400, 0) is False
+    assert retry.retryable("DELETE", 502, 0) is True
+    assert retry.retryable("POST", 503, 0) is False
+    assert retry.retryable("POST", None, 0) is False
+    assert retry.retryable("POST", 429, 0) is True
+    assert Retry(statuses=(503,)).retryable("POST", 429, 0) is False
+
+
+@pytest.mark.parametrize("attempt", [0, 1, 4, 10])
+def test_backoff(attempt: int):
+    retry = Retry(base=0.1, cap=1.0)
+    delays = [retry.backoff(attempt) for _ in range(50)]
+
+    assert all(0 <= d <= min(1.0, 0.1 * 2**attempt) for d in delays)
+    assert len(set(delays)) > 1
+    assert retry.backoff(attempt, {"Retry-After": "0.5"}) == 0.5
+    assert retry.backoff(attempt, {"Retry-After": "30"}) == 1.0
+
+
+def test_messenger_retries(server: Server):
+    events = []
+    client = messenger(server.register(), Retry(base=0.01), events)
+    server.exchange.faults = 2
+
+    response = client.get("/accounts")
+    assert response.status_code == 200
+    assert events[-1].retries == 2
+
+    server.exchange.faults = 5
+    assert client.get("/accounts").status_code == 503
+    assert events[-1].retries == 3
+
+    server.exchange.faults = 1
+    order = {"product_id": "BTC-USD", "side": "buy", "price": "1.0", "size": "1.0"}
+    assert client.post("/orders", order).status_code == 503
+    assert events[-1].retries == 0
+    assert client.metrics.snapshot()["requests"]["GET /accounts"]["retries"] == 5
+
+
+def test_messenger_rate_limited():
+    events = []
+    with Server(Exchange(limits=True)) as server:
+        client = messenger({"rest": server.url}, events=events)
+        statuses = [client.get("/time").status_code for _ in range(30)]
+
+        assert statuses == [200] * 30
+        assert server.exchange.statuses[429] == sum(e.retries for e in events)
+        assert server.exchange.statuses[429] > 0
+
+
+def test_messenger_reuse(server: Server):
+    client = messenger(server.register(), Retry(attempts=0))
+    for _ in range(10):
+        client.get("/time")
+    assert client.reuse() == {"opened": 1, "requests": 10, "reused": 9}
+
+    batch = gather(lambda _: client.get("/time"), range(64), workers=8)
+    assert batch.ok
+    reuse = client.reuse()
+    assert reuse["opened"] <= 8
+    assert reuse["requests"] == 74
+
+
+def test_async_messenger_retries(server: Server):
+    pytest.importorskip("aiohttp")
+    from coinbase_pro.aio.messenger import AsyncMessenger
+
+    events = []
+    server.exchange.faults = 2
+
+    async def run():
+        limiter = Limiter(Bucket(10_000, 10_000), Bucket(10_000, 10_000))
+        auth = Auth(API(server.register()))
+        retry = Retry(base=0.01)
+        collector = Collector([events.append])
+        async with AsyncMessenger(auth, limiter, None, None, collector, retry) as m:
+            return await m.get("/accounts")
+
+    assert asyncio.run(run()).status_code == 200
+    assert events[-1].retries == 2
@@ -0,0 +1,106 @@
+import threading
+import time
+
+import pytest
+from coinbase_pro.client import CoinbasePro
+from coinbase_pro.limiter import Bucket, Limiter
+from coinbase_pro.messenger import API, Auth, Messenger
+from coinbase_pro.metrics import Collector
+from coinbase_pro.scheduler import (
+    ACCOUNT,
+    BACKFILL,
+    CANCEL,
+    MARKET,
+    ORDER,
+    Scheduler,
+    classify,
+)
+from coinbase_pro.server import Server
+
+
+def schedule(server: Server, rate: float, **kwargs) -> Scheduler:
+    paths = []
+    collector = Collector([lambda event: paths.append(event.path)])
+    limiter = Limiter(Bucket(rate, 1), Bucket(rate, 1))
+    messenger = Messenger(Auth(API(server.register())), limiter, metrics=collector)
+    return Scheduler(messenger, **kwargs), paths
+
+
+def test_classify():
+    assert classify("POST", "/orders") == ORDER
+    assert classify("DELETE", "/orders/abc") == CANCEL
+    assert classify("DELETE", "/orders") == CANCEL
+    assert classify("GET", "/orders") == ACCOUNT
+    assert classify("GET", "/accounts/abc") == ACCOUNT
+    assert classify("GET", "/accounts/abc/ledger") == BACKFILL
+    assert classify("GET", "/products/BTC-USD/candles") == BACKFILL
+    assert classify("GET", "/products/BTC-USD/ticker") == MARKET
+
+
+def test_scheduler_priority(server: Server):
+    scheduler, paths = schedule(server, rate=20)
+    client = CoinbasePro(scheduler)
+    order = {
+        "product_id": "BTC-USD",
+        "side": "buy",
+        "type": "limit",
+        "price": "1.00",
+        "size": "0.01",
+    }
+    backfills = [
+        threading.Thread(target=client.product.candles, args=("BTC-USD",))
+        for _ in range(8)
+    ]
+    for thread in backfills:
+        thread.start()
+    time.sleep(0.1)
+    placed = client.order.post(order)
+    for thread in backfills:
+        thread.join()
+    scheduler.close()
+
+    assert placed["status"] == "open"
+    assert paths.index("/orders") < 5
+    snapshot = scheduler.snapshot()
+    assert snapshot[ORDER]["dispatched"] == 1
+    assert snapshot[BACKFILL]["dispatched"] == 8
+    assert snapshot[BACKFILL]["delay"]["sum"] > snapshot[ORDER]["delay"]["sum"]
+    assert scheduler.pending == 0
+
+
+def test_scheduler_aging(server: Server):
+    scheduler, paths = schedule(server, rate=20, aging=0.01)
+    client = CoinbasePro(scheduler)
+    threads = [
+        threading.Thread(target=client.product.candles, args=("BTC-USD",)),
+        threading.Thread(target=client.product.ticker, args=("BTC-USD",)),
+    ]
+    client.time.get()
+    for thread in threads:
+        thread.start()
+        time.sleep(0.02)
+    for thread in threads:
+        thread.join()
+    scheduler.close()
+
+    # NOTE: The backfill waited long enough to overtake market data
+    assert paths[1:] == ["/products/BTC-USD/candles", "/products/BTC-USD/ticker"]
+
+
+def test_scheduler_deadline(server: Server):
+    scheduler, paths = schedule(server, rate=2, deadlines={BACKFILL: 0.05})
+    client = CoinbasePro(scheduler)
+    client.time.get()
+    with pytest.raises(TimeoutError):
+        client.product.candles("BTC-USD")
+    with scheduler.priority(ORDER):
+        assert "iso" in client.time.get()
+    scheduler.close()
+
+    snapshot = scheduler.snapshot()
+    assert snapshot[BACKFILL]["expired"] == 1
+    assert snapshot[ORDER]["dispatched"] == 1
+    assert paths == ["/time", "/time"]
+    with pytest.raises(ValueError):
+        with scheduler.priority("urgent"):
+            pass
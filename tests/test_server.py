@@ -0,0 +1,101 @@
+import pytest
+from coinbase_pro.client import CoinbasePro
+from coinbase_pro.limiter import Bucket, Limiter
+from coinbase_pro.messenger import API, Auth, Messenger
+from coinbase_pro.retry import Retry
+from coinbase_pro.server import Exchange, Server, page
+
+
+def client(settings: dict, retry: Retry = None) -> CoinbasePro:
+    limiter = Limiter(Bucket(10_000, 10_000), Bucket(10_000, 10_000))
+    return CoinbasePro(Messenger(Auth(API(settings)), limiter=limiter, retry=retry))
+
+
+def test_page():
+    records = [(i, {"id": i}) for i in range(1, 11)]
+
+    items, headers = page(records, {"limit": "3"})
+    assert [item["id"] for item in items] == [10, 9, 8]
+    assert headers == {"CB-BEFORE": "10", "CB-AFTER": "8"}
+
+    items, headers = page(records, {"limit": "3", "after": "8"})
+    assert [item["id"] for item in items] == [7, 6, 5]
+
+    items, headers = page(records, {"limit": "3", "before": "5"})
+    assert [item["id"] for item in items] == [8, 7, 6]
+
+    items, headers = page(records, {"after": "1"})
+    assert items == [] and headers == {}
+
+
+def test_public(server: Server):
+    public = client({"rest": server.url})
+
+    assert "epoch" in public.time.get()
+    assert [p["id"] for p in public.product.list()] == list(server.exchange)
+    book = public.product.book("BTC-USD", {"level": 2})
+    assert float(book["bids"][0][0]) < float(book["asks"][0][0])
+    assert len(public.product.candles("BTC-USD", {"granularity": 60})) == 300
+    assert public.product.get("NOPE-USD") == {"message": "NotFound"}
+
+
+def test_signature(server: Server):
+    assert isinstance(client(server.settings).account.list(), list)
+
+    forged = dict(server.settings, secret="c2VjcmV0")
+    assert client(forged).account.list() == {"message": "invalid signature"}
+    anonymous = client({"rest": server.url})
+    assert anonymous.account.list() == {"message": "Invalid API Key"}
+
+
+def test_orders(server: Server):
+    private = client(server.register())
+    order = {"product_id": "BTC-USD", "side": "buy", "type": "limit"}
+    ask = private.product.book("BTC-USD")["asks"][0]
+
+    taker = private.order.post(dict(order, price=ask[0], size="0.1"))
+    assert taker["status"] == "done" and taker["done_reason"] == "filled"
+
+    maker = private.order.post(dict(order, price="1.00", size="0.1", client_oid="x"))
+    assert maker["status"] == "open"
+    assert private.order.get("client:x")["id"] == maker["id"]
+    assert private.order.list({})[0]["id"] == maker["id"]
+
+    fills = private.order.fills({"product_id": "BTC-USD"})
+    assert len(fills) == 1 and fills[0]["liquidity"] == "T"
+    assert private.order.cancel(maker["id"]) == maker["id"]
+    assert private.order.get(maker["id"]) == {"message": "NotFound"}
+
+    broke = dict(order, price="1.00", size="100000000")
+    assert private.order.post(broke) == {"message": "Insufficient funds"}
+
+
+def test_pagination(server: Server):
+    private = client(server.register())
+    for _ in range(7):
+        private.order.post(
+            {"product_id": "ETH-USD", "side": "sell", "type": "market", "size": "0.1"}
+        )
+    data = {"product_id": "ETH-USD", "limit": 3}
+    pager = private.messenger.paginate("/fills", data)
+
+    fills = list(pager)
+    assert len(fills) == 7
+    assert pager.pages == 4
+    assert len({fill["trade_id"] for fill in fills}) == 7
+
+
+def test_limits():
+    with Server(Exchange(limits=True)) as server:
+        messenger = client({"rest": server.url}, Retry(attempts=0)).messenger
+        statuses = [messenger.get("/time").status_code for _ in range(30)]
+
+        assert 429 in statuses
+        assert server.exchange.statuses[429] == statuses.count(429)
+
+
+@pytest.mark.parametrize("skew", [-120.0, 120.0])
+def test_expired(skew: float):
+    with Server(Exchange(skew=skew)) as server:
+        payload = client(server.settings).account.list()
+        assert payload == {"message": "request timestamp expired"}
@@ -3,8 +3,12 @@ from coinbase_pro.socket import Token
 from coinbase_pro.socket import Stream
 from coinbase_pro.socket import get_message
 
+import base64
+
 import pytest
 
+from tests.conftest import reference
+
 
 def test_message():
     message: dict = get_message()
@@ -50,6 +54,18 @@ def test_token(token: Token):
     assert callable(token.header)
 
 
+def test_token_signature():
+    secret = base64.b64encode(b"secret").decode("utf-8")
+    token = Token(WSS({"key": "key", "secret": secret, "passphrase": "pass"}))
+    header = token()
+
+    message = f"{header['timestamp']}GET/users/self/verify"
+    assert header['signature'] == reference(secret, message)
+    assert header['key'] == 'key'
+    assert header['passphrase'] == 'pass'
+    assert token.mac is token.mac
+
+
 def test_public_stream(public_stream: Stream):
     message: dict = get_message()
 
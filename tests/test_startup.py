@@ -0,0 +1,71 @@
+import json
+import subprocess
+import sys
+
+import pytest
+from coinbase_pro.client import SUBSCRIBERS, CoinbasePro, Product, get_client
+from coinbase_pro.messenger import Messenger
+
+# NOTE: Startup is mainly checked by which modules get loaded; the budget is
+# generous so it only catches an eager heavy import on a slow machine
+IMPORT_BUDGET: float = 0.5
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"elapsed": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+
+def probe(code: str) -> dict:
+    code = PROBE.format(code=code)
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, check=True, text=True
+    ).stdout
+    return json.loads(output)
+
+
+@pytest.mark.parametrize(
+    "module,deferred",
+    [
+        ("coinbase_pro.socket", ["requests", "websocket"]),
+        ("coinbase_pro.client", ["requests", "websocket"]),
+        ("coinbase_pro.messenger", ["requests", "websocket"]),
+    ],
+)
+def test_import(module: str, deferred: list):
+    result = probe(f"import {module}")
+
+    for name in deferred:
+        assert name not in result["modules"]
+
+
+def test_import_budget():
+    result = probe("from coinbase_pro.client import get_client\nget_client().product")
+
+    assert "requests" not in result["modules"]
+    assert result["elapsed"] < IMPORT_BUDGET
+
+
+def test_lazy_client():
+    messenger = Messenger()
+    client = CoinbasePro(messenger)
+
+    assert "product" not in vars(client)
+    assert isinstance(client.product, Product)
+    assert client.product is client.product
+    assert client.product.messenger is messenger
+    assert set(SUBSCRIBERS) <= set(dir(client))
+    with pytest.raises(AttributeError):
+        client.missing
+
+
+def test_client_modules():
+    result = probe("import coinbase_pro.client")
+
+    assert "coinbase_pro.client" in result["modules"]
+    for name in ("requests", "websocket", "aiohttp", "numpy"):
+        assert name not in result["modules"]
+    assert get_client().product is not get_client().product
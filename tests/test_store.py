@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from coinbase_pro.plugin.history import CANDLE, History
+from coinbase_pro.plugin.store import Series, Store
+
+from tests.conftest import Candles
+
+START = 1_599_999_960
+
+
+def candles(start: int, count: int, granularity: int = 60) -> np.ndarray:
+    rows = [
+        (start + i * granularity, 1.0, 2.0, 1.5, float(i), 10.0) for i in range(count)
+    ]
+    return np.array(rows, dtype=CANDLE)
+
+
+def test_append(tmp_path):
+    store = Store(str(tmp_path))
+    assert len(store.open("BTC-USD")) == 0
+    assert store.open("BTC-USD").last is None
+
+    assert store.append("BTC-USD", 60, candles(START, 100)) == 100
+    assert store.append("BTC-USD", 60, candles(START + 50 * 60, 100)) == 50
+    assert store.append("BTC-USD", 60, candles(START, 10)) == 0
+
+    series = store.open("BTC-USD", 60)
+    assert isinstance(series, Series)
+    assert len(series) == 150
+    assert series.first == START
+    assert series.last == START + 149 * 60
+    assert isinstance(series["close"], np.memmap)
+    assert np.all(np.diff(series["time"]) == 60)
+
+
+def test_between(tmp_path):
+    store = Store(str(tmp_path))
+    store.append("BTC-USD", 60, candles(START, 1000))
+    series = store.open("BTC-USD", 60)
+
+    window = series.between(START + 60 * 10, START + 60 * 19)
+    assert len(window["time"]) == 10
+    assert window["time"][0] == START + 60 * 10
+    assert np.shares_memory(window["close"], series["close"])
+
+    assert series.index(START - 60, START - 1) == slice(0, 0)
+    assert series.index() == slice(0, 1000)
+
+
+def test_partial_row(tmp_path):
+    store = Store(str(tmp_path))
+    store.append("BTC-USD", 60, candles(START, 10))
+
+    # NOTE: Simulate a crash after only some of the columns were appended
+    path = os.path.join(store.path("BTC-USD", 60), "close.bin")
+    with open(path, "ab") as file:
+        file.write(np.float64(1.0).tobytes())
+    assert len(store.open("BTC-USD", 60)) == 10
+
+    assert store.append("BTC-USD", 60, candles(START + 600, 5)) == 5
+    series = store.open("BTC-USD", 60)
+    assert len(series) == 15
+    assert series["close"][10] == 0.0
+
+
+def test_sync(tmp_path):
+    store = Store(str(tmp_path))
+    exchange = Candles()
+    history = History(exchange)
+
+    with pytest.raises(ValueError):
+        store.sync(history, "BTC-USD", 60)
+
+    end = START + 60 * 500
+    assert store.sync(history, "BTC-USD", 60, START, end) == 501
+    assert len(exchange.calls) == 2
+
+    exchange.calls.clear()
+    assert store.sync(history, "BTC-USD", 60, START, end + 60 * 100) == 100
+    assert exchange.calls == [end + 60]
+    assert store.sync(history, "BTC-USD", 60, START, end + 60 * 100) == 0
@@ -0,0 +1,165 @@
+import asyncio
+import json
+import threading
+import time
+from socket import create_server
+
+import pytest
+
+web = pytest.importorskip('aiohttp.web')
+
+from websocket import WebSocketTimeoutException
+
+from coinbase_pro.retry import Retry
+from coinbase_pro.socket import WSS, SupervisedStream, Token
+
+
+class Feed(object):
+    # NOTE: A websocket feed on its own thread that sends a ticker every 10ms
+    # to each connection until it is dropped or stalled
+    def __init__(self):
+        self.connections = 0
+        self.requests = []
+        self.sockets = []
+        self.ready = threading.Event()
+
+    async def handle(self, request):
+        self.connections += 1
+        socket = web.WebSocketResponse(autoping=False)
+        await socket.prepare(request)
+        socket.stalled = False
+        self.sockets.append(socket)
+
+        async def publish():
+            while not socket.closed:
+                if not socket.stalled:
+                    await socket.send_json({'type': 'ticker', 'product_id': 'BTC-USD'})
+                await asyncio.sleep(0.01)
+
+        task = asyncio.ensure_future(publish())
+        async for payload in socket:
+            if payload.type == web.WSMsgType.PING and not socket.stalled:
+                await socket.pong(payload.data)
+            elif payload.type == web.WSMsgType.TEXT:
+                self.requests.append(json.loads(payload.data))
+        task.cancel()
+        return socket
+
+    def run(self):
+        self.loop = asyncio.new_event_loop()
+        app = web.Application()
+        app.router.add_get('/', self.handle)
+        runner = web.AppRunner(app)
+        self.loop.run_until_complete(runner.setup())
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        self.loop.run_until_complete(site.start())
+        self.url = f'ws://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/'
+        self.ready.set()
+        self.loop.run_forever()
+
+    def start(self) -> str:
+        threading.Thread(target=self.run, daemon=True).start()
+        self.ready.wait()
+        return self.url
+
+    def drop(self):
+        for socket in self.sockets:
+            asyncio.run_coroutine_threadsafe(socket.close(), self.loop).result()
+
+    def stall(self):
+        for socket in self.sockets:
+            socket.stalled = True
+
+
+@pytest.fixture(scope='module')
+def feed() -> Feed:
+    feed = Feed()
+    feed.start()
+    return feed
+
+
+def supervised(feed: Feed, timeout: float = 0.1) -> SupervisedStream:
+    retry = Retry(attempts=5, base=0.01, cap=0.05)
+    stream = SupervisedStream(Token(WSS({'feed': feed.url})), timeout=timeout, retry=retry)
+    assert stream.connect() is True
+    stream.subscribe(['BTC-USD', 'ETH-USD'], ['ticker'])
+    return stream
+
+
+def test_supervised_reconnects(feed: Feed):
+    stream = supervised(feed)
+    connections = feed.connections
+    assert stream.receive()['type'] == 'ticker'
+
+    feed.drop()
+    for _ in range(20):
+        assert stream.receive()['type'] == 'ticker'
+
+    stats = stream.stats()
+    assert feed.connections == connections + 1
+    assert stats['reconnects'] == 1
+    assert stats['downtime'] > 0
+    assert stream.subscriptions == {
+        'heartbeat': ['BTC-USD', 'ETH-USD'],
+        'ticker': ['BTC-USD', 'ETH-USD'],
+    }
+    resubscribed = feed.requests[-1]
+    assert resubscribed['type'] == 'subscribe'
+    assert resubscribed['channels'] == [
+        {'name': 'ticker', 'product_ids': ['BTC-USD', 'ETH-USD']},
+        {'name': 'heartbeat', 'product_ids': ['BTC-USD', 'ETH-USD']},
+    ]
+
+    stream.unsubscribe(['ETH-USD'], ['ticker', 'heartbeat'])
+    assert stream.subscriptions == {'heartbeat': ['BTC-USD'], 'ticker': ['BTC-USD']}
+    assert stream.disconnect() is True
+    assert stream.receive() == {}
+
+
+def test_supervised_stall(feed: Feed):
+    stream = supervised(feed)
+    connections = feed.connections
+    assert stream.receive()['type'] == 'ticker'
+
+    feed.stall()
+    start = time.monotonic()
+    while stream.stats()['stalls'] == 0:
+        stream.receive()
+
+    assert time.monotonic() - start < 1.0
+    assert feed.connections == connections + 1
+    assert stream.stats()['error'] == 'stalled'
+    assert stream.receive()['type'] == 'ticker'
+    stream.disconnect()
+
+
+def test_supervised_ping_error(feed: Feed):
+    stream = supervised(feed)
+    connections = feed.connections
+    assert stream.receive()['type'] == 'ticker'
+
+    def ping(*args):
+        raise BrokenPipeError('broken pipe')
+
+    stream.socket.ping = ping
+    feed.stall()
+    while stream.stats()['reconnects'] == 0:
+        stream.receive()
+
+    assert feed.connections == connections + 1
+    assert stream.stats()['stalls'] == 0
+    assert stream.receive()['type'] == 'ticker'
+    stream.disconnect()
+
+
+def test_supervised_handshake_timeout():
+    # NOTE: A listener that never accepts, so the handshake gets no reply
+    listener = create_server(('127.0.0.1', 0))
+    url = f'ws://127.0.0.1:{listener.getsockname()[1]}/'
+    stream = SupervisedStream(Token(WSS({'feed': url})), timeout=0.1)
+
+    start = time.monotonic()
+    with pytest.raises(WebSocketTimeoutException):
+        stream.connect()
+    assert time.monotonic() - start < 1.0
+    listener.close()
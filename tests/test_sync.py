@@ -0,0 +1,119 @@
+import json
+import os
+
+import pytest
+from coinbase_pro.client import CoinbasePro
+from coinbase_pro.limiter import Bucket, Limiter
+from coinbase_pro.messenger import API, Auth, Messenger
+from coinbase_pro.plugin.sync import Sync
+from coinbase_pro.server import Server
+from requests import ConnectionError, Response
+
+
+def trade(client: CoinbasePro, count: int):
+    for index in range(count):
+        client.order.post(
+            {
+                "product_id": "ETH-USD",
+                "side": "buy" if index % 2 else "sell",
+                "type": "market",
+                "size": "0.01",
+            }
+        )
+
+
+def test_sync(server: Server, tmp_path):
+    limiter = Limiter(Bucket(10_000, 10_000), Bucket(10_000, 10_000))
+    messenger = Messenger(Auth(API(server.register())), limiter)
+    client = CoinbasePro(messenger)
+    trade(client, 7)
+
+    sync = Sync(messenger, str(tmp_path))
+    assert sync.fills("ETH-USD") == 7
+    assert sync.fills("ETH-USD") == 0
+
+    trade(client, 5)
+    restarted = Sync(messenger, str(tmp_path))
+    assert restarted.fills("ETH-USD") == 5
+
+    trade_ids = [fill["trade_id"] for fill in restarted.read("fills-ETH-USD")]
+    assert trade_ids == sorted(trade_ids) and len(set(trade_ids)) == 12
+    assert restarted.marks["fills-ETH-USD"]["cursor"] is not None
+    assert restarted.marks["fills-ETH-USD"]["count"] == 12
+
+    pulled = restarted.accounts()
+    usd = [a["id"] for a in client.account.list() if a["currency"] == "USD"][0]
+    assert pulled[usd] == 24
+    assert restarted.ledger(usd) == 0
+
+
+def test_sync_pages(server: Server, tmp_path):
+    limiter = Limiter(Bucket(10_000, 10_000), Bucket(10_000, 10_000))
+    messenger = Messenger(Auth(API(server.register())), limiter)
+    client = CoinbasePro(messenger)
+    trade(client, 250)
+
+    sync = Sync(messenger, str(tmp_path))
+    assert sync.fills("ETH-USD") == 250
+    trade(client, 230)
+    assert sync.fills("ETH-USD") == 230
+
+    trade_ids = [fill["trade_id"] for fill in sync.read("fills-ETH-USD")]
+    assert trade_ids == sorted(trade_ids) and len(set(trade_ids)) == 480
+
+
+def test_sync_crash(server: Server, tmp_path):
+    limiter = Limiter(Bucket(10_000, 10_000), Bucket(10_000, 10_000))
+    messenger = Messenger(Auth(API(server.register())), limiter)
+    trade(CoinbasePro(messenger), 3)
+    sync = Sync(messenger, str(tmp_path))
+    sync.fills("ETH-USD")
+
+    with open(sync.path("fills-ETH-USD"), "a") as file:
+        file.write(json.dumps({"trade_id": -1}) + "\n")
+    assert len(list(sync.read("fills-ETH-USD"))) == 3
+
+    trade(CoinbasePro(messenger), 1)
+    assert sync.fills("ETH-USD") == 1
+    assert -1 not in [fill["trade_id"] for fill in sync.read("fills-ETH-USD")]
+
+
+class Outage(Messenger):
+    # NOTE: Fails every GET after the first `pages` have been served
+    def __init__(self, settings: dict, pages: int):
+        limiter = Limiter(Bucket(10_000, 10_000), Bucket(10_000, 10_000))
+        super().__init__(Auth(API(settings)), limiter)
+        self.pages = pages
+
+    def get(self, path: str, data: dict = None) -> Response:
+        if not self.pages:
+            raise ConnectionError("connection reset")
+        self.pages -= 1
+        return super().get(path, data)
+
+
+def test_sync_partial(server: Server, tmp_path):
+    settings = server.register()
+    messenger = Outage(settings, 0)
+    client = CoinbasePro(Messenger(Auth(API(settings)), messenger.limiter))
+    trade(client, 250)
+
+    sync = Sync(Outage(settings, 1), str(tmp_path))
+    with pytest.raises(ConnectionError):
+        sync.fills("ETH-USD")
+    assert sync.marks == {}
+    assert sorted(os.listdir(tmp_path)) == []
+
+    sync = Sync(Outage(settings, 10), str(tmp_path))
+    assert sync.fills("ETH-USD") == 250
+    trade(client, 230)
+
+    sync = Sync(Outage(settings, 2), str(tmp_path))
+    with pytest.raises(ConnectionError):
+        sync.fills("ETH-USD")
+    assert sync.marks["fills-ETH-USD"]["count"] == 450
+
+    sync = Sync(Outage(settings, 10), str(tmp_path))
+    assert sync.fills("ETH-USD") == 30
+    trade_ids = [fill["trade_id"] for fill in sync.read("fills-ETH-USD")]
+    assert trade_ids == sorted(trade_ids) and len(set(trade_ids)) == 480